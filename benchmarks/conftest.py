@@ -0,0 +1,65 @@
+import json
+
+import pytest
+
+from cirun import Cirun
+from cirun.tests import server
+
+REPO_COUNT = 10_000
+ORG = "org-0"
+
+
+def pytest_sessionstart(session):
+    """Fail ``--benchmark-compare`` without a saved baseline, pytest-benchmark
+    only warns and the run would pass without comparing anything."""
+    benchmark_session = getattr(session.config, "_benchmarksession", None)
+    if benchmark_session is not None and benchmark_session.compare and not benchmark_session.compared_mapping:
+        pytest.exit(
+            f"No benchmark baseline in {benchmark_session.storage}, record one with `hatch run bench:save`",
+            returncode=1,
+        )
+
+
+def make_repos(count=REPO_COUNT):
+    return [
+        {"name": f"org-{i % 50}/repository-{i}", "active": i % 3 != 0, "id": 100_000 + i, "private": i % 2 == 0}
+        for i in range(count)
+    ]
+
+
+def make_access_control(count=REPO_COUNT):
+    return {
+        "access_yml": {
+            "policies": [{"id": i, "repo": f"repository-{i}", "teams": ["core"]} for i in range(count)],
+            "access_control": [
+                {"resource": f"runner-{r}", "policies": list(range(r, count, 100))} for r in range(100)
+            ],
+        },
+        "sha": "0" * 40,
+    }
+
+
+@pytest.fixture(scope="session")
+def stand_in():
+    with server.running() as api:
+        api.routes[("GET", "/repo")] = (200, make_repos())
+        api.routes[("GET", "/access-control")] = (200, make_access_control())
+        api.routes[("POST", "/repo")] = (200, {"ok": True})
+        api.routes[("POST", "/cloud-connect")] = (200, {"ok": True})
+        yield api
+
+
+@pytest.fixture
+def client(stand_in, monkeypatch):
+    monkeypatch.setenv("CIRUN_API_ENDPOINT", stand_in.url)
+    return Cirun(token="cirun-token-foo-bar")
+
+
+@pytest.fixture(scope="session")
+def repos_payload():
+    return json.dumps(make_repos()).encode()
+
+
+@pytest.fixture(scope="session")
+def access_control_payload():
+    return json.dumps(make_access_control()).encode()
@@ -0,0 +1,52 @@
+"""Memory used by a 10k repository ``get_repos`` payload as decoded JSON
+versus typed models.
+
+    python -m benchmarks.models_memory
+"""
+import gc
+import json
+import tracemalloc
+
+from cirun.models import repos_from
+
+
+def make_payload(count=10_000):
+    return json.dumps([
+        {
+            "name": f"org-{i % 50}/repository-{i}",
+            "active": i % 3 != 0,
+            "id": 100_000 + i,
+            "private": i % 2 == 0,
+        }
+        for i in range(count)
+    ]).encode()
+
+
+def measure(build):
+    gc.collect()
+    tracemalloc.start()
+    result = build()
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, size
+
+
+def models_memory(count=10_000):
+    """Return ``(dict_bytes, model_bytes)`` for ``count`` repositories."""
+    payload = make_payload(count)
+    _, dict_bytes = measure(lambda: json.loads(payload))
+
+    def build_models():
+        repos = repos_from(json.loads(payload))
+        for _ in repos:  # materialize every model, dropping the decoded dicts
+            pass
+        return repos
+
+    _, model_bytes = measure(build_models)
+    return dict_bytes, model_bytes
+
+
+if __name__ == "__main__":
+    dict_bytes, model_bytes = models_memory()
+    print(f"dicts:  {dict_bytes / 1024:8.0f} KiB")
+    print(f"models: {model_bytes / 1024:8.0f} KiB ({dict_bytes / model_bytes:.1f}x smaller)")
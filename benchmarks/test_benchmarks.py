@@ -0,0 +1,95 @@
+"""Performance benchmarks against a local stand-in API, see the Contributing
+section of the README for saving baselines and comparing against them."""
+import contextlib
+import io
+import json
+import subprocess
+import sys
+
+from cirun import Cirun, schema
+from cirun.models import repos_from
+from cirun.transport import InMemoryTransport
+from cirun.utils import print_success_json
+
+from conftest import ORG, make_repos
+from models_memory import models_memory
+
+
+def test_get_throughput(benchmark, client, stand_in):
+    stand_in.routes[("GET", "/ping")] = (200, {"ok": True})
+    benchmark(lambda: [client._get("ping") for _ in range(50)])
+
+
+def test_post_throughput(benchmark, client):
+    benchmark(lambda: [client._post("repo", json={"repository": "org/repo", "active": True}) for _ in range(50)])
+
+
+def test_get_repos(benchmark, client):
+    assert len(benchmark(client.get_repos)) == len(make_repos())
+
+
+def test_decode_repos(benchmark, repos_payload):
+    benchmark(json.loads, repos_payload)
+
+
+def test_decode_access_control(benchmark, access_control_payload):
+    benchmark(json.loads, access_control_payload)
+
+
+def test_typed_repos(benchmark, repos_payload):
+    benchmark(lambda: list(repos_from(json.loads(repos_payload))))
+
+
+def test_get_repo_resources(benchmark, client):
+    assert benchmark(client.get_repo_resources, ORG, "repository-42") == ["runner-42"]
+
+
+def test_render_repos(benchmark):
+    repos = make_repos(1000)
+
+    def render():
+        with contextlib.redirect_stdout(io.StringIO()):
+            print_success_json(repos)
+    benchmark(render)
+
+
+def test_cloud_connect_many(benchmark, client):
+    entries = [
+        {"cloud": "aws", "credentials": {"access_key": f"AKIA{i}", "secret_key": "secret"}} for i in range(100)
+    ]
+    results = benchmark(client.cloud_connect_many, entries)
+    assert all(result["ok"] for result in results)
+
+
+def test_apply_repo_sync(benchmark, client):
+    plan = {"activate": [f"org-1/new-{i}" for i in range(100)], "deactivate": [], "unchanged": []}
+    benchmark(client.apply_repo_sync, plan)
+
+
+def test_cli_cold_start(benchmark):
+    benchmark.pedantic(
+        subprocess.run, args=([sys.executable, "-m", "cirun.main", "--help"],),
+        kwargs={"check": True, "capture_output": True}, rounds=5,
+    )
+
+
+def test_models_memory():
+    dict_bytes, model_bytes = models_memory()
+    assert model_bytes < dict_bytes
+
+
+def test_validate_access_control(benchmark):
+    entries = [
+        {"repository": f"repository-{i}", "resources": ["cpu", "gpu"], "action": "add",
+         "policy_args": {"pull_request": True}, "teams": ["core"], "roles": None, "users": None,
+         "users_from_json": None}
+        for i in range(100)
+    ]
+    assert benchmark(schema.validate_access_control, entries) == []
+
+
+def test_get_repos_in_memory(benchmark):
+    """Client-side overhead of get_repos, without any network."""
+    transport = InMemoryTransport({("GET", "/repo"): (200, make_repos())})
+    client = Cirun(token="cirun-token-foo-bar", transport=transport)
+    assert len(benchmark(client.get_repos)) == len(make_repos())
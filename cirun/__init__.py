@@ -2,5 +2,10 @@
 #
 # SPDX-License-Identifier: MIT
 
-from .client import Cirun
+import time
+
+# Start of the import of cirun and its dependencies, for ``--profile``.
+IMPORT_STARTED = time.perf_counter()
+
+from .client import Cirun  # noqa: E402
 from .__about__ import __version__
@@ -0,0 +1,58 @@
+import typer
+
+from cirun import Cirun
+from cirun.completion import complete_org
+from cirun.store import open_store
+from cirun.utils import OrderCommands, _print_error_data, print_success_json
+
+access_app = typer.Typer(
+    cls=OrderCommands,
+    help="Query repository access to runner resources",
+    add_completion=False,
+    no_args_is_help=True,
+    rich_markup_mode="rich",
+    context_settings={"help_option_names": ["-h", "--help"]},
+)
+
+
+def _load_access_control(org, offline):
+    store = open_store(offline)
+    if not offline:
+        cirun = Cirun(use_agent=True)
+        access_control = cirun.get_access_control(org)
+        if access_control is None:
+            _print_error_data(f"Could not fetch access control for {org}")
+            raise typer.Exit(code=1)
+        store.sync_access_control(org, access_control)
+    return store
+
+
+@access_app.command()
+def resources(
+        org: str = typer.Argument(..., help="GitHub organization", autocompletion=complete_org),
+        repo: str = typer.Argument(..., help="Repository name, without the organization"),
+        offline: bool = typer.Option(False, "--offline", help="Answer from the local store, see `cirun sync`"),
+):
+    """List resources a repository can use"""
+    store = _load_access_control(org, offline)
+    repo_resources = store.repo_resources(org, repo)
+    if repo_resources is None:
+        _print_error_data(f"No access control stored for {org}, run `cirun sync --org {org}`")
+        raise typer.Exit(code=1)
+    print_success_json(repo_resources)
+
+
+@access_app.command()
+def repos(
+        org: str = typer.Argument(..., help="GitHub organization", autocompletion=complete_org),
+        resource: str = typer.Argument(..., help="Runner resource name"),
+        pattern: str = typer.Option(None, "--filter", help="Only repositories matching this glob"),
+        offline: bool = typer.Option(False, "--offline", help="Answer from the local store, see `cirun sync`"),
+):
+    """List repositories that can use a resource"""
+    store = _load_access_control(org, offline)
+    resource_repos = store.resource_repos(org, resource, pattern=pattern)
+    if resource_repos is None:
+        _print_error_data(f"No access control stored for {org}, run `cirun sync --org {org}`")
+        raise typer.Exit(code=1)
+    print_success_json(resource_repos)
@@ -0,0 +1,332 @@
+"""Local agent that keeps a warm HTTP connection pool and response caches.
+
+The agent listens on a Unix socket and performs HTTP requests on behalf of
+short-lived ``cirun`` processes. Requests and replies are single JSON lines.
+Clients created with ``Cirun(use_agent=True)`` (as the CLI does) forward their
+requests to the agent when it is running and fall back to making them
+in-process when it is not.
+"""
+import base64
+import json
+import os
+import socket
+import socketserver
+import subprocess
+import sys
+import threading
+
+import requests
+import typer
+from rich.console import Console
+
+from cirun.cache import MISSING, TTLCache
+from cirun.transport import make_response
+from cirun.utils import OrderCommands, cirun_cache_dir
+
+AGENT_SOCKET_ENV_VAR = "CIRUN_AGENT_SOCKET"
+DEFAULT_CACHE_TTL = 10
+# GitHub repository IDs never change, lookups are kept for a day.
+GITHUB_ID_CACHE_TTL = 24 * 60 * 60
+
+agent_app = typer.Typer(
+    cls=OrderCommands,
+    help="Manage the local cirun agent",
+    add_completion=False,
+    no_args_is_help=True,
+    rich_markup_mode="rich",
+    context_settings={"help_option_names": ["-h", "--help"]},
+)
+
+
+def default_socket_path():
+    return os.environ.get(AGENT_SOCKET_ENV_VAR) or os.path.join(cirun_cache_dir(), "agent.sock")
+
+
+def _cache_key(request):
+    headers = request.get("headers") or {}
+    return (
+        request["url"],
+        headers.get("Authorization"),
+        json.dumps(request.get("json"), sort_keys=True),
+        json.dumps(request.get("params"), sort_keys=True),
+    )
+
+
+class Agent:
+    """Performs proxied requests with a shared session and response caches."""
+
+    def __init__(self, allowed_urls, cache_ttl=DEFAULT_CACHE_TTL):
+        from cirun.client import GITHUB_API
+
+        self.allowed_urls = tuple(allowed_urls)
+        self.github_api = GITHUB_API
+        self.session = requests.Session()
+        self.responses = TTLCache(cache_ttl) if cache_ttl else None
+        self.github_ids = TTLCache(GITHUB_ID_CACHE_TTL)
+        self.requests = 0
+        self._lock = threading.Lock()
+
+    def handle(self, request):
+        op = request.get("op")
+        if op == "ping":
+            return {"ok": True, "pid": os.getpid(), "stats": self.stats()}
+        if op == "request":
+            return self._forward(request)
+        return {"ok": False, "error": f"Unknown op: {op!r}"}
+
+    def stats(self):
+        return {
+            "requests": self.requests,
+            "response_cache": {
+                "size": len(self.responses) if self.responses else 0,
+                "hits": self.responses.hits if self.responses else 0,
+                "misses": self.responses.misses if self.responses else 0,
+            },
+            "github_id_cache": {"size": len(self.github_ids), "hits": self.github_ids.hits},
+        }
+
+    def _cache_for(self, request):
+        if request["method"] != "GET":
+            return None
+        headers = request.get("headers") or {}
+        if "If-None-Match" in headers or "If-Modified-Since" in headers:
+            # Conditional requests are already cheap and must see the current state.
+            return None
+        if request["url"].startswith(f"{self.github_api}/repos/"):
+            return self.github_ids
+        return self.responses
+
+    def _forward(self, request):
+        url = request.get("url", "")
+        if not url.startswith(self.allowed_urls):
+            return {"ok": False, "error": f"URL not allowed by agent: {url}"}
+        with self._lock:
+            self.requests += 1
+        cache = self._cache_for(request)
+        key = _cache_key(request)
+        if cache is not None:
+            cached = cache.get(key)
+            if cached is not MISSING:
+                return cached
+        elif request["method"] != "GET" and self.responses is not None:
+            # A write may change what subsequent reads return.
+            self.responses.clear()
+        try:
+            response = self.session.request(
+                request["method"], url,
+                headers=request.get("headers"),
+                json=request.get("json"),
+                params=request.get("params"),
+                timeout=tuple(request["timeout"]) if request.get("timeout") else None,
+            )
+        except requests.exceptions.RequestException as e:
+            # The request may have reached the server, the client must not resend it.
+            return {"ok": False, "error": str(e), "error_type": type(e).__name__}
+        reply = {
+            "ok": True,
+            "status_code": response.status_code,
+            "reason": response.reason,
+            "headers": dict(response.headers),
+            "content": base64.b64encode(response.content).decode(),
+        }
+        if cache is not None and response.status_code == 200:
+            cache.set(key, reply)
+        return reply
+
+
+class _Handler(socketserver.StreamRequestHandler):
+    def handle(self):
+        for line in self.rfile:
+            try:
+                request = json.loads(line)
+            except json.JSONDecodeError:
+                reply = {"ok": False, "error": "Invalid JSON request"}
+            else:
+                if request.get("op") == "shutdown":
+                    self._reply({"ok": True})
+                    threading.Thread(target=self.server.shutdown, daemon=True).start()
+                    return
+                reply = self.server.agent.handle(request)
+            self._reply(reply)
+
+    def _reply(self, reply):
+        self.wfile.write(json.dumps(reply).encode() + b"\n")
+        self.wfile.flush()
+
+
+class AgentServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+    def __init__(self, path, agent):
+        self.agent = agent
+        super().__init__(path, _Handler)
+
+    def server_bind(self):
+        # Create the socket owner-only, a chmod after bind() would leave a window
+        # in which other users can connect to it.
+        umask = os.umask(0o177)
+        try:
+            super().server_bind()
+        finally:
+            os.umask(umask)
+
+
+class AgentDisconnected(ConnectionError):
+    """The connection to the agent broke after a message was sent to it."""
+
+
+class AgentClient:
+    """Forwards requests to a running agent. Once the agent is found to be
+    unreachable, the client stops trying for the rest of its lifetime."""
+
+    def __init__(self, path=None):
+        self.path = path or default_socket_path()
+        self.available = hasattr(socket, "AF_UNIX") and os.path.exists(self.path)
+
+    def _call(self, message, timeout=None):
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            sock.settimeout(timeout)
+            sock.connect(self.path)
+            try:
+                sock.sendall(json.dumps(message).encode() + b"\n")
+                with sock.makefile("rb") as f:
+                    line = f.readline()
+            except socket.timeout:
+                raise
+            except OSError as e:
+                raise AgentDisconnected(str(e)) from e
+        if not line:
+            raise AgentDisconnected("Agent closed the connection")
+        try:
+            return json.loads(line)
+        except ValueError as e:
+            raise AgentDisconnected(f"Invalid reply from agent: {e}") from e
+
+    def ping(self):
+        if not self.available:
+            return None
+        try:
+            return self._call({"op": "ping"}, timeout=1)
+        except (OSError, ValueError):
+            return None
+
+    def shutdown(self):
+        return self._call({"op": "shutdown"}, timeout=5)
+
+    def request(self, method, url, headers=None, json=None, params=None, timeout=None):
+        """Perform a request through the agent. Returns a ``requests.Response``
+        or ``None`` when the caller should make the request itself, which is
+        only the case when the agent did not get to send the request. A failed
+        request raises the ``requests`` exception the agent got."""
+        if not self.available:
+            return None
+        message = {
+            "op": "request", "method": method, "url": url, "headers": headers,
+            "json": json, "params": params, "timeout": timeout,
+        }
+        # Don't wait on the agent longer than the request itself may take.
+        if isinstance(timeout, tuple):
+            sock_timeout = None if None in timeout else sum(timeout) + 1
+        else:
+            sock_timeout = timeout
+        try:
+            reply = self._call(message, timeout=sock_timeout)
+        except socket.timeout:
+            raise requests.exceptions.Timeout(f"Agent did not answer within {sock_timeout:.1f}s")
+        except AgentDisconnected as e:
+            self.available = False
+            if method != "GET":
+                raise requests.exceptions.ConnectionError(f"Lost the connection to the agent: {e}")
+            return None
+        except (OSError, ValueError):
+            self.available = False
+            return None
+        if not reply.get("ok"):
+            if "error_type" not in reply:
+                return None
+            error = getattr(requests.exceptions, reply["error_type"], None)
+            if not (isinstance(error, type) and issubclass(error, requests.exceptions.RequestException)):
+                error = requests.exceptions.RequestException
+            raise error(reply["error"])
+        return make_response(
+            reply["status_code"], base64.b64decode(reply["content"]),
+            headers=reply["headers"], url=url, reason=reply["reason"],
+        )
+
+
+@agent_app.command()
+def start(
+        socket_path: str = typer.Option(
+            None, "--socket", help=f"Unix socket path. Defaults to ${AGENT_SOCKET_ENV_VAR} or the cirun cache dir."
+        ),
+        cache_ttl: float = typer.Option(
+            DEFAULT_CACHE_TTL, "--cache-ttl", min=0, help="Seconds to cache API GET responses, 0 disables."
+        ),
+        detach: bool = typer.Option(False, "--detach", "-d", help="Run the agent in the background."),
+):
+    """Start the local cirun agent"""
+    from cirun.client import GITHUB_API
+    from cirun.endpoints import endpoints_from_env
+
+    console = Console()
+    error_console = Console(stderr=True, style="bold red")
+    if not hasattr(socket, "AF_UNIX"):
+        error_console.print("Error: The cirun agent requires Unix domain sockets")
+        raise typer.Exit(code=1)
+    socket_path = socket_path or default_socket_path()
+    if AgentClient(socket_path).ping():
+        console.print(f"[bold green]Agent already running on {socket_path}[/bold green]")
+        return
+    if detach:
+        subprocess.Popen(
+            [sys.executable, "-m", "cirun.main", "agent", "start",
+             "--socket", socket_path, "--cache-ttl", str(cache_ttl)],
+            stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+            start_new_session=True,
+        )
+        console.print(f"[bold green]Agent starting on {socket_path}[/bold green]")
+        return
+    if os.path.exists(socket_path):
+        # Stale socket left behind by an agent that did not shut down cleanly.
+        os.unlink(socket_path)
+    allowed_urls = [f"{api_endpoint}/" for api_endpoint in endpoints_from_env()] + [f"{GITHUB_API}/"]
+    agent = Agent(allowed_urls=allowed_urls, cache_ttl=cache_ttl)
+    server = AgentServer(socket_path, agent)
+    console.print(f"[bold green]Agent listening on {socket_path}[/bold green]")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        if os.path.exists(socket_path):
+            os.unlink(socket_path)
+
+
+@agent_app.command()
+def status(
+        socket_path: str = typer.Option(None, "--socket", help="Unix socket path."),
+):
+    """Show whether the agent is running and its cache statistics"""
+    from cirun.utils import print_success_json, _print_error_data
+
+    reply = AgentClient(socket_path).ping()
+    if not reply:
+        _print_error_data("Agent is not running")
+        raise typer.Exit(code=1)
+    print_success_json({"pid": reply["pid"], **reply["stats"]})
+
+
+@agent_app.command()
+def stop(
+        socket_path: str = typer.Option(None, "--socket", help="Unix socket path."),
+):
+    """Stop the local cirun agent"""
+    from cirun.utils import _print_error_data
+
+    client = AgentClient(socket_path)
+    if not client.ping():
+        _print_error_data("Agent is not running")
+        raise typer.Exit(code=1)
+    client.shutdown()
+    Console(style="bold green").print("Agent stopped")
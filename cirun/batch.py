@@ -0,0 +1,236 @@
+import inspect
+import json
+import shlex
+import sys
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, as_completed, wait
+
+import requests
+import typer
+
+from cirun import Cirun, timeouts
+from cirun.utils import _print_error_data
+
+
+class BatchError(Exception):
+    pass
+
+
+def _response_json(response):
+    if isinstance(response, requests.Response):
+        response.raise_for_status()
+        return response.json()
+    return response
+
+
+def _cloud_connect(client, cloud, credentials=None, key_file=None, config_file=None, **fields):
+    from cirun.cloud import _gcp_credentials_from_file, _oracle_credentials_from_files
+
+    if credentials is None:
+        if cloud == "gcp" and key_file:
+            credentials = _gcp_credentials_from_file(key_file)
+        elif cloud == "oracle" and config_file:
+            credentials = _oracle_credentials_from_files(config_file, key_file)
+        else:
+            credentials = fields
+    errors = client._validate_cloud_credentials(cloud, credentials)
+    if errors:
+        raise BatchError("; ".join(errors))
+    return _response_json(client._post("cloud-connect", json={"cloud": cloud, "credentials": credentials}))
+
+
+def _repo_resources(client, org, repo):
+    resources = client.get_repo_resources(org=org, repo=repo)
+    if resources is None:
+        raise BatchError(f"Could not fetch access control for {org}")
+    return resources
+
+
+def _split_list(value):
+    if isinstance(value, str):
+        return [item for item in value.split(",") if item]
+    return value
+
+
+# Operation name -> (function taking the shared client and keyword arguments,
+# names of the positional arguments accepted in the text form). The text form
+# of an operation is its name with dots replaced by spaces, e.g.
+# ``repo add cirunlabs/cirun --installation-id 123``.
+OPERATIONS = {
+    "repo.list": (lambda client: _response_json(client._get("repo")), ()),
+    "repo.add": (
+        lambda client, name, installation_id=None: client.set_repo(
+            name, active=True, installation_id=int(installation_id) if installation_id else None
+        ),
+        ("name",),
+    ),
+    "repo.remove": (lambda client, name: client.set_repo(name, active=False), ("name",)),
+    "repo.resources": (_repo_resources, ("org", "repo")),
+    "cloud.list": (lambda client: _response_json(client._get("cloud-connect")), ()),
+    "cloud.connect": (_cloud_connect, ("cloud",)),
+    "access.get": (
+        lambda client, org: _response_json(client._get("access-control", json={"org": org})),
+        ("org",),
+    ),
+    "access.add": (
+        lambda client, org, repo, resources, **kwargs: _response_json(client.add_repo_to_resources(
+            org, repo, _split_list(resources),
+            **{key: _split_list(value) if key in ("teams", "roles", "users") else value
+               for key, value in kwargs.items()}
+        )),
+        ("org", "repo"),
+    ),
+    "access.remove": (
+        lambda client, org, repo, resources: _response_json(
+            client.remove_repo_from_resources(org, repo, _split_list(resources))
+        ),
+        ("org", "repo"),
+    ),
+}
+
+
+def _parse_text(line):
+    """Parse a CLI style line such as ``repo add org/repo --installation-id 1``
+    into ``(op, args)``. A leading ``cirun`` is optional."""
+    tokens = shlex.split(line)
+    if tokens and tokens[0] == "cirun":
+        tokens = tokens[1:]
+    if len(tokens) >= 2 and f"{tokens[0]}.{tokens[1]}" in OPERATIONS:
+        op, tokens = f"{tokens[0]}.{tokens[1]}", tokens[2:]
+    else:
+        raise BatchError(f"Unknown command: {line.strip()}")
+
+    positional_names = OPERATIONS[op][1]
+    args, positional = {}, []
+    tokens = iter(tokens)
+    for token in tokens:
+        if token.startswith("--"):
+            key, sep, value = token[2:].partition("=")
+            if not sep:
+                value = next(tokens, None)
+                if value is None or value.startswith("--"):
+                    raise BatchError(f"Option --{key} requires a value")
+            args[key.replace("-", "_")] = value
+        else:
+            positional.append(token)
+    if len(positional) > len(positional_names):
+        raise BatchError(f"Too many arguments for '{op.replace('.', ' ')}': {positional}")
+    args.update(zip(positional_names, positional))
+    return op, args
+
+
+def parse_operation(line):
+    """Parse one line of batch input into ``(id, op, args)``.
+
+    Lines starting with ``{`` are JSON operations, ``{"op": "repo.add", "args":
+    {"name": "org/repo"}}``, the arguments may also be given at the top level.
+    An optional ``"id"`` is echoed back in the result. Any other line is parsed
+    as a CLI style command.
+    """
+    line = line.strip()
+    if not line.startswith("{"):
+        op, args = _parse_text(line)
+        return None, op, args
+    try:
+        data = json.loads(line)
+    except json.JSONDecodeError as e:
+        raise BatchError(f"Invalid JSON operation: {e}")
+    op = data.get("op")
+    if op not in OPERATIONS:
+        raise BatchError(f"Unknown operation: {op!r}")
+    args = data.get("args")
+    if args is None:
+        args = {key: value for key, value in data.items() if key not in ("op", "id")}
+    return data.get("id"), op, args
+
+
+def run_operation(client, op, args):
+    """Run a single operation against ``client`` and return its result."""
+    func = OPERATIONS[op][0]
+    try:
+        inspect.signature(func).bind(client, **args)
+    except TypeError as e:
+        raise BatchError(f"Invalid arguments for {op}: {e}")
+    return func(client, **args)
+
+
+def _execute(client, index, line):
+    result = {"index": index}
+    try:
+        result["id"], result["op"], args = parse_operation(line)
+        result["result"] = run_operation(client, result["op"], args)
+        result["ok"] = True
+    except requests.exceptions.HTTPError as e:
+        result.update(ok=False, error=str(e), status_code=e.response.status_code)
+    except (BatchError, ValueError, OSError, requests.exceptions.RequestException,
+            timeouts.DeadlineExceeded) as e:
+        result.update(ok=False, error=str(e))
+    return result
+
+
+def _read_lines(stream):
+    for index, line in enumerate(stream):
+        if line.strip() and not line.lstrip().startswith("#"):
+            yield index, line
+
+
+def run_batch(lines, client=None, concurrency=1):
+    """Run batch operations and yield one result dict per operation.
+
+    ``lines`` is an iterable of ``(index, line)``. All operations share one
+    :class:`~cirun.Cirun` client. With ``concurrency`` greater than one,
+    operations run on a thread pool and results are yielded as they complete.
+    At most ``2 * concurrency`` lines are read ahead, so a pipe is consumed as
+    the operations progress.
+    """
+    client = client or Cirun()
+    if concurrency <= 1:
+        for index, line in lines:
+            yield _execute(client, index, line)
+        return
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        execute = timeouts.bind(_execute)
+        pending = set()
+        for index, line in lines:
+            pending.add(executor.submit(execute, client, index, line))
+            if len(pending) < 2 * concurrency:
+                continue
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                yield future.result()
+        for future in as_completed(pending):
+            yield future.result()
+
+
+def batch(
+        file: str = typer.Argument(
+            "-",
+            help="File with one command per line, '-' reads from stdin. Lines are either "
+                 "CLI style commands ('repo add org/repo') or JSON operations "
+                 "('{\"op\": \"repo.add\", \"args\": {\"name\": \"org/repo\"}}').",
+        ),
+        concurrency: int = typer.Option(
+            1,
+            "--concurrency",
+            "-c",
+            min=1,
+            help="Number of operations to run concurrently.",
+        ),
+):
+    """Run many commands in one process, printing results as NDJSON"""
+    client = Cirun(use_agent=True)
+    try:
+        stream = sys.stdin if file == "-" else open(file, "r")
+    except OSError as e:
+        _print_error_data(f"Could not read {file}: {e.strerror}")
+        raise typer.Exit(code=1)
+    failed = False
+    try:
+        for result in run_batch(_read_lines(stream), client=client, concurrency=concurrency):
+            failed = failed or not result["ok"]
+            sys.stdout.write(json.dumps(result, default=str) + "\n")
+            sys.stdout.flush()
+    finally:
+        if stream is not sys.stdin:
+            stream.close()
+    if failed:
+        raise typer.Exit(code=1)
@@ -1,12 +1,22 @@
+import json
 import os
+from concurrent.futures import ThreadPoolExecutor, as_completed
 
 import requests
 
-from cirun.utils import _print_error, _print_error_data
+from cirun import models, profiling, schema, timeouts
+from cirun.cache import MISSING, SingleFlight, TTLCache
+from cirun.endpoints import API_ENDPOINT, EndpointPool, endpoints_from_env  # noqa: F401
+from cirun.hedging import Hedger
+from cirun.metrics import ClientMetrics
+from cirun.ratelimit import RateLimiter
+from cirun.transport import transport_from_env
+from cirun.utils import _print_error, _print_error_data, cloud_names, repo_policy_ids, repo_states
 
-API_ENDPOINT = "https://api.cirun.io/api/v1"
 GITHUB_API = "https://api.github.com"
 GH_TOKEN_ENV_VAR = "GITHUB_TOKEN"
+DEFAULT_POOL_MAXSIZE = 32
+DEFAULT_TIMEOUT = timeouts.DEFAULT_TIMEOUT
 
 
 class CirunAPIException(Exception):
@@ -14,46 +24,217 @@ class CirunAPIException(Exception):
 
 
 class Cirun:
-    """Cirun Client to interact to cirun's API"""
-    def __init__(self, token=None):
+    """Cirun Client to interact to cirun's API
+
+    A client is safe to share between threads, e.g. the workers of a
+    ``ThreadPoolExecutor``: its configuration (token, endpoint) is fixed at
+    construction, all threads share one connection pool sized by
+    ``pool_maxsize`` and its caches and metrics are guarded by locks. Prefer one
+    shared client over a client per thread.
+    """
+    def __init__(
+            self,
+            token=None,
+            use_agent=False,
+            coalesce_reads=False,
+            cache_ttl=None,
+            pool_maxsize=DEFAULT_POOL_MAXSIZE,
+            rate_limiter=None,
+            timeout=DEFAULT_TIMEOUT,
+            transport=None,
+            hedge_reads=None,
+            api_endpoints=None,
+    ):
         """
         :param token: cirun's API client token
+        :param use_agent: forward requests to the local cirun agent
+            (``cirun agent start``) when it is running
+        :param coalesce_reads: share one network request between concurrent
+            identical GET requests
+        :param cache_ttl: cache successful GET responses for this many seconds,
+            any write through this client clears the cache
+        :param pool_maxsize: maximum number of pooled connections per host, should
+            be at least the number of threads using the client concurrently
+        :param rate_limiter: :class:`cirun.ratelimit.RateLimiter` applied to API
+            requests, defaults to one configured by ``CIRUN_RATE_LIMIT`` if set
+        :param timeout: ``(connect, read)`` timeout in seconds for every request.
+            Use :func:`cirun.timeouts.deadline` to bound a whole operation.
+        :param transport: :class:`cirun.transport.Transport` carrying the requests,
+            e.g. an in-memory or replay transport. Defaults to a pooled ``requests``
+            session, or the transport selected by ``CIRUN_RECORD``/``CIRUN_REPLAY``.
+        :param hedge_reads: send a second GET request when the first one is slower
+            than usual and use whichever answers first, see :mod:`cirun.hedging`.
+            ``True``, ``False`` or a :class:`cirun.hedging.Hedger`, defaults to one
+            configured by ``CIRUN_HEDGE_READS`` if set.
+        :param api_endpoints: cirun API endpoints in order of preference, e.g.
+            regional or proxy mirrors, defaults to the comma-separated list in
+            ``CIRUN_API_ENDPOINT``. With several, reads go to the fastest healthy
+            one and requests fail over on connection errors, see :mod:`cirun.endpoints`.
         """
-        self.token = token
-        self._get_credentials()
-        self.api_endpoint = os.environ.get('CIRUN_API_ENDPOINT', API_ENDPOINT)
-
-    def _get_credentials(self):
-        if not self.token:
-            try:
-                token = os.environ['CIRUN_API_KEY']
-                self.token = token
-            except KeyError:
-                msg = "Could not find CIRUN_API_KEY in environment variables"
-                _print_error_data(msg)
-                raise KeyError(msg)
-
-    def _headers(self):
-        return {
+        self._token = token or self._get_credentials()
+        self._api_endpoints = list(api_endpoints or endpoints_from_env())
+        # URLs are built with the first endpoint, _request sends them to the best one.
+        self._api_endpoint = self._api_endpoints[0]
+        self._base_headers = {
             "Content-Type": "application/json",
-            "Authorization": f"Bearer {self.token}"
+            "Authorization": f"Bearer {self._token}"
         }
+        self._transport = transport or transport_from_env(pool_maxsize=pool_maxsize, use_agent=use_agent)
+        self._endpoints = None
+        if len(self._api_endpoints) > 1:
+            self._endpoints = EndpointPool(self._api_endpoints, probe=self._probe_endpoint)
+        self._github_repo_ids = TTLCache(ttl=None, maxsize=4096)
+        self.metrics = ClientMetrics()
+        self._single_flight = SingleFlight() if coalesce_reads else None
+        self._read_cache = TTLCache(cache_ttl) if cache_ttl else None
+        self._rate_limiter = rate_limiter or RateLimiter.from_env()
+        self._timeout = timeout
+        if hedge_reads is None:
+            hedge_reads = Hedger.from_env()
+        self._hedger = Hedger() if hedge_reads is True else hedge_reads or None
+
+    def close(self):
+        """Stop the client's hedging threads and endpoint probe and close its
+        transport. Also called when the client is used as a context manager."""
+        if self._hedger is not None:
+            self._hedger.close()
+        if self._endpoints is not None:
+            self._endpoints.close()
+        self._transport.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    @property
+    def token(self):
+        return self._token
+
+    @property
+    def api_endpoint(self):
+        return self._api_endpoint
+
+    @staticmethod
+    def _get_credentials():
+        try:
+            return os.environ['CIRUN_API_KEY']
+        except KeyError:
+            msg = "Could not find CIRUN_API_KEY in environment variables"
+            _print_error_data(msg)
+            raise KeyError(msg)
+
+    def _headers(self, extra=None):
+        headers = dict(self._base_headers)
+        if extra:
+            headers.update(extra)
+        return headers
+
+    def _request(self, method, url, headers=None, **kwargs):
+        if self._rate_limiter is not None and url.startswith(f"{self.api_endpoint}/"):
+            endpoint = url[len(self.api_endpoint) + 1:].split("/", 1)[0]
+            try:
+                waited = self._rate_limiter.acquire(endpoint, max_wait=timeouts.remaining())
+            except TimeoutError:
+                raise timeouts.DeadlineExceeded(f"Deadline exceeded waiting for rate limit of '{endpoint}'")
+            if waited:
+                self.metrics.incr("rate_limited")
+        timeout = kwargs.pop("timeout", None) or self._timeout
+        self.metrics.incr("requests")
+        with profiling.timed("http"):
+            if self._endpoints is None or not url.startswith(f"{self.api_endpoint}/"):
+                return self._transport.request(
+                    method, url, headers=headers, timeout=timeouts.request_timeout(timeout), **kwargs
+                )
+            path = url[len(self.api_endpoint):]
+            response, failovers = self._endpoints.request(
+                lambda endpoint: self._transport.request(
+                    method, f"{endpoint}{path}", headers=headers, timeout=timeouts.request_timeout(timeout), **kwargs
+                ),
+                read=method == "GET",
+            )
+        if failovers:
+            self.metrics.incr("failovers", failovers)
+        return response
 
-    def _get(self, path, *args, **kwargs):
-        return requests.get(f"{self.api_endpoint}/{path}", headers=self._headers(), *args, **kwargs)
+    def _probe_endpoint(self, endpoint):
+        """Background probe of an API endpoint: any answer but a 5xx counts as up."""
+        response = self._transport.request("GET", f"{endpoint}/", timeout=self._timeout)
+        if response.status_code >= 500:
+            raise requests.exceptions.HTTPError(f"{endpoint} answered {response.status_code}")
+
+    @property
+    def endpoint_health(self):
+        """Latency, error rate and state of each API endpoint."""
+        if self._endpoints is None:
+            return [{"url": self.api_endpoint, "latency": None, "error_rate": None, "down": False}]
+        return self._endpoints.snapshot()
+
+    def _get(self, path, headers=None, **kwargs):
+        url = f"{self.api_endpoint}/{path}"
+
+        def fetch():
+            if self._hedger is None:
+                return self._request("GET", url, headers=self._headers(headers), **kwargs)
+            response, hedged, hedge_won = self._hedger.do(
+                lambda: self._request("GET", url, headers=self._headers(headers), **kwargs)
+            )
+            if hedged:
+                self.metrics.incr("hedges")
+            if hedge_won:
+                self.metrics.incr("hedge_wins")
+            return response
+
+        if self._single_flight is None and self._read_cache is None:
+            return fetch()
+
+        key = (url, self.token, json.dumps([headers, kwargs], sort_keys=True, default=str))
+        if self._read_cache is not None:
+            response = self._read_cache.get(key)
+            if response is not MISSING:
+                self.metrics.incr("cache_hits")
+                return response
+            self.metrics.incr("cache_misses")
+
+        if self._single_flight is not None:
+            response, shared = self._single_flight.do(key, fetch)
+            if shared:
+                self.metrics.incr("coalesced")
+        else:
+            response = fetch()
+        if self._read_cache is not None and response.status_code == 200:
+            self._read_cache.set(key, response)
+        return response
 
-    def _post(self, path, *args, **kwargs):
-        return requests.post(f"{self.api_endpoint}/{path}", headers=self._headers(), *args, **kwargs)
+    def _invalidate_reads(self):
+        if self._read_cache is not None:
+            self._read_cache.clear()
 
-    def _put(self, path, *args, **kwargs):
-        return requests.put(f"{self.api_endpoint}/{path}", headers=self._headers(), *args, **kwargs)
+    def _post(self, path, headers=None, **kwargs):
+        self._invalidate_reads()
+        return self._request(
+            "POST", f"{self.api_endpoint}/{path}", headers=self._headers(headers), **kwargs
+        )
 
-    def get_repos(self, print_error=False):
-        """Get all the repositories connected to cirun."""
+    def _put(self, path, headers=None, **kwargs):
+        self._invalidate_reads()
+        return self._request(
+            "PUT", f"{self.api_endpoint}/{path}", headers=self._headers(headers), **kwargs
+        )
+
+    def get_repos(self, print_error=False, typed=False):
+        """Get all the repositories connected to cirun.
+
+        With ``typed=True`` a successful response is returned as a lazy list of
+        compact :class:`cirun.models.Repo` objects.
+        """
         response = self._get("repo")
         if response.status_code not in [200, 201]:
             if print_error:
                 return _print_error(response)
+        elif typed:
+            return models.repos_from(response.json())
         return response.json()
 
     def set_repo(
@@ -104,12 +285,85 @@ class Cirun:
             }
         return response
 
-    def _get_github_repo_id(self, owner, repo):
-        url = f"{GITHUB_API}/repos/{owner}/{repo}"
-        response = requests.get(url)
+    def plan_repo_sync(self, repositories, prune=False):
+        """
+        Compute the changes needed for ``repositories`` to be active, or with
+        ``prune`` for the active repositories to be exactly ``repositories``,
+        with a single call to :meth:`get_repos`.
+
+        Parameters
+        ----------
+        repositories: list of str
+            Full names of the repositories that should be active.
+        prune: bool
+            Deactivate active repositories that are not in ``repositories``.
+            Default is ``False``.
+
+        Returns
+        -------
+        dict
+            ``{"activate": [...], "deactivate": [...], "unchanged": [...]}``
+        """
+        response = self._get("repo")
         response.raise_for_status()
-        response_json = response.json()
-        return response_json["id"]
+        current = repo_states(response.json())
+        active = {name for name, is_active in current.items() if is_active}
+        desired = set(repositories)
+        return {
+            "activate": sorted(desired - active),
+            "deactivate": sorted(active - desired) if prune else [],
+            "unchanged": sorted(desired & active),
+        }
+
+    def apply_repo_sync(self, plan, installation_id=None, max_workers=8):
+        """
+        Apply a plan from :meth:`plan_repo_sync`, activating and deactivating
+        repositories concurrently.
+
+        Parameters
+        ----------
+        plan: dict
+            Plan returned by :meth:`plan_repo_sync`.
+        installation_id: int
+            Cirun App's Installation ID, used to add activated repositories to
+            the GitHub App installation.
+        max_workers: int
+            Maximum number of concurrent requests. Default is 8.
+
+        Returns
+        -------
+        list of dict
+            One ``{"repository", "action", "ok", "error"}`` result per change.
+        """
+        changes = [(name, True) for name in plan["activate"]]
+        changes += [(name, False) for name in plan["deactivate"]]
+
+        def apply(change):
+            name, active = change
+            result = {"repository": name, "action": "activate" if active else "deactivate"}
+            try:
+                self.set_repo(name, active=active, installation_id=installation_id if active else None)
+            except requests.exceptions.RequestException as e:
+                return {**result, "ok": False, "error": str(e)}
+            return {**result, "ok": True, "error": None}
+
+        if not changes:
+            return []
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            return list(executor.map(timeouts.bind(apply), changes))
+
+    def _get_github_repo_id(self, owner, repo):
+        # Repository IDs never change, so lookups are cached for the client's lifetime.
+        key = f"{owner}/{repo}"
+        repo_id = self._github_repo_ids.get(key)
+        if repo_id is MISSING:
+            url = f"{GITHUB_API}/repos/{owner}/{repo}"
+            response = self._request("GET", url)
+            response.raise_for_status()
+            response_json = response.json()
+            repo_id = response_json["id"]
+            self._github_repo_ids.set(key, repo_id)
+        return repo_id
 
     def install_github_app(self, name, installation_id):
         owner, repo = name.split("/")
@@ -124,7 +378,7 @@ class Cirun:
             "Authorization": f"Bearer {gh_token}",
             "Accept": "application/vnd.github+json",
         }
-        response = requests.put(url, headers=headers)
+        response = self._request("PUT", url, headers=headers)
         if response.status_code not in [204, 304]:
             _print_error(response)
             response.raise_for_status()
@@ -135,6 +389,7 @@ class Cirun:
         return response
 
     def update_access_control(self, org, repository_resource_access):
+        schema.raise_for_errors(schema.validate_access_control(repository_resource_access))
         json = {
             "org": org,
             "repository_resource_access": repository_resource_access
@@ -145,10 +400,14 @@ class Cirun:
         response.raise_for_status()
         return response
 
-    def get_access_control(self, org):
+    def get_access_control(self, org, typed=False):
+        """Get the access control document of ``org``, ``None`` if unavailable.
+        With ``typed=True`` it is returned as :class:`cirun.models.AccessControl`."""
         response = self._get("access-control", json={"org": org})
         if response.status_code != 200:
             return
+        if typed:
+            return models.AccessControl(response.json())
         return response.json()
 
     def _create_access_control_repo_resource_data(
@@ -243,6 +502,8 @@ class Cirun:
 
         Raises
         ------
+        cirun.schema.ValidationError
+            If the access control entry is malformed, before anything is sent.
         CirunAPIException
             If the API call fails with an error status code.
         """
@@ -252,11 +513,6 @@ class Cirun:
         )
         return self.update_access_control(org, [repository_resource_access])
 
-    def _get_repo_policy(self, access_yml, repo):
-        for policy in access_yml["policies"]:
-            if policy['repo'] == repo:
-                return policy['id']
-
     def get_repo_resources(self, org, repo):
         """
         Retrieve the list of resources that a repository has access to within an organization.
@@ -285,15 +541,83 @@ class Cirun:
         access_control = self.get_access_control(org)
         if not access_control:
             return
-        access_yml = access_control["access_yml"]
-        policy_id = self._get_repo_policy(access_yml, repo)
-        repo_resources = []
+        return self._resources_by_repo(access_control["access_yml"]).get(repo, [])
+
+    @staticmethod
+    def _resources_by_repo(access_yml):
+        """Resources of every repository in an access control document, in a
+        single pass. A repository gets the resources of its first policy."""
+        policy_repos = repo_policy_ids(access_yml["policies"])
+        repos_by_policy = {}
+        for repo, policy_id in policy_repos.items():
+            repos_by_policy.setdefault(policy_id, []).append(repo)
+        resources = {repo: [] for repo in policy_repos}
         for access_item in access_yml["access_control"]:
-            if policy_id in access_item["policies"]:
-                repo_resources.append(access_item["resource"])
-        return repo_resources
+            for repo in {
+                repo for policy_id in access_item["policies"] for repo in repos_by_policy.get(policy_id, ())
+            }:
+                resources[repo].append(access_item["resource"])
+        return resources
+
+    def inventory(self, orgs, max_workers=8):
+        """
+        Inventory of the repositories of ``orgs``, with the resources each one
+        can use and the clouds connected to the account.
+
+        Repositories, cloud connections and the access control document of
+        every org are each fetched once, concurrently, and joined locally.
+        Records are yielded org by org as soon as the org's access control
+        document arrives.
+
+        Parameters
+        ----------
+        orgs: list of str
+            GitHub organizations to include.
+        max_workers: int
+            Maximum number of concurrent requests. Default is 8.
+
+        Yields
+        ------
+        dict
+            ``{"org", "repository", "active", "resources", "clouds"}`` per
+            repository. ``resources`` is ``None`` when the org's access control
+            is unavailable.
+
+        Raises
+        ------
+        requests.exceptions.HTTPError
+            If the repositories or cloud connections can't be fetched.
+        """
+        def fetch(path):
+            response = self._get(path)
+            response.raise_for_status()
+            return response.json()
 
-    def clouds(self, print_error=False):
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            repos_future = executor.submit(timeouts.bind(fetch), "repo")
+            clouds_future = executor.submit(timeouts.bind(fetch), "cloud-connect")
+            access_futures = {
+                executor.submit(timeouts.bind(self.get_access_control), org): org for org in dict.fromkeys(orgs)
+            }
+            repos_by_org = {}
+            for name, active in repo_states(repos_future.result()).items():
+                org, _, repo = name.partition("/")
+                repos_by_org.setdefault(org, []).append((repo, active))
+            clouds = cloud_names(clouds_future.result())
+            for future in as_completed(access_futures):
+                org = access_futures[future]
+                access_control = future.result()
+                resources = self._resources_by_repo(access_control["access_yml"]) if access_control else None
+                for repo, active in sorted(repos_by_org.get(org, ())):
+                    yield {
+                        "org": org,
+                        "repository": repo,
+                        "active": active,
+                        "resources": None if resources is None else resources.get(repo, []),
+                        "clouds": clouds,
+                    }
+
+    def clouds(self, print_error=False, typed=False):
         """
         Retrieve all cloud providers connected to Cirun.
 
@@ -305,6 +629,9 @@ class Cirun:
         print_error : bool, optional
             If set to True, errors encountered during the API call will be printed.
             Default is False.
+        typed : bool, optional
+            Return a successful response as a lazy list of
+            :class:`cirun.models.CloudConnection`. Default is False.
 
         Returns
         -------
@@ -320,6 +647,8 @@ class Cirun:
         if response.status_code not in [200, 201]:
             if print_error:
                 return _print_error(response)
+        elif typed:
+            return models.clouds_from(response.json())
         return response.json()
 
     def cloud_connect(self, name, credentials, print_error=False):
@@ -344,10 +673,13 @@ class Cirun:
 
         Raises
         ------
+        cirun.schema.ValidationError
+            If required credentials of a known provider are missing or invalid,
+            before anything is sent.
         CirunAPIException
             If the API call fails and `print_error` is False.
         """
-
+        schema.raise_for_errors(self._validate_cloud_credentials(name, credentials))
         data = {
             "cloud": name,
             "credentials": credentials
@@ -358,3 +690,71 @@ class Cirun:
                 _print_error(response)
             return response.json()
         return response.json()
+
+    @staticmethod
+    def _validate_cloud_credentials(name, credentials):
+        """Return a list of problems with ``credentials`` for cloud ``name``."""
+        return schema.validate_cloud_credentials(name, credentials)
+
+    def _submit_cloud_connect(self, name, credentials):
+        try:
+            response = self._post("cloud-connect", json={"cloud": name, "credentials": credentials})
+        except requests.exceptions.RequestException as e:
+            return {"ok": False, "status_code": None, "response": None, "error": str(e)}
+        try:
+            response_json = response.json()
+        except requests.exceptions.JSONDecodeError:
+            response_json = {"responseContent": response.content.decode()}
+        ok = response.status_code in [200, 201]
+        return {
+            "ok": ok,
+            "status_code": response.status_code,
+            "response": response_json,
+            "error": None if ok else f"HTTP {response.status_code}",
+        }
+
+    def cloud_connect_many(self, entries, max_workers=8):
+        """
+        Connect many cloud provider credentials to Cirun concurrently.
+
+        Every entry is validated locally first, entries that fail validation are
+        not sent. The remaining entries are submitted concurrently over the
+        client's pooled HTTP session.
+
+        Parameters
+        ----------
+        entries: list of dict
+            Items of the form ``{"cloud": "aws", "credentials": {...}}``, with the
+            same credential fields as :meth:`cloud_connect`.
+        max_workers: int
+            Maximum number of concurrent requests. Default is 8.
+
+        Returns
+        -------
+        list of dict
+            One result per entry, in input order, with the keys ``cloud``, ``ok``,
+            ``status_code``, ``response`` and ``error``.
+        """
+        results = [None] * len(entries)
+        pending = []
+        for index, entry in enumerate(entries):
+            name = entry.get("cloud") if isinstance(entry, dict) else None
+            credentials = entry.get("credentials") if isinstance(entry, dict) else None
+            errors = self._validate_cloud_credentials(name, credentials)
+            if errors:
+                results[index] = {
+                    "cloud": name, "ok": False, "status_code": None,
+                    "response": None, "error": "; ".join(errors),
+                }
+            else:
+                pending.append((index, name, credentials))
+
+        if pending:
+            with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                futures = {
+                    index: executor.submit(timeouts.bind(self._submit_cloud_connect), name, credentials)
+                    for index, name, credentials in pending
+                }
+            for index, name, _ in pending:
+                results[index] = {"cloud": name, **futures[index].result()}
+        return results
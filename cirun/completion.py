@@ -0,0 +1,110 @@
+"""Shell completion backed by a local index of repository, cloud and org names.
+
+Completion runs on every key press, so candidates are never fetched from the
+API inline. They are read from a small JSON index in the cirun cache dir, which
+is refreshed in a detached background process once it is older than
+``INDEX_TTL`` seconds. Run ``python -m cirun.completion`` to refresh it now.
+"""
+import bisect
+import json
+import os
+import subprocess
+import sys
+import time
+
+from cirun.utils import account_key, cirun_cache_dir, cloud_names, repo_names
+
+INDEX_TTL = 5 * 60
+# Don't spawn another refresh while one started less than this many seconds ago.
+REFRESH_LOCK_TTL = 60
+MAX_CANDIDATES = 200
+
+
+def _index_path():
+    return os.path.join(cirun_cache_dir(), f"completion-{account_key()}.json")
+
+
+def refresh_index(client=None):
+    """Fetch repository and cloud names and atomically rewrite the index.
+
+    If either request fails the current index is kept and ``None`` is returned.
+    """
+    from cirun import Cirun
+    from cirun.store import fetch
+
+    client = client or Cirun(use_agent=True)
+    repos, clouds = fetch(client, "repo"), fetch(client, "cloud-connect")
+    if repos is None or clouds is None:
+        return None
+    repos = sorted(set(repo_names(repos)))
+    index = {
+        "updated_at": time.time(),
+        "repos": repos,
+        "clouds": sorted(set(cloud_names(clouds))),
+        "orgs": sorted({repo.split("/")[0] for repo in repos if "/" in repo}),
+    }
+    path = _index_path()
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(index, f)
+    os.replace(tmp_path, path)
+    return index
+
+
+def _refresh_in_background():
+    lock_path = f"{_index_path()}.refresh"
+    try:
+        if time.time() - os.path.getmtime(lock_path) < REFRESH_LOCK_TTL:
+            return
+    except OSError:
+        pass
+    with open(lock_path, "w"):
+        pass
+    subprocess.Popen(
+        [sys.executable, "-m", "cirun.completion"],
+        stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+        start_new_session=True,
+    )
+
+
+def _load_index():
+    try:
+        with open(_index_path(), "r") as f:
+            index = json.load(f)
+    except (OSError, ValueError):
+        index = {}
+    if time.time() - index.get("updated_at", 0) > INDEX_TTL and os.environ.get("CIRUN_API_KEY"):
+        try:
+            _refresh_in_background()
+        except OSError:
+            pass
+    return index
+
+
+def _complete(values, incomplete):
+    """Prefix search over a sorted list."""
+    start = bisect.bisect_left(values, incomplete)
+    end = bisect.bisect_left(values, incomplete + "\U0010ffff", lo=start)
+    return values[start:min(end, start + MAX_CANDIDATES)]
+
+
+def complete_repo(incomplete: str):
+    return _complete(_load_index().get("repos", []), incomplete)
+
+
+def complete_cloud(incomplete: str):
+    return _complete(_load_index().get("clouds", []), incomplete)
+
+
+def complete_org(incomplete: str):
+    return _complete(_load_index().get("orgs", []), incomplete)
+
+
+if __name__ == "__main__":
+    try:
+        refresh_index()
+    finally:
+        try:
+            os.remove(f"{_index_path()}.refresh")
+        except OSError:
+            pass
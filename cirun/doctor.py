@@ -0,0 +1,230 @@
+"""``cirun doctor``: concurrent connectivity, credential and tooling diagnostics.
+
+Every probe runs concurrently and reports a ``status`` of ``ok``, ``warning``
+or ``error``:
+
+* endpoints: DNS, TCP connect, proxy ``CONNECT``, TLS handshake and first byte
+  times to each cirun API endpoint and GitHub, measured on a raw socket
+* credentials: validity of ``CIRUN_API_KEY`` and ``GITHUB_TOKEN``, and the
+  remaining rate limit where the API reports it
+* cloud CLIs: version and startup time of ``aws``, ``az`` and ``gcloud``
+"""
+import json
+import os
+import shutil
+import socket
+import ssl
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+
+import requests
+import typer
+
+from cirun import timeouts
+from cirun.client import GH_TOKEN_ENV_VAR, GITHUB_API
+from cirun.cloud import _run
+from cirun.endpoints import endpoints_from_env
+from cirun.transport import transport_from_env
+from cirun.utils import print_success_json
+
+CLOUD_CLIS = {
+    "aws": ["aws", "--version"],
+    "az": ["az", "--version"],
+    "gcloud": ["gcloud", "--version"],
+}
+
+
+def _ms(started):
+    return round((time.perf_counter() - started) * 1000, 1)
+
+
+def _read_line(sock):
+    line = b""
+    while not line.endswith(b"\r\n"):
+        chunk = sock.recv(1)
+        if not chunk:
+            break
+        line += chunk
+    return line.decode("latin-1").strip()
+
+
+def probe_endpoint(url, timeout=10.0):
+    """Time DNS resolution, connect, proxy CONNECT, TLS handshake and first byte
+    of a plain ``GET`` to ``url``."""
+    parts = urlsplit(url)
+    https = parts.scheme == "https"
+    host, port = parts.hostname, parts.port or (443 if https else 80)
+    proxy = requests.utils.get_environ_proxies(url).get(parts.scheme)
+    report = {"url": url, "proxy": proxy, "status": "ok"}
+    target_host, target_port = host, port
+    if proxy:
+        proxy_parts = urlsplit(proxy)
+        target_host, target_port = proxy_parts.hostname, proxy_parts.port or 8080
+    stage = "dns"
+    sock = None
+    try:
+        started = time.perf_counter()
+        addresses = socket.getaddrinfo(target_host, target_port, type=socket.SOCK_STREAM)
+        report["dns_ms"] = _ms(started)
+        report["address"] = addresses[0][4][0]
+
+        stage = "connect"
+        started = time.perf_counter()
+        sock = socket.create_connection(addresses[0][4][:2], timeout=timeout)
+        report["connect_ms"] = _ms(started)
+
+        if proxy and https:
+            stage = "proxy"
+            started = time.perf_counter()
+            sock.sendall(f"CONNECT {host}:{port} HTTP/1.1\r\nHost: {host}:{port}\r\n\r\n".encode())
+            status_line = _read_line(sock)
+            while _read_line(sock):
+                pass
+            report["proxy_connect_ms"] = _ms(started)
+            if " 200 " not in f"{status_line} ":
+                raise OSError(f"Proxy refused CONNECT: {status_line}")
+
+        if https:
+            stage = "tls"
+            started = time.perf_counter()
+            sock = ssl.create_default_context().wrap_socket(sock, server_hostname=host)
+            report["tls_ms"] = _ms(started)
+            report["tls_version"] = sock.version()
+
+        stage = "first_byte"
+        path = parts.path or "/"
+        if proxy and not https:
+            path = url
+        started = time.perf_counter()
+        sock.sendall(
+            f"GET {path} HTTP/1.1\r\nHost: {host}\r\nUser-Agent: cirun-doctor\r\nConnection: close\r\n\r\n".encode()
+        )
+        status_line = _read_line(sock)
+        report["first_byte_ms"] = _ms(started)
+        report["http_status"] = int(status_line.split()[1]) if len(status_line.split()) > 1 else None
+    except (OSError, ValueError) as e:
+        report.update(status="error", error=f"{stage}: {e}")
+    finally:
+        if sock is not None:
+            sock.close()
+    return report
+
+
+def _rate_limit(headers):
+    remaining = headers.get("X-RateLimit-Remaining")
+    limit = headers.get("X-RateLimit-Limit")
+    if remaining is None:
+        return None
+    try:
+        return {"remaining": int(remaining), "limit": int(limit) if limit else None}
+    except ValueError:
+        return None
+
+
+def check_cirun_key(transport, api_endpoint, timeout=10.0):
+    token = os.environ.get("CIRUN_API_KEY")
+    if not token:
+        return {"status": "warning", "error": "CIRUN_API_KEY is not set"}
+    started = time.perf_counter()
+    response = transport.request(
+        "GET", f"{api_endpoint}/repo", headers={"Authorization": f"Bearer {token}"}, timeout=timeout,
+    )
+    report = {"latency_ms": _ms(started), "http_status": response.status_code, "rate_limit": _rate_limit(response.headers)}
+    if response.status_code in (401, 403):
+        return {**report, "status": "error", "error": "CIRUN_API_KEY was rejected"}
+    if response.status_code >= 400:
+        return {**report, "status": "error", "error": f"Unexpected status {response.status_code}"}
+    return {**report, "status": "ok"}
+
+
+def check_github_token(transport, timeout=10.0):
+    token = os.environ.get(GH_TOKEN_ENV_VAR)
+    headers = {"Accept": "application/vnd.github+json"}
+    if token:
+        headers["Authorization"] = f"Bearer {token}"
+    started = time.perf_counter()
+    response = transport.request("GET", f"{GITHUB_API}/rate_limit", headers=headers, timeout=timeout)
+    report = {"latency_ms": _ms(started), "http_status": response.status_code, "rate_limit": _rate_limit(response.headers)}
+    if response.status_code == 401:
+        return {**report, "status": "error", "error": f"{GH_TOKEN_ENV_VAR} was rejected"}
+    if response.status_code >= 400:
+        return {**report, "status": "error", "error": f"Unexpected status {response.status_code}"}
+    if not token:
+        return {**report, "status": "warning", "error": f"{GH_TOKEN_ENV_VAR} is not set, needed to install the GitHub App"}
+    rate_limit = report["rate_limit"]
+    if rate_limit and rate_limit["limit"] and rate_limit["remaining"] < rate_limit["limit"] * 0.1:
+        return {**report, "status": "warning", "error": "Less than 10% of the GitHub rate limit left"}
+    return {**report, "status": "ok"}
+
+
+def check_cli(args):
+    if shutil.which(args[0]) is None:
+        return {"status": "warning", "installed": False, "error": f"{args[0]} not found in PATH"}
+    started = time.perf_counter()
+    try:
+        result = _run(args, capture_output=True, text=True, check=True)
+    except subprocess.CalledProcessError as e:
+        return {"status": "error", "installed": True, "startup_ms": _ms(started), "error": (e.stderr or "").strip()}
+    output = (result.stdout or result.stderr or "").strip()
+    return {
+        "status": "ok",
+        "installed": True,
+        "version": output.splitlines()[0] if output else None,
+        "startup_ms": _ms(started),
+    }
+
+
+def run_checks(api_endpoint=None, timeout=10.0, max_workers=8):
+    """Run all probes concurrently and return the report."""
+    api_endpoints = [api_endpoint] if api_endpoint else endpoints_from_env()
+    transport = transport_from_env()
+    checks = {}
+    for index, url in enumerate(api_endpoints):
+        checks[("endpoints", "cirun" if index == 0 else f"cirun-{index + 1}")] = (probe_endpoint, url, timeout)
+    checks.update({
+        ("endpoints", "github"): (probe_endpoint, GITHUB_API, timeout),
+        ("credentials", "cirun"): (check_cirun_key, transport, api_endpoints[0], timeout),
+        ("credentials", "github"): (check_github_token, transport, timeout),
+    })
+    for name, args in CLOUD_CLIS.items():
+        checks[("clis", name)] = (check_cli, args)
+
+    def run(check):
+        func, *args = check
+        try:
+            return func(*args)
+        except (requests.exceptions.RequestException, LookupError) as e:
+            return {"status": "error", "error": str(e)}
+        except Exception as e:
+            # One failing probe must not take down the whole report.
+            return {"status": "error", "error": f"{type(e).__name__}: {e}"}
+
+    try:
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = {key: executor.submit(timeouts.bind(run), check) for key, check in checks.items()}
+    finally:
+        transport.close()
+    report = {"ok": True}
+    for (section, name), future in futures.items():
+        result = future.result()
+        report.setdefault(section, {})[name] = result
+        report["ok"] = report["ok"] and result["status"] != "error"
+    report["python"] = sys.version.split()[0]
+    return report
+
+
+def doctor(
+        as_json: bool = typer.Option(False, "--json", help="Print the report as plain JSON for scripts"),
+        probe_timeout: float = typer.Option(10.0, "--probe-timeout", min=0.1, help="Timeout in seconds of each probe"),
+):
+    """Diagnose connectivity, credentials and cloud CLIs"""
+    report = run_checks(timeout=probe_timeout)
+    if as_json:
+        sys.stdout.write(json.dumps(report) + "\n")
+    else:
+        print_success_json(report)
+    if not report["ok"]:
+        raise typer.Exit(code=1)
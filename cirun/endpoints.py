@@ -0,0 +1,160 @@
+"""Several cirun API endpoints, e.g. regional or proxy mirrors, with latency-based
+selection and failover.
+
+``CIRUN_API_ENDPOINT`` accepts a comma-separated list, in order of preference.
+An :class:`EndpointPool` keeps a moving average of the latency and the recent
+error rate of each endpoint:
+
+* reads go to the fastest healthy endpoint, writes to the first healthy one
+* a connection error marks the endpoint down and the request is retried on the
+  next candidate; reads also fail over on timeouts. Writes only fail over when
+  the connection could not be established, any later error may come after the
+  request was applied
+* a background thread re-probes all endpoints every ``probe_interval`` seconds,
+  measuring their latency and bringing recovered ones back
+
+An endpoint is healthy unless it is down or more than ``max_error_rate`` of its
+recent requests failed with a 5xx status.
+"""
+import collections
+import os
+import threading
+import time
+
+import requests
+import urllib3
+
+API_ENDPOINT = "https://api.cirun.io/api/v1"
+API_ENDPOINT_ENV_VAR = "CIRUN_API_ENDPOINT"
+
+
+def endpoints_from_env():
+    """Endpoints of ``$CIRUN_API_ENDPOINT``, the default endpoint if unset."""
+    spec = os.environ.get(API_ENDPOINT_ENV_VAR, API_ENDPOINT)
+    return [url.strip() for url in spec.split(",") if url.strip()] or [API_ENDPOINT]
+
+
+def _not_sent(error):
+    """Whether ``error`` was raised before the request reached the server: a
+    connect timeout, a refused connection or a failed name resolution."""
+    if isinstance(error, requests.exceptions.ConnectTimeout):
+        return True
+    if not isinstance(error, requests.exceptions.ConnectionError):
+        return False
+    reason = error.args[0] if error.args else None
+    return isinstance(getattr(reason, "reason", reason), urllib3.exceptions.NewConnectionError)
+
+
+class Endpoint:
+    def __init__(self, url, window):
+        self.url = url
+        self.latency = None  # moving average, seconds
+        self.outcomes = collections.deque(maxlen=window)
+        self.down = False
+
+    def error_rate(self):
+        return self.outcomes.count(False) / len(self.outcomes) if self.outcomes else 0.0
+
+    def as_dict(self):
+        return {"url": self.url, "latency": self.latency, "error_rate": self.error_rate(), "down": self.down}
+
+
+class EndpointPool:
+    def __init__(self, urls, probe=None, probe_interval=30.0, window=20, max_error_rate=0.5, alpha=0.3):
+        """
+        :param urls: endpoints in order of preference
+        :param probe: function called with an endpoint URL by the background
+            re-probe, raising if the endpoint is unreachable
+        :param probe_interval: seconds between background re-probes
+        :param window: number of recent requests the error rate is computed from
+        :param max_error_rate: error rate above which an endpoint is unhealthy
+        :param alpha: weight of the latest sample in the latency moving average
+        """
+        self.endpoints = [Endpoint(url, window) for url in urls]
+        self.probe = probe
+        self.probe_interval = probe_interval
+        self.max_error_rate = max_error_rate
+        self.alpha = alpha
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._prober = None
+
+    def healthy(self, endpoint):
+        return not endpoint.down and (
+            len(endpoint.outcomes) < 5 or endpoint.error_rate() <= self.max_error_rate
+        )
+
+    def candidates(self, read=True):
+        """Endpoints to try in order: healthy ones first, the fastest first for
+        reads, in order of preference for writes and for unmeasured endpoints."""
+        self._start_prober()
+        with self._lock:
+            order = list(enumerate(self.endpoints))
+            healthy = [(index, endpoint) for index, endpoint in order if self.healthy(endpoint)]
+            if read:
+                healthy.sort(key=lambda item: (item[1].latency is None, item[1].latency or 0.0, item[0]))
+            unhealthy = [(index, endpoint) for index, endpoint in order if not self.healthy(endpoint)]
+        return [endpoint for _, endpoint in healthy + unhealthy]
+
+    def record(self, endpoint, seconds, ok=True, down=False):
+        with self._lock:
+            endpoint.outcomes.append(ok)
+            if down:
+                endpoint.down = True
+            elif ok:
+                endpoint.down = False
+                latency = endpoint.latency
+                endpoint.latency = seconds if latency is None else latency + self.alpha * (seconds - latency)
+
+    def request(self, send, read=True):
+        """Call ``send(endpoint_url)``, which returns a ``requests.Response``, on
+        the best endpoint, failing over to the next ones on connection errors.
+        Returns ``(response, failovers)``."""
+        error = None
+        for failovers, endpoint in enumerate(self.candidates(read)):
+            started = time.perf_counter()
+            try:
+                response = send(endpoint.url)
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+                self.record(endpoint, time.perf_counter() - started, ok=False, down=True)
+                if not read and not _not_sent(e):
+                    raise
+                error = e
+                continue
+            self.record(endpoint, time.perf_counter() - started, ok=response.status_code < 500)
+            return response, failovers
+        raise error
+
+    def probe_all(self):
+        """Probe every endpoint once, updating latencies and health."""
+        for endpoint in self.endpoints:
+            started = time.perf_counter()
+            try:
+                self.probe(endpoint.url)
+            except Exception:
+                self.record(endpoint, time.perf_counter() - started, ok=False, down=True)
+            else:
+                with self._lock:
+                    if endpoint.down:
+                        endpoint.outcomes.clear()
+                self.record(endpoint, time.perf_counter() - started)
+
+    def _run_prober(self):
+        while not self._stop.is_set():
+            self.probe_all()
+            self._stop.wait(self.probe_interval)
+
+    def _start_prober(self):
+        if self.probe is None or self._prober is not None or len(self.endpoints) < 2:
+            return
+        with self._lock:
+            if self._prober is None:
+                self._prober = threading.Thread(target=self._run_prober, name="cirun-endpoint-probe", daemon=True)
+                self._prober.start()
+
+    def close(self):
+        self._stop.set()
+
+    def snapshot(self):
+        with self._lock:
+            return [endpoint.as_dict() for endpoint in self.endpoints]
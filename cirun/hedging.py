@@ -0,0 +1,127 @@
+"""Hedged requests: cut the tail latency of idempotent reads.
+
+A :class:`Hedger` runs a call and, if it has not returned after an adaptive
+delay (a percentile of the latencies observed recently), runs it a second time
+and returns whichever finishes first. The extra load is capped by a budget:
+every call earns ``budget`` of a hedge, so ``budget=0.05`` allows at most about
+one hedge per 20 calls, with up to ``max_burst`` saved for bursts of slow calls.
+
+Only hedge calls that are safe to run twice, such as GET requests. Enable it on
+the client with ``Cirun(hedge_reads=True)`` or ``CIRUN_HEDGE_READS=95/0.05``
+(percentile/budget).
+"""
+import collections
+import os
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from cirun import timeouts
+
+HEDGE_ENV_VAR = "CIRUN_HEDGE_READS"
+
+
+class Hedger:
+    def __init__(
+            self,
+            percentile=95,
+            budget=0.05,
+            max_burst=10,
+            initial_delay=0.5,
+            min_delay=0.01,
+            window=200,
+            min_samples=20,
+            max_workers=16,
+    ):
+        """
+        :param percentile: observed latency percentile after which a call is hedged
+        :param budget: maximum hedges per call, as a fraction
+        :param max_burst: maximum number of hedges saved up while calls were fast
+        :param initial_delay: delay in seconds before hedging until ``min_samples``
+            latencies have been observed
+        :param min_delay: lower bound of the delay in seconds
+        :param window: number of recent latencies the percentile is computed from
+        :param min_samples: latencies needed before the percentile is used
+        :param max_workers: threads running the calls, at least twice the number
+            of concurrent callers to avoid queueing
+        """
+        if not 0 < percentile < 100:
+            raise ValueError("percentile must be between 0 and 100")
+        if budget < 0:
+            raise ValueError("budget must not be negative")
+        self.percentile = percentile
+        self.budget = budget
+        self.max_burst = max_burst
+        self.initial_delay = initial_delay
+        self.min_delay = min_delay
+        self.min_samples = min_samples
+        self._latencies = collections.deque(maxlen=window)
+        self._tokens = 1.0
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="cirun-hedge")
+
+    @classmethod
+    def from_env(cls):
+        """Hedger configured by ``$CIRUN_HEDGE_READS`` as ``percentile[/budget]``,
+        e.g. ``95/0.05``, ``None`` if unset."""
+        spec = os.environ.get(HEDGE_ENV_VAR)
+        if not spec:
+            return None
+        percentile, _, budget = spec.partition("/")
+        try:
+            return cls(percentile=float(percentile), **({"budget": float(budget)} if budget else {}))
+        except ValueError:
+            raise ValueError(f"Invalid {HEDGE_ENV_VAR} '{spec}', expected percentile[/budget], e.g. 95/0.05")
+
+    def delay(self):
+        """Seconds to wait for a call before hedging it."""
+        with self._lock:
+            if len(self._latencies) < self.min_samples:
+                return self.initial_delay
+            latencies = sorted(self._latencies)
+        index = min(len(latencies) - 1, int(len(latencies) * self.percentile / 100))
+        return max(self.min_delay, latencies[index])
+
+    def _record(self, started, future):
+        if not future.cancelled() and future.exception() is None:
+            with self._lock:
+                self._latencies.append(time.perf_counter() - started)
+
+    def _submit(self, func):
+        started = time.perf_counter()
+        future = self._executor.submit(func)
+        future.add_done_callback(lambda f: self._record(started, f))
+        return future
+
+    def _take_hedge(self):
+        with self._lock:
+            if self._tokens < 1:
+                return False
+            self._tokens -= 1
+            return True
+
+    def do(self, func):
+        """Run ``func``, a second time concurrently if the first run is slow.
+        Returns ``(result, hedged, hedge_won)``. If the first run to finish
+        raised, the other one is waited for; if both raised, the exception of
+        the first to finish is raised."""
+        func = timeouts.bind(func)
+        with self._lock:
+            self._tokens = min(self.max_burst, self._tokens + self.budget)
+        primary = self._submit(func)
+        done, _ = wait([primary], timeout=self.delay())
+        if done or not self._take_hedge():
+            return primary.result(), False, False
+        hedge = self._submit(func)
+        done, _ = wait([primary, hedge], return_when=FIRST_COMPLETED)
+        winner = primary if primary in done else hedge
+        other = hedge if winner is primary else primary
+        # other.exception() waits for the other run to finish.
+        if winner.exception() is not None and other.exception() is None:
+            winner = other
+        return winner.result(), True, winner is hedge
+
+    def close(self, wait=True):
+        """Stop the threads, by default after waiting for the runs still going,
+        such as the slower run of a hedged call."""
+        self._executor.shutdown(wait=wait)
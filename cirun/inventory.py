@@ -0,0 +1,65 @@
+import csv
+import json
+import sys
+from enum import Enum
+from typing import List
+
+import requests
+import typer
+
+from cirun.completion import complete_org
+from cirun.utils import _print_error, print_success_json
+
+FIELDS = ["org", "repository", "active", "resources", "clouds"]
+
+
+class InventoryFormat(str, Enum):
+    json = "json"
+    csv = "csv"
+    ndjson = "ndjson"
+
+
+def _csv_row(record):
+    return {
+        **record,
+        "resources": "" if record["resources"] is None else ";".join(record["resources"]),
+        "clouds": ";".join(record["clouds"]),
+    }
+
+
+def write_inventory(records, output_format, out=None):
+    """Write inventory ``records`` as they arrive, except for ``json`` which is
+    rendered as a single document."""
+    out = out or sys.stdout
+    if output_format == InventoryFormat.json:
+        print_success_json(list(records))
+        return
+    if output_format == InventoryFormat.csv:
+        writer = csv.DictWriter(out, fieldnames=FIELDS)
+        writer.writeheader()
+    for record in records:
+        if output_format == InventoryFormat.csv:
+            writer.writerow(_csv_row(record))
+        else:
+            out.write(json.dumps(record) + "\n")
+        out.flush()
+
+
+def inventory(
+        org: List[str] = typer.Option(
+            ..., "--org", help="Organization to include, can be repeated", autocompletion=complete_org,
+        ),
+        output_format: InventoryFormat = typer.Option(
+            InventoryFormat.json, "--format", help="Output format, csv and ndjson are streamed org by org",
+        ),
+        max_workers: int = typer.Option(8, "--max-workers", min=1, help="Maximum number of concurrent requests"),
+):
+    """Report repositories, their runner resources and connected clouds across organizations"""
+    from cirun import Cirun
+
+    cirun = Cirun(use_agent=True)
+    try:
+        write_inventory(cirun.inventory(org, max_workers=max_workers), output_format)
+    except requests.exceptions.HTTPError as e:
+        _print_error(e.response)
+        raise typer.Exit(code=1)
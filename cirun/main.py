@@ -1,12 +1,21 @@
+import time
 from typing import Optional
 
 import typer
 
+from cirun import IMPORT_STARTED, profiling
+from cirun.access import access_app
+from cirun.agent import agent_app
+from cirun.batch import batch
 from cirun.cloud import cloud_app
+from cirun.doctor import doctor
+from cirun.inventory import inventory
 from cirun.repo import repo_app
+from cirun.store import sync
+from cirun.timeouts import deadline
 
 app = typer.Typer(
-    add_completion=False,
+    add_completion=True,
     no_args_is_help=True,
     rich_markup_mode="rich",
     help="Cirun CLI 🚀",
@@ -16,6 +25,7 @@ app = typer.Typer(
 
 @app.callback(invoke_without_command=True)
 def version(
+        ctx: typer.Context,
         version_: Optional[bool] = typer.Option(
             None,
             "-v",
@@ -23,15 +33,41 @@ def version(
             help="Shows Cirun CLI version",
             is_eager=True,
         ),
+        timeout: Optional[float] = typer.Option(
+            None,
+            "--timeout",
+            envvar="CIRUN_TIMEOUT",
+            min=0,
+            help="Deadline in seconds for the whole command, covering all API requests and cloud CLI calls",
+        ),
+        profile: Optional[str] = typer.Option(
+            None,
+            "--profile",
+            envvar=profiling.PROFILE_ENV_VAR,
+            metavar="FILE",
+            help="Profile the command into FILE (pstats, or collapsed stacks for *.collapsed) "
+                 "and print where the time went",
+        ),
 ):
     from .__about__ import __version__
     if version_:
         print(__version__)
         raise typer.Exit()
+    if profile:
+        finish = profiling.start(profile, import_seconds=time.perf_counter() - IMPORT_STARTED)
+        ctx.call_on_close(finish)
+    if timeout is not None:
+        ctx.with_resource(deadline(timeout))
 
 
 app.add_typer(repo_app, name="repo")
 app.add_typer(cloud_app, name="cloud")
+app.add_typer(access_app, name="access")
+app.command(name="sync")(sync)
+app.command(name="batch")(batch)
+app.command(name="inventory")(inventory)
+app.command(name="doctor")(doctor)
+app.add_typer(agent_app, name="agent")
 
 if __name__ == "__main__":
     app()
@@ -0,0 +1,25 @@
+import threading
+from collections import Counter
+
+
+class ClientMetrics:
+    """Thread-safe counters describing a client's network activity, such as
+    ``requests``, ``coalesced`` and ``cache_hits``."""
+
+    def __init__(self):
+        self._counts = Counter()
+        self._lock = threading.Lock()
+
+    def incr(self, name, value=1):
+        with self._lock:
+            self._counts[name] += value
+
+    def __getitem__(self, name):
+        return self._counts[name]
+
+    def snapshot(self):
+        with self._lock:
+            return dict(self._counts)
+
+    def __repr__(self):
+        return f"ClientMetrics({self.snapshot()})"
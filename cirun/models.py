@@ -0,0 +1,157 @@
+"""Compact typed models for API responses.
+
+Opt in with ``typed=True`` on :meth:`cirun.Cirun.get_repos`,
+:meth:`cirun.Cirun.clouds` and :meth:`cirun.Cirun.get_access_control`. Models
+use ``__slots__`` and keep fields they don't know about in a flat tuple rather
+than a dict, so each record costs less than its decoded JSON dict (see
+``benchmarks/models_memory.py``). List responses are wrapped in a :class:`LazyList`, records are
+only turned into models when accessed. ``.raw`` rebuilds the original dict.
+"""
+from collections.abc import Sequence
+
+from cirun.utils import _records, repo_policy_ids
+
+
+class Model:
+    __slots__ = ("_extra", "_missing")
+    # Fields stored as attributes, every other key goes to ``_extra``. Known
+    # fields absent from the record are ``None`` and listed in ``_missing``.
+    _fields = ()
+
+    def __init__(self, **fields):
+        self._missing = tuple(field for field in self._fields if field not in fields) or None
+        for field in self._fields:
+            setattr(self, field, fields.pop(field, None))
+        self._extra = tuple(item for pair in fields.items() for item in pair) or None
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(**data)
+
+    def get(self, key, default=None):
+        """Value of any field of the original record, known or not."""
+        if key in self._fields:
+            return getattr(self, key)
+        extra = self._extra or ()
+        for index in range(0, len(extra), 2):
+            if extra[index] == key:
+                return extra[index + 1]
+        return default
+
+    @property
+    def raw(self):
+        """The record as a plain dict, as returned by the API."""
+        missing = self._missing or ()
+        data = {field: getattr(self, field) for field in self._fields if field not in missing}
+        extra = self._extra or ()
+        data.update(zip(extra[::2], extra[1::2]))
+        return data
+
+    def __eq__(self, other):
+        return type(self) is type(other) and self.raw == other.raw
+
+    # Models compare by value and are mutable, so they are not hashable.
+    __hash__ = None
+
+    def __repr__(self):
+        fields = ", ".join(f"{field}={getattr(self, field)!r}" for field in self._fields)
+        return f"{type(self).__name__}({fields})"
+
+
+class Repo(Model):
+    __slots__ = ("name", "active")
+    _fields = ("name", "active")
+
+    @property
+    def org(self):
+        return self.name.split("/")[0] if self.name else None
+
+
+class CloudConnection(Model):
+    __slots__ = ("cloud",)
+    _fields = ("cloud",)
+
+
+class AccessPolicy(Model):
+    __slots__ = ("id", "repo")
+    _fields = ("id", "repo")
+
+
+class AccessGrant(Model):
+    __slots__ = ("resource", "policies")
+    _fields = ("resource", "policies")
+
+    def __init__(self, **fields):
+        super().__init__(**fields)
+        self.policies = tuple(self.policies or ())
+
+    @property
+    def raw(self):
+        data = super().raw
+        if "policies" in data:
+            data["policies"] = list(self.policies)
+        return data
+
+
+class LazyList(Sequence):
+    """Read-only list of records that are turned into ``model`` instances on
+    first access. The decoded record is dropped once its model exists."""
+
+    __slots__ = ("_items", "_model")
+
+    def __init__(self, records, model):
+        self._items = list(records)
+        self._model = model
+
+    def __len__(self):
+        return len(self._items)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        item = self._items[index]
+        if not isinstance(item, self._model):
+            item = self._items[index] = self._model.from_dict(item)
+        return item
+
+    def __repr__(self):
+        return f"LazyList({self._model.__name__}, {len(self)} items)"
+
+
+class AccessControl:
+    """Access control document of an organization."""
+
+    __slots__ = ("policies", "grants", "_access_yml_extra", "_extra")
+
+    def __init__(self, data):
+        data = dict(data)
+        access_yml = dict(data.pop("access_yml", None) or {})
+        self.policies = LazyList(access_yml.pop("policies", None) or [], AccessPolicy)
+        self.grants = LazyList(access_yml.pop("access_control", None) or [], AccessGrant)
+        self._access_yml_extra = access_yml or None
+        self._extra = data or None
+
+    def resources_for(self, repo):
+        """Resources ``repo`` has access to, like :meth:`cirun.Cirun.get_repo_resources`."""
+        policy_id = next((policy.id for policy in self.policies if policy.repo == repo), None)
+        return [grant.resource for grant in self.grants if policy_id is not None and policy_id in grant.policies]
+
+    @property
+    def raw(self):
+        access_yml = {
+            "policies": [policy.raw for policy in self.policies],
+            "access_control": [grant.raw for grant in self.grants],
+            **(self._access_yml_extra or {}),
+        }
+        return {"access_yml": access_yml, **(self._extra or {})}
+
+    def __repr__(self):
+        return f"AccessControl({len(self.policies)} policies, {len(self.grants)} grants)"
+
+
+def repos_from(payload):
+    return LazyList(_records(payload, "repos", "repositories", "data"), Repo)
+
+
+def clouds_from(payload):
+    return LazyList(_records(payload, "clouds", "cloud_connections", "data"), CloudConnection)
@@ -0,0 +1,148 @@
+"""Profiling of CLI commands: ``cirun --profile FILE ...`` or ``CIRUN_PROFILE=FILE``.
+
+The command runs under ``cProfile`` and the stats are written to ``FILE`` in
+pstats format (``python -m pstats FILE``, snakeviz, ...). When ``FILE`` ends in
+``.collapsed`` or ``.folded``, a sampling profiler records the stacks of all
+threads instead and writes them in the collapsed format read by
+``flamegraph.pl`` and speedscope.
+
+Either way a breakdown of the wall time into buckets is printed to stderr:
+``import`` (loading cirun and its dependencies), ``http`` (API and GitHub
+requests), ``subprocess`` (cloud CLIs), ``render`` (terminal output) and
+``other``. Time spent concurrently in worker threads is added up per bucket, so
+buckets can exceed the wall time of a command using thread pools.
+"""
+import collections
+import contextlib
+import cProfile
+import sys
+import threading
+import time
+
+from rich.console import Console
+
+PROFILE_ENV_VAR = "CIRUN_PROFILE"
+BUCKETS = ("import", "http", "subprocess", "render")
+SAMPLE_INTERVAL = 0.005
+
+_active = None
+_local = threading.local()
+
+
+@contextlib.contextmanager
+def timed(bucket):
+    """Add the wall time of the block to ``bucket`` of the active profile. Nested
+    blocks in the same thread only count once, in the outermost bucket."""
+    profile = _active
+    if profile is None or getattr(_local, "busy", False):
+        yield
+        return
+    _local.busy = True
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        profile.add(bucket, time.perf_counter() - started)
+        _local.busy = False
+
+
+class Sampler:
+    """Samples the stacks of all threads every ``interval`` seconds."""
+
+    def __init__(self, interval=SAMPLE_INTERVAL):
+        self.interval = interval
+        self.stacks = collections.Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="cirun-profiler", daemon=True)
+
+    def _run(self):
+        own = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own:
+                    continue
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(f"{code.co_name} ({code.co_filename}:{code.co_firstlineno})")
+                    frame = frame.f_back
+                self.stacks[";".join(reversed(stack))] += 1
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def write(self, path):
+        with open(path, "w") as f:
+            for stack, count in self.stacks.most_common():
+                f.write(f"{stack} {count}\n")
+
+
+class Profile:
+    def __init__(self, path, import_seconds=0.0):
+        self.path = path
+        self.buckets = dict.fromkeys(BUCKETS, 0.0)
+        self.buckets["import"] = import_seconds
+        self._lock = threading.Lock()
+        self._started = None
+        self._profiler = None
+        self._sampler = None
+
+    @property
+    def sampling(self):
+        return self.path.endswith((".collapsed", ".folded"))
+
+    def add(self, bucket, seconds):
+        with self._lock:
+            self.buckets[bucket] += seconds
+
+    def start(self):
+        global _active
+        _active = self
+        self._started = time.perf_counter()
+        if self.sampling:
+            self._sampler = Sampler()
+            self._sampler.start()
+        else:
+            self._profiler = cProfile.Profile()
+            self._profiler.enable()
+
+    def stop(self):
+        """Stop profiling, write the profile and return the time buckets."""
+        global _active
+        elapsed = time.perf_counter() - self._started
+        if self._sampler is not None:
+            self._sampler.stop()
+            self._sampler.write(self.path)
+        else:
+            self._profiler.disable()
+            self._profiler.dump_stats(self.path)
+        _active = None
+        buckets = dict(self.buckets)
+        measured = sum(buckets[bucket] for bucket in BUCKETS if bucket != "import")
+        buckets["other"] = max(0.0, elapsed - measured)
+        buckets["total"] = buckets["import"] + elapsed
+        return buckets
+
+
+def report(path, buckets):
+    console = Console(stderr=True)
+    console.print(f"Profile written to {path}")
+    total = buckets["total"] or 1.0
+    for bucket, seconds in buckets.items():
+        share = "" if bucket == "total" else f" {seconds / total:6.1%}"
+        console.print(f"  {bucket:<10} {seconds * 1000:9.1f} ms{share}")
+
+
+def start(path, import_seconds=0.0):
+    """Profile the rest of the command, returns a function that stops the profile
+    and reports it."""
+    profile = Profile(path, import_seconds)
+    profile.start()
+
+    def finish():
+        report(path, profile.stop())
+    return finish
@@ -0,0 +1,108 @@
+"""Cloud providers of ``cirun cloud connect`` and ``cirun cloud create``.
+
+Each subcommand is registered by name in an entry point group, pointing to the
+function implementing it, which is converted to a command like any Typer
+command. Names are read from package metadata without importing anything, and
+a provider's module is only imported when one of its subcommands runs (or when
+the help of ``connect``/``create`` lists them), so installing more providers
+does not slow down other commands.
+
+A package adds a provider, or replaces a built-in one, with entry points in its
+``pyproject.toml``::
+
+    [project.entry-points."cirun.providers.connect"]
+    hetzner = "cirun_hetzner:connect"
+
+    [project.entry-points."cirun.providers.create"]
+    hetzner = "cirun_hetzner:create"
+
+A new provider makes its credentials pass local validation by calling
+:func:`cirun.schema.register_cloud` when its module is imported.
+"""
+import importlib
+
+import click
+from typer.main import get_command_from_info
+from typer.models import CommandInfo
+
+from cirun.utils import OrderCommands
+
+CONNECT_GROUP = "cirun.providers.connect"
+CREATE_GROUP = "cirun.providers.create"
+
+BUILTIN_PROVIDERS = {
+    CONNECT_GROUP: {
+        "aws": "cirun.providers.aws:connect",
+        "azure": "cirun.providers.azure:connect",
+        "gcp": "cirun.providers.gcp:connect",
+        "openstack": "cirun.providers.openstack:connect",
+        "oracle": "cirun.providers.oracle:connect",
+    },
+    CREATE_GROUP: {
+        "azure": "cirun.providers.azure:create",
+        "aws": "cirun.providers.aws:create",
+        "aws-cache-permissions": "cirun.providers.aws:cache_permissions",
+        "gcp": "cirun.providers.gcp:create",
+    },
+}
+
+
+def _entry_points(group):
+    try:
+        from importlib.metadata import entry_points
+    except ImportError:  # Python 3.7
+        return []
+    found = entry_points()
+    if hasattr(found, "select"):
+        return found.select(group=group)
+    return found.get(group, [])
+
+
+def provider_commands(group):
+    """Subcommand names of ``group`` mapped to ``module:function``, built-in
+    providers first. Installed entry points override built-ins of the same name."""
+    commands = dict(BUILTIN_PROVIDERS[group])
+    for entry_point in _entry_points(group):
+        commands[entry_point.name] = entry_point.value
+    return commands
+
+
+def load_provider_command(target):
+    """Import the function (or click command) ``module:function`` of a provider."""
+    module_name, _, attr = target.partition(":")
+    return getattr(importlib.import_module(module_name), attr)
+
+
+class LazyProviderGroup(OrderCommands):
+    """Group whose commands are the providers registered in ``entry_point_group``,
+    imported on first use."""
+
+    entry_point_group = None
+
+    def _providers(self):
+        if not hasattr(self, "_provider_targets"):
+            self._provider_targets = provider_commands(self.entry_point_group)
+        return self._provider_targets
+
+    def list_commands(self, ctx):
+        return list(self.commands) + [name for name in self._providers() if name not in self.commands]
+
+    def get_command(self, ctx, name):
+        if name not in self.commands and name in self._providers():
+            command = load_provider_command(self._providers()[name])
+            if not isinstance(command, click.Command):
+                command = get_command_from_info(
+                    CommandInfo(name=name, callback=command),
+                    pretty_exceptions_short=True,
+                    rich_markup_mode=self.rich_markup_mode,
+                )
+            self.add_command(command, name)
+        return self.commands.get(name)
+
+
+class ConnectGroup(LazyProviderGroup):
+    entry_point_group = CONNECT_GROUP
+
+
+class CreateGroup(LazyProviderGroup):
+    entry_point_group = CREATE_GROUP
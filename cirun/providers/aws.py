@@ -0,0 +1,538 @@
+"""Amazon Web Services: ``cirun cloud connect aws``, ``cirun cloud create aws``
+and ``cirun cloud create aws-cache-permissions``."""
+import fnmatch
+import json
+import os
+import subprocess
+import urllib.parse
+from concurrent.futures import ThreadPoolExecutor
+from typing import List
+
+import typer
+from rich.console import Console
+
+from cirun import timeouts
+from cirun.cloud import (
+    CommandTimedOut,
+    PreflightError,
+    _cli_step,
+    _cli_installed_check,
+    _cli_undo,
+    _connect_cloud,
+    _generated_name,
+    _journal_path,
+    _preflight,
+    _resume_journal,
+    _resume_option,
+    _rollback,
+    _rollback_option,
+    _run,
+    _run_flow,
+)
+from cirun.steps import Journal, Step
+from cirun.utils import option
+
+# Inline IAM policy granting all permissions cirun needs for the GitHub Actions
+# Cache feature on AWS. Mirrors the 7 statements documented at
+# https://docs.cirun.io/caching/aws (Step 1) verbatim. The `<ACCOUNT_ID>`
+# placeholder in the STSAssumeRole resource is substituted at apply time.
+AWS_CIRUN_CACHE_POLICY_NAME = "CirunCachePermissions"
+AWS_CIRUN_CACHE_POLICY_TEMPLATE = {
+    "Version": "2012-10-17",
+    "Statement": [
+        {
+            "Sid": "S3BucketManagement",
+            "Effect": "Allow",
+            "Action": [
+                "s3:CreateBucket",
+                "s3:DeleteBucket",
+                "s3:ListBucket",
+                "s3:GetBucketLocation",
+                "s3:GetBucketVersioning",
+                "s3:PutBucketVersioning",
+            ],
+            "Resource": "arn:aws:s3:::cirun-caching-*",
+        },
+        {
+            "Sid": "S3LifecycleManagement",
+            "Effect": "Allow",
+            "Action": ["s3:PutLifecycleConfiguration"],
+            "Resource": "arn:aws:s3:::cirun-caching-*",
+        },
+        {
+            "Sid": "S3ObjectManagement",
+            "Effect": "Allow",
+            "Action": [
+                "s3:PutObject",
+                "s3:GetObject",
+                "s3:DeleteObject",
+                "s3:ListMultipartUploadParts",
+                "s3:AbortMultipartUpload",
+            ],
+            "Resource": "arn:aws:s3:::cirun-caching-*/*",
+        },
+        {
+            "Sid": "IAMRoleManagement",
+            "Effect": "Allow",
+            "Action": [
+                "iam:CreateRole",
+                "iam:DeleteRole",
+                "iam:GetRole",
+                "iam:ListRoles",
+                "iam:PutRolePolicy",
+                "iam:DeleteRolePolicy",
+                "iam:ListRolePolicies",
+                "iam:GetRolePolicy",
+                "iam:UpdateAssumeRolePolicy",
+            ],
+            "Resource": [
+                "arn:aws:iam::*:role/CirunCacheRole",
+                "arn:aws:iam::*:role/CirunCache*Role",
+            ],
+        },
+        {
+            "Sid": "STSOperations",
+            "Effect": "Allow",
+            "Action": ["sts:GetCallerIdentity"],
+            "Resource": "*",
+        },
+        {
+            "Sid": "STSAssumeRole",
+            "Effect": "Allow",
+            "Action": ["sts:AssumeRole"],
+            "Resource": "arn:aws:iam::<ACCOUNT_ID>:role/CirunCache*",
+        },
+        {
+            "Sid": "AllowPolicySimulation",
+            "Effect": "Allow",
+            "Action": [
+                "iam:SimulatePrincipalPolicy",
+                "iam:GetContextKeysForPrincipalPolicy",
+                "iam:GetPolicy",
+                "iam:GetPolicyVersion",
+                "iam:GetUserPolicy",
+                "iam:GetRolePolicy",
+            ],
+            "Resource": "*",
+        },
+    ],
+}
+
+
+def _aws_cache_policy_doc(account_id: str) -> str:
+    """Return the cirun cache policy JSON with the AccountID placeholder replaced."""
+    doc = json.dumps(AWS_CIRUN_CACHE_POLICY_TEMPLATE)
+    return doc.replace("<ACCOUNT_ID>", account_id)
+
+
+def _normalize_policy(policy) -> list:
+    """Return a canonical, order-insensitive form of an IAM policy document.
+
+    IAM accepts a single string or a list for ``Action``/``Resource`` and does not
+    care about statement or action order, so two documents that only differ in
+    those respects compare equal here.
+    """
+    if isinstance(policy, str):
+        policy = json.loads(urllib.parse.unquote(policy))
+    statements = policy.get("Statement", [])
+    if isinstance(statements, dict):
+        statements = [statements]
+    normalized = []
+    for statement in statements:
+        item = {}
+        for key, value in statement.items():
+            if isinstance(value, str) and key in ("Action", "NotAction", "Resource", "NotResource"):
+                value = [value]
+            if isinstance(value, list):
+                value = sorted(value)
+            item[key] = value
+        normalized.append(json.dumps(item, sort_keys=True))
+    return [policy.get("Version")] + sorted(normalized)
+
+
+def _put_aws_cache_policy(user_name: str, policy_doc: str) -> None:
+    """Run ``put-user-policy`` for the cirun cache inline policy. Raises
+    ``subprocess.CalledProcessError`` on failure."""
+    _run(
+        [
+            "aws", "iam", "put-user-policy",
+            "--user-name", user_name,
+            "--policy-name", AWS_CIRUN_CACHE_POLICY_NAME,
+            "--policy-document", policy_doc,
+        ],
+        capture_output=True,
+        check=True,
+        text=True,
+    )
+
+
+def _get_aws_cache_policy(user_name: str):
+    """Return the user's current cirun cache inline policy document, or ``None``
+    if the user does not have it."""
+    result = _run(
+        [
+            "aws", "iam", "get-user-policy",
+            "--user-name", user_name,
+            "--policy-name", AWS_CIRUN_CACHE_POLICY_NAME,
+            "--output", "json",
+        ],
+        capture_output=True,
+        text=True,
+    )
+    if result.returncode != 0:
+        if "NoSuchEntity" in result.stderr:
+            return None
+        raise subprocess.CalledProcessError(
+            result.returncode, result.args, output=result.stdout, stderr=result.stderr
+        )
+    return json.loads(result.stdout).get("PolicyDocument")
+
+
+def _list_aws_iam_users(pattern: str) -> list:
+    """Return IAM user names matching a glob ``pattern`` such as ``cirun-*``."""
+    result = _run(
+        ["aws", "iam", "list-users", "--output", "json"],
+        capture_output=True,
+        check=True,
+        text=True,
+    )
+    users = json.loads(result.stdout).get("Users", [])
+    return sorted(
+        user["UserName"] for user in users
+        if fnmatch.fnmatchcase(user["UserName"], pattern)
+    )
+
+
+def _sync_aws_cache_policy(user_name: str, account_id: str) -> dict:
+    """Write the cirun cache inline policy to ``user_name`` only if it drifted
+    from the template. Returns ``{"user", "status", "error"}`` where status is
+    one of ``unchanged``, ``updated`` or ``failed``."""
+    policy_doc = _aws_cache_policy_doc(account_id)
+    try:
+        current = _get_aws_cache_policy(user_name)
+        if current is not None and _normalize_policy(current) == _normalize_policy(policy_doc):
+            return {"user": user_name, "status": "unchanged", "error": None}
+        _put_aws_cache_policy(user_name, policy_doc)
+    except subprocess.CalledProcessError as e:
+        error = (e.stderr or "").strip() or (e.stdout or "").strip()
+        return {"user": user_name, "status": "failed", "error": error}
+    return {"user": user_name, "status": "updated", "error": None}
+
+
+def _aws_cache_policy_step(user_name: str, account_id: str, requires=()):
+    """Step attaching the cirun cache inline policy to an IAM user. Idempotent
+    (put-user-policy overwrites)."""
+    return Step(
+        "cache-policy",
+        lambda values: _put_aws_cache_policy(user_name, _aws_cache_policy_doc(account_id)),
+        requires=requires,
+        description=f"Applying inline policy [bold green]{AWS_CIRUN_CACHE_POLICY_NAME}[/bold green] "
+                    f"to IAM user [bold green]{user_name}[/bold green]",
+        error="Error applying cirun cache policy",
+        undo=_cli_undo([
+            "aws", "iam", "delete-user-policy",
+            "--user-name", user_name,
+            "--policy-name", AWS_CIRUN_CACHE_POLICY_NAME,
+        ]),
+    )
+
+
+def _aws_steps(name, policy_arn, account_id, with_cache_permissions):
+    # The policies only depend on the user and are applied concurrently. The
+    # access key is created last, so no credential exists for a user that is
+    # not fully set up.
+    steps = [
+        _cli_step(
+            "create-user",
+            ["aws", "iam", "create-user", "--user-name", name],
+            description=f"Creating IAM user '[bold green]{name}[/bold green]'",
+            error="Error creating IAM user",
+            undo=["aws", "iam", "delete-user", "--user-name", name],
+        ),
+        _cli_step(
+            "attach-policy",
+            ["aws", "iam", "attach-user-policy", "--user-name", name, "--policy-arn", policy_arn],
+            description=f"Attaching policy [bold green]{policy_arn}[/bold green]",
+            error="Error attaching policy",
+            requires=["create-user"],
+            undo=["aws", "iam", "detach-user-policy", "--user-name", name, "--policy-arn", policy_arn],
+        ),
+    ]
+    # Apply cirun cache permissions inline policy (default on; --no-cache-permissions to skip).
+    if with_cache_permissions:
+        steps.append(_aws_cache_policy_step(name, account_id, requires=["create-user"]))
+    steps.append(_cli_step(
+        "create-access-key",
+        ["aws", "iam", "create-access-key", "--user-name", name, "--output", "json"],
+        description="Creating access key",
+        error="Error creating access key",
+        requires=[step.name for step in steps],
+        parse=json.loads,
+        undo=lambda value: [
+            "aws", "iam", "delete-access-key",
+            "--user-name", name,
+            "--access-key-id", value["AccessKey"]["AccessKeyId"],
+        ],
+    ))
+    return steps
+
+
+def connect(
+        access_key=option("--access-key", help="AWS_ACCESS_KEY_ID"),
+        secret_key=option("--secret-key", help="AWS_SECRET_ACCESS_KEY"),
+):
+    """Connect AWS to Cirun"""
+    credentials = {
+        "access_key": access_key,
+        "secret_key": secret_key
+    }
+    _connect_cloud(name="aws", credentials=credentials)
+
+
+def create(
+        name: str = typer.Option(
+            None,
+            "--name",
+            help="Name for the IAM user (optional, auto-generated if not provided)"
+        ),
+        policy_arn: str = typer.Option(
+            "arn:aws:iam::aws:policy/AmazonEC2FullAccess",
+            "--policy-arn",
+            help="IAM policy ARN to attach to the user"
+        ),
+        with_cache_permissions: bool = typer.Option(
+            True,
+            "--with-cache-permissions/--no-cache-permissions",
+            help=(
+                "Also apply the inline policy needed for the cirun GitHub Actions "
+                "cache feature (S3 + IAM role + STS AssumeRole). Matches the policy "
+                "documented at https://docs.cirun.io/caching/aws."
+            ),
+        ),
+        auto_connect: bool = typer.Option(
+            False,
+            "--auto-connect",
+            help="Automatically connect the created credentials to Cirun"
+        ),
+        resume: bool = _resume_option(),
+        rollback: bool = _rollback_option(),
+):
+    """Create AWS IAM User credentials for Cirun"""
+
+    console = Console()
+    error_console = Console(stderr=True, style="bold red")
+
+    if auto_connect and not os.environ.get("CIRUN_API_KEY"):
+        error_console.print("Error: CIRUN_API_KEY environment variable is required for --auto-connect")
+        raise typer.Exit(code=1)
+
+    def caller_identity_check():
+        try:
+            result = _run(
+                ["aws", "sts", "get-caller-identity", "--output", "json"],
+                capture_output=True,
+                check=True,
+                text=True
+            )
+        except (subprocess.CalledProcessError, FileNotFoundError):
+            raise PreflightError("Error: Not authenticated with AWS CLI", "Please run: aws configure")
+        return json.loads(result.stdout)
+
+    # Check that the AWS CLI is installed and the caller identity, concurrently
+    checks = {"cli": _cli_installed_check(
+        ["aws", "--version"], "AWS CLI", "https://docs.aws.amazon.com/cli/latest/userguide/getting-started-install.html",
+    )}
+    if not rollback:
+        console.print("[bold blue]Checking AWS CLI configuration...[/bold blue]")
+        checks["identity"] = caller_identity_check
+    preflight = _preflight(checks, error_console)
+
+    if rollback:
+        _rollback("aws", name, _aws_steps, console, error_console)
+        return
+    caller_identity = preflight["identity"]
+
+    # Display account details
+    console.print("\n[bold green]AWS Account Details:[/bold green]")
+    console.print(f"  Account ID: [bold]{caller_identity.get('Account', 'N/A')}[/bold]")
+    console.print(f"  ARN:        [bold]{caller_identity.get('Arn', 'N/A')}[/bold]")
+    console.print(f"  User ID:    [bold]{caller_identity.get('UserId', 'N/A')}[/bold]")
+    console.print("")
+
+    context = {
+        "policy_arn": policy_arn,
+        "account_id": caller_identity.get("Account"),
+        "with_cache_permissions": with_cache_permissions,
+    }
+    journal = _resume_journal("aws", name, resume, console, error_console, **context)
+    if journal is None:
+        # Generate IAM user name if not provided
+        name = name or _generated_name()
+        journal = Journal(_journal_path("aws", name), context={"name": name, **context})
+    name, policy_arn = journal.context["name"], journal.context["policy_arn"]
+
+    # Confirm before creating
+    typer.confirm(
+        f"Create IAM user '{name}' with policy '{policy_arn}'?",
+        abort=True,
+    )
+
+    values = _run_flow(_aws_steps(**journal.context), console, error_console, journal)
+    key_data = values["create-access-key"].get("AccessKey", {})
+
+    access_key = key_data.get("AccessKeyId")
+    secret_key = key_data.get("SecretAccessKey")
+
+    # Display credentials
+    success_console = Console(style="bold green")
+    success_console.rule("[bold green]")
+    success_console.print("[bold green]✓[/bold green] IAM user created successfully!")
+    success_console.print("")
+    success_console.print("[bold yellow]AWS Credentials for Cirun:[/bold yellow]")
+    success_console.print("")
+    success_console.print(f"  AWS_ACCESS_KEY_ID:     [bold]{access_key}[/bold]")
+    success_console.print(f"  AWS_SECRET_ACCESS_KEY: [bold]{secret_key}[/bold]")
+    success_console.print("")
+    success_console.print("[bold red]⚠️  Save the SECRET_ACCESS_KEY - it won't be shown again![/bold red]")
+    success_console.rule("[bold green]")
+
+    # Auto-connect if requested
+    if auto_connect:
+        console.print("\n[bold blue]Connecting credentials to Cirun...[/bold blue]")
+        credentials = {
+            "access_key": access_key,
+            "secret_key": secret_key,
+        }
+        _connect_cloud(name="aws", credentials=credentials)
+
+
+def cache_permissions(
+        iam_user_name: List[str] = typer.Option(
+            None,
+            "--iam-user-name",
+            help="Existing IAM user to attach the cirun cache inline policy to. Can be repeated.",
+        ),
+        iam_user_pattern: str = typer.Option(
+            None,
+            "--iam-user-pattern",
+            help="Also target every IAM user whose name matches this glob, e.g. 'cirun-*'.",
+        ),
+        account_id: str = typer.Option(
+            None,
+            "--account-id",
+            help=(
+                "AWS account ID for the STSAssumeRole resource. Defaults to the "
+                "account of the current AWS CLI caller."
+            ),
+        ),
+        max_workers: int = typer.Option(
+            8,
+            "--max-workers",
+            min=1,
+            help="Number of IAM users to check/update concurrently.",
+        ),
+        yes: bool = typer.Option(
+            False,
+            "--yes",
+            "-y",
+            help="Skip confirmation prompt.",
+        ),
+):
+    """Attach the cirun GitHub Actions Cache IAM policy to existing AWS IAM users.
+
+    Use this for accounts that were connected to cirun before the cache feature
+    existed (or with --no-cache-permissions on `cirun cloud create aws`). Applies
+    the 7 statements documented at https://docs.cirun.io/caching/aws as a single
+    inline policy named `CirunCachePermissions`. The current policy of every
+    target user is fetched concurrently and only users whose policy drifted from
+    the template are written to.
+    """
+    console = Console()
+    error_console = Console(stderr=True, style="bold red")
+
+    if not iam_user_name and not iam_user_pattern:
+        error_console.print("Error: Pass at least one --iam-user-name or --iam-user-pattern")
+        raise typer.Exit(code=1)
+
+    # AWS CLI installed?
+    try:
+        _run(["aws", "--version"], capture_output=True, check=True)
+    except CommandTimedOut as e:
+        error_console.print(f"Error: {e.stderr}")
+        raise typer.Exit(code=1)
+    except (subprocess.CalledProcessError, FileNotFoundError):
+        error_console.print("Error: AWS CLI is not installed or not found in PATH")
+        raise typer.Exit(code=1)
+
+    # Resolve account ID from caller identity if not provided.
+    if not account_id:
+        try:
+            result = _run(
+                ["aws", "sts", "get-caller-identity", "--output", "json"],
+                capture_output=True,
+                check=True,
+                text=True,
+            )
+            account_id = json.loads(result.stdout).get("Account")
+        except CommandTimedOut as e:
+            error_console.print(f"Error: {e.stderr}")
+            raise typer.Exit(code=1)
+        except subprocess.CalledProcessError:
+            error_console.print("Error: Not authenticated with AWS CLI. Pass --account-id or run `aws configure`.")
+            raise typer.Exit(code=1)
+
+    if not account_id:
+        error_console.print("Error: Could not resolve AWS account ID.")
+        raise typer.Exit(code=1)
+
+    user_names = list(dict.fromkeys(iam_user_name or []))
+    if iam_user_pattern:
+        try:
+            matched = _list_aws_iam_users(iam_user_pattern)
+        except subprocess.CalledProcessError as e:
+            error_console.print(f"Error listing IAM users: {e.stderr.strip() or e.stdout.strip()}")
+            raise typer.Exit(code=1)
+        user_names.extend(name for name in matched if name not in user_names)
+
+    if not user_names:
+        error_console.print(f"Error: No IAM users match '{iam_user_pattern}'")
+        raise typer.Exit(code=1)
+
+    console.print(f"[bold green]AWS Account:[/bold green] {account_id}")
+    console.print(f"[bold green]Target IAM users ({len(user_names)}):[/bold green] {', '.join(user_names)}")
+    console.print(f"[bold green]Inline policy name:[/bold green] {AWS_CIRUN_CACHE_POLICY_NAME}")
+
+    if not yes:
+        typer.confirm(
+            f"Apply '{AWS_CIRUN_CACHE_POLICY_NAME}' inline policy to {len(user_names)} user(s) "
+            f"in account {account_id} where it is missing or out of date?",
+            abort=True,
+        )
+
+    console.print("[bold blue]Checking current inline policies...[/bold blue]")
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        results = list(executor.map(
+            timeouts.bind(lambda user: _sync_aws_cache_policy(user, account_id)), user_names
+        ))
+
+    summary = {"unchanged": 0, "updated": 0, "failed": 0}
+    for result in results:
+        summary[result["status"]] += 1
+        if result["status"] == "updated":
+            console.print(f"  [bold green]updated[/bold green]   {result['user']}")
+        elif result["status"] == "failed":
+            error_console.print(f"  failed    {result['user']}: {result['error']}")
+
+    success_console = Console(style="bold green")
+    success_console.rule("[bold green]")
+    success_console.print(
+        f"Unchanged: {summary['unchanged']}  Updated: {summary['updated']}  Failed: {summary['failed']}"
+    )
+    success_console.print("")
+    success_console.print("Verify:")
+    success_console.print(
+        f"  aws iam get-user-policy --user-name <user> --policy-name {AWS_CIRUN_CACHE_POLICY_NAME}"
+    )
+    success_console.rule("[bold green]")
+    if summary["failed"]:
+        raise typer.Exit(code=1)
@@ -0,0 +1,165 @@
+"""Microsoft Azure: ``cirun cloud connect azure`` and ``cirun cloud create azure``."""
+import json
+import os
+import subprocess
+
+import typer
+from rich.console import Console
+
+from cirun.cloud import (
+    PreflightError,
+    _cli_installed_check,
+    _cli_step,
+    _connect_cloud,
+    _generated_name,
+    _journal_path,
+    _preflight,
+    _resume_journal,
+    _resume_option,
+    _rollback,
+    _rollback_option,
+    _run,
+    _run_flow,
+)
+from cirun.steps import Journal
+from cirun.utils import option
+
+
+def _azure_steps(name, subscription_id):
+    return [
+        _cli_step(
+            "create-service-principal",
+            [
+                "az", "ad", "sp", "create-for-rbac",
+                "--name", name,
+                "--role", "contributor",
+                "--scopes", f"/subscriptions/{subscription_id}",
+                "--output", "json"
+            ],
+            description=f"Creating service principal '[bold green]{name}[/bold green]'",
+            error="Error creating service principal",
+            parse=json.loads,
+            undo=lambda value: ["az", "ad", "app", "delete", "--id", value["appId"]],
+        ),
+    ]
+
+
+def connect(
+        subscription_id=option("--subscription-id", help="Azure subscription_id"),
+        tenant_id=option("--tenant-id", help="Azure tenant_id"),
+        client_id=option("--client-id", help="Azure client_id"),
+        client_secret=option("--client-secret", help="Azure client_secret"),
+):
+    """Connect Azure cloud to Cirun"""
+    credentials = {
+        "subscription_id": subscription_id,
+        "tenant_id": tenant_id,
+        "client_id": client_id,
+        "client_secret": client_secret,
+    }
+    _connect_cloud(name="azure", credentials=credentials)
+
+
+def create(
+        name: str = typer.Option(
+            None,
+            "--name",
+            help="Name for the service principal (optional, auto-generated if not provided)"
+        ),
+        auto_connect: bool = typer.Option(
+            False,
+            "--auto-connect",
+            help="Automatically connect the created credentials to Cirun"
+        ),
+        resume: bool = _resume_option(),
+        rollback: bool = _rollback_option(),
+):
+    """Create Azure Service Principal credentials for Cirun"""
+
+    console = Console()
+    error_console = Console(stderr=True, style="bold red")
+
+    if auto_connect and not os.environ.get("CIRUN_API_KEY"):
+        error_console.print("Error: CIRUN_API_KEY environment variable is required for --auto-connect")
+        raise typer.Exit(code=1)
+
+    def account_check():
+        try:
+            result = _run(
+                ["az", "account", "show", "--output", "json"],
+                capture_output=True,
+                check=True,
+                text=True
+            )
+        except (subprocess.CalledProcessError, FileNotFoundError):
+            raise PreflightError("Error: Not logged in to Azure CLI", "Please run: az login")
+        return json.loads(result.stdout)
+
+    # Check that the Azure CLI is installed and logged in, concurrently
+    checks = {"cli": _cli_installed_check(
+        ["az", "--version"], "Azure CLI", "https://docs.microsoft.com/en-us/cli/azure/install-azure-cli",
+    )}
+    if not rollback:
+        console.print("[bold blue]Checking Azure CLI login status...[/bold blue]")
+        checks["account"] = account_check
+    preflight = _preflight(checks, error_console)
+
+    if rollback:
+        _rollback("azure", name, _azure_steps, console, error_console)
+        return
+    account_info = preflight["account"]
+
+    # Display account details
+    console.print("\n[bold green]Azure Account Details:[/bold green]")
+    console.print(f"  Account Name:      [bold]{account_info.get('user', {}).get('name', 'N/A')}[/bold]")
+    console.print(f"  Subscription Name: [bold]{account_info.get('name', 'N/A')}[/bold]")
+    console.print(f"  Subscription ID:   [bold]{account_info.get('id', 'N/A')}[/bold]")
+    console.print(f"  Tenant ID:         [bold]{account_info.get('tenantId', 'N/A')}[/bold]")
+    console.print(f"  State:             [bold]{account_info.get('state', 'N/A')}[/bold]")
+    console.print("")
+
+    context = {"subscription_id": account_info.get('id')}
+    journal = _resume_journal("azure", name, resume, console, error_console, **context)
+    if journal is None:
+        # Generate service principal name if not provided
+        name = name or _generated_name()
+        journal = Journal(_journal_path("azure", name), context={"name": name, **context})
+    name, subscription_id = journal.context["name"], journal.context["subscription_id"]
+
+    # Confirm before creating
+    typer.confirm(
+        f"Create service principal '{name}' with contributor role on subscription '{subscription_id}'?",
+        abort=True,
+    )
+
+    values = _run_flow(_azure_steps(**journal.context), console, error_console, journal)
+    sp_data = values["create-service-principal"]
+    client_id = sp_data.get("appId")
+    client_secret = sp_data.get("password")
+    tenant_id = sp_data.get("tenant")
+
+    # Display credentials
+    success_console = Console(style="bold green")
+    success_console.rule("[bold green]")
+    success_console.print("[bold green]✓[/bold green] Service principal created successfully!")
+    success_console.print("")
+    success_console.print("[bold yellow]Azure Credentials for Cirun:[/bold yellow]")
+    success_console.print("")
+    success_console.print(f"AZURE_SUBSCRIPTION_ID: [bold]{subscription_id}[/bold]")
+    success_console.print(f"AZURE_CLIENT_ID:       [bold]{client_id}[/bold]")
+    success_console.print(f"AZURE_CLIENT_SECRET:   [bold]{client_secret}[/bold]")
+    success_console.print(f"AZURE_TENANT_ID:       [bold]{tenant_id}[/bold]")
+    success_console.print("")
+    success_console.print("[bold red]⚠️  Save the CLIENT_SECRET - it won't be shown again![/bold red]")
+    success_console.rule("[bold green]")
+
+    # Auto-connect if requested
+    if auto_connect:
+        console.print("\n[bold blue]Connecting credentials to Cirun...[/bold blue]")
+        credentials = {
+            "subscription_id": subscription_id,
+            "tenant_id": tenant_id,
+            "client_id": client_id,
+            "client_secret": client_secret,
+        }
+        _connect_cloud(name="azure", credentials=credentials)
@@ -0,0 +1,236 @@
+"""Google Cloud: ``cirun cloud connect gcp`` and ``cirun cloud create gcp``."""
+import json
+import os
+import subprocess
+
+import typer
+from rich.console import Console
+
+from cirun import timeouts
+from cirun.cloud import (
+    PreflightError,
+    _cli_installed_check,
+    _cli_step,
+    _cli_undo,
+    _connect_cloud,
+    _gcp_credentials_from_file,
+    _generated_name,
+    _journal_path,
+    _preflight,
+    _resume_journal,
+    _resume_option,
+    _rollback,
+    _rollback_option,
+    _run,
+    _run_flow,
+)
+from cirun.steps import Journal, Step
+from cirun.utils import option
+
+
+def _gcp_steps(name, project_id, role):
+    import tempfile
+
+    sa_email = f"{name}@{project_id}.iam.gserviceaccount.com"
+
+    def wait_until_ready(values):
+        for _ in range(10):
+            try:
+                result = _run(
+                    ["gcloud", "iam", "service-accounts", "describe", sa_email,
+                     "--project", project_id],
+                    capture_output=True, text=True
+                )
+            except subprocess.CalledProcessError:
+                result = None
+            if result is not None and result.returncode == 0:
+                return
+            timeouts.sleep(2)
+        raise RuntimeError("Service account was not ready in time.")
+
+    def create_key(values):
+        with tempfile.NamedTemporaryFile(suffix=".json", delete=False) as tmp:
+            key_file_path = tmp.name
+        try:
+            _run(
+                [
+                    "gcloud", "iam", "service-accounts", "keys", "create", key_file_path,
+                    "--iam-account", sa_email,
+                ],
+                capture_output=True,
+                check=True,
+                text=True
+            )
+            with open(key_file_path, "r") as f:
+                return json.loads(f.read())
+        finally:
+            os.unlink(key_file_path)
+
+    return [
+        _cli_step(
+            "create-service-account",
+            [
+                "gcloud", "iam", "service-accounts", "create", name,
+                "--display-name", f"Cirun service account ({name})",
+                "--project", project_id,
+            ],
+            description=f"Creating service account '[bold green]{name}[/bold green]'",
+            error="Error creating service account",
+            undo=["gcloud", "iam", "service-accounts", "delete", sa_email, "--project", project_id, "--quiet"],
+        ),
+        Step(
+            "wait-service-account", wait_until_ready, requires=["create-service-account"],
+            description="Waiting for the service account", error="Error waiting for the service account",
+        ),
+        _cli_step(
+            "grant-role",
+            [
+                "gcloud", "projects", "add-iam-policy-binding", project_id,
+                "--member", f"serviceAccount:{sa_email}",
+                "--role", role,
+                "--format", "json",
+            ],
+            description=f"Granting [bold green]{role}[/bold green] role",
+            error="Error granting IAM role",
+            requires=["wait-service-account"],
+            undo=[
+                "gcloud", "projects", "remove-iam-policy-binding", project_id,
+                "--member", f"serviceAccount:{sa_email}",
+                "--role", role,
+                "--format", "json",
+            ],
+        ),
+        Step(
+            "create-key", create_key, requires=["wait-service-account", "grant-role"],
+            description="Creating service account key", error="Error creating service account key",
+            undo=_cli_undo(lambda value: [
+                "gcloud", "iam", "service-accounts", "keys", "delete", value["private_key_id"],
+                "--iam-account", sa_email, "--quiet",
+            ]),
+        ),
+    ]
+
+
+def connect(
+        service_account_file=option("--key-file", help="GCP Service Account Key file", ),
+):
+    """Connect GCP to Cirun"""
+    credentials = _gcp_credentials_from_file(service_account_file)
+    _connect_cloud(name="gcp", credentials=credentials)
+
+
+def create(
+        name: str = typer.Option(
+            None,
+            "--name",
+            help="Name for the service account (optional, auto-generated if not provided)"
+        ),
+        role: str = typer.Option(
+            "roles/compute.admin",
+            "--role",
+            help="IAM role to grant the service account"
+        ),
+        auto_connect: bool = typer.Option(
+            False,
+            "--auto-connect",
+            help="Automatically connect the created credentials to Cirun"
+        ),
+        resume: bool = _resume_option(),
+        rollback: bool = _rollback_option(),
+):
+    """Create GCP Service Account credentials for Cirun"""
+    console = Console()
+    error_console = Console(stderr=True, style="bold red")
+
+    if auto_connect and not os.environ.get("CIRUN_API_KEY"):
+        error_console.print("Error: CIRUN_API_KEY environment variable is required for --auto-connect")
+        raise typer.Exit(code=1)
+
+    def project_check():
+        try:
+            result = _run(
+                ["gcloud", "config", "get-value", "project"],
+                capture_output=True,
+                check=True,
+                text=True
+            )
+            project_id = result.stdout.strip()
+        except (subprocess.CalledProcessError, FileNotFoundError):
+            project_id = None
+        if not project_id or project_id == "(unset)":
+            raise PreflightError(
+                "Error: No active GCP project configured", "Please run: gcloud config set project PROJECT_ID",
+            )
+        return project_id
+
+    def account_check():
+        try:
+            result = _run(
+                ["gcloud", "auth", "list", "--filter=status:ACTIVE", "--format=value(account)"],
+                capture_output=True,
+                check=True,
+                text=True
+            )
+            active_account = result.stdout.strip()
+        except (subprocess.CalledProcessError, FileNotFoundError):
+            active_account = None
+        if not active_account:
+            raise PreflightError("Error: Not logged in to gcloud CLI", "Please run: gcloud auth login")
+        return active_account
+
+    # Check that the gcloud CLI is installed, the current project and authentication, concurrently
+    checks = {"cli": _cli_installed_check(
+        ["gcloud", "--version"], "gcloud CLI", "https://cloud.google.com/sdk/docs/install",
+    )}
+    if not rollback:
+        console.print("[bold blue]Checking gcloud CLI configuration...[/bold blue]")
+        checks.update(project=project_check, account=account_check)
+    preflight = _preflight(checks, error_console)
+
+    if rollback:
+        _rollback("gcp", name, _gcp_steps, console, error_console)
+        return
+    project_id, active_account = preflight["project"], preflight["account"]
+
+    # Display account details
+    console.print("\n[bold green]GCP Account Details:[/bold green]")
+    console.print(f"  Account:    [bold]{active_account}[/bold]")
+    console.print(f"  Project ID: [bold]{project_id}[/bold]")
+    console.print("")
+
+    context = {"project_id": project_id, "role": role}
+    journal = _resume_journal("gcp", name, resume, console, error_console, **context)
+    if journal is None:
+        # Generate service account name if not provided
+        name = name or _generated_name()
+        journal = Journal(_journal_path("gcp", name), context={"name": name, **context})
+    name, project_id, role = journal.context["name"], journal.context["project_id"], journal.context["role"]
+
+    # Confirm before creating
+    typer.confirm(
+        f"Create service account '{name}' with {role} on project '{project_id}'?",
+        abort=True,
+    )
+
+    values = _run_flow(_gcp_steps(**journal.context), console, error_console, journal)
+    credentials = values["create-key"]
+
+    # Display credentials
+    success_console = Console(style="bold green")
+    success_console.rule("[bold green]")
+    success_console.print("[bold green]✓[/bold green] Service account created successfully!")
+    success_console.print("")
+    success_console.print("[bold yellow]GCP Credentials for Cirun:[/bold yellow]")
+    success_console.print("")
+    success_console.print(f"  Project ID:      [bold]{credentials.get('project_id')}[/bold]")
+    success_console.print(f"  Client Email:    [bold]{credentials.get('client_email')}[/bold]")
+    success_console.print(f"  Client ID:       [bold]{credentials.get('client_id')}[/bold]")
+    success_console.print(f"  Private Key ID:  [bold]{credentials.get('private_key_id')}[/bold]")
+    success_console.print("")
+    success_console.print("[bold red]⚠️  The private key cannot be recovered if lost![/bold red]")
+    success_console.rule("[bold green]")
+
+    # Auto-connect if requested
+    if auto_connect:
+        console.print("\n[bold blue]Connecting credentials to Cirun...[/bold blue]")
+        _connect_cloud(name="gcp", credentials=credentials)
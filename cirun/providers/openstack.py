@@ -0,0 +1,23 @@
+"""OpenStack: ``cirun cloud connect openstack``."""
+from cirun.cloud import _connect_cloud
+from cirun.utils import option
+
+
+def connect(
+        username=option("--username", help="OpenStack username"),
+        password=option("--password", help="OpenStack password"),
+        auth_url=option("--auth-url", help="OpenStack auth_url"),
+        project_id=option("--project-id", help="OpenStack project_id"),
+        domain_id=option("--domain-id", help="OpenStack domain_id"),
+        network=option("--network", help="OpenStack network"),
+):
+    """Connect Openstack to Cirun"""
+    credentials = {
+        "username": username,
+        "password": password,
+        "auth_url": auth_url,
+        "project_id": project_id,
+        "domain_id": domain_id,
+        "network": network,
+    }
+    _connect_cloud(name="openstack", credentials=credentials)
@@ -0,0 +1,13 @@
+"""Oracle Cloud: ``cirun cloud connect oracle``."""
+from cirun.cloud import _connect_cloud, _oracle_credentials_from_files
+from cirun.utils import option
+
+
+def connect(
+        config_file=option("--config-file", help="Oracle config file, it should have the keys: "
+                                                 "'user', 'tenancy', 'compartment_id', 'fingerprint'"),
+        key_file=option("--key-file", help="Oracle private key"),
+):
+    """Connect Oracle to Cirun"""
+    credentials = _oracle_credentials_from_files(config_file, key_file)
+    _connect_cloud(name="oracle", credentials=credentials)
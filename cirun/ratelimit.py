@@ -0,0 +1,122 @@
+"""Client-side token bucket rate limiting shared by all processes on a host.
+
+Bucket state lives in a small JSON file guarded by an exclusive ``flock``, so
+every ``cirun`` process (and thread) using the same file draws from the same
+budget without a central service. Limits are given as ``rate/burst`` where
+``rate`` is in requests per second, globally (``*``) and optionally per API
+endpoint, e.g. ``CIRUN_RATE_LIMIT="20/40,repo=5/10"``. A request takes one
+token from the global bucket and from its endpoint's bucket, if configured.
+"""
+import contextlib
+import json
+import os
+import threading
+import time
+
+from cirun.utils import cirun_cache_dir
+
+try:
+    import fcntl
+except ImportError:  # Windows: limits are only shared within the process.
+    fcntl = None
+
+RATE_LIMIT_ENV_VAR = "CIRUN_RATE_LIMIT"
+RATE_LIMIT_FILE_ENV_VAR = "CIRUN_RATE_LIMIT_FILE"
+GLOBAL = "*"
+
+
+def parse_rate_limits(spec):
+    """Parse ``"20/40,repo=5/10"`` into ``{"*": (20.0, 40.0), "repo": (5.0, 10.0)}``.
+    The burst defaults to the rate when omitted."""
+    limits = {}
+    for item in spec.split(","):
+        item = item.strip()
+        if not item:
+            continue
+        endpoint, _, value = item.rpartition("=")
+        rate, _, burst = value.partition("/")
+        try:
+            rate = float(rate)
+            burst = float(burst) if burst else max(rate, 1.0)
+        except ValueError:
+            raise ValueError(f"Invalid rate limit {item!r}, expected [endpoint=]rate[/burst]")
+        if rate <= 0 or burst < 1:
+            raise ValueError(f"Invalid rate limit {item!r}, rate must be > 0 and burst >= 1")
+        limits[endpoint or GLOBAL] = (rate, burst)
+    return limits
+
+
+class RateLimiter:
+    """Token bucket limiter whose state is shared through ``path``."""
+
+    def __init__(self, limits, path=None):
+        """
+        :param limits: mapping of endpoint (``"*"`` for all requests) to a
+            ``(rate, burst)`` tuple, or a string accepted by :func:`parse_rate_limits`
+        :param path: state file, defaults to ``$CIRUN_RATE_LIMIT_FILE`` or a file
+            in the cirun cache dir. Processes sharing a budget must use the same file.
+        """
+        self.limits = parse_rate_limits(limits) if isinstance(limits, str) else dict(limits)
+        self.path = path or os.environ.get(RATE_LIMIT_FILE_ENV_VAR) or os.path.join(
+            cirun_cache_dir(), "ratelimit.json"
+        )
+        self._thread_lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls):
+        """Limiter configured by ``$CIRUN_RATE_LIMIT``, ``None`` if unset."""
+        spec = os.environ.get(RATE_LIMIT_ENV_VAR)
+        return cls(spec) if spec else None
+
+    @contextlib.contextmanager
+    def _locked_state(self):
+        with self._thread_lock, open(self.path, "a+") as f:
+            if fcntl is not None:
+                fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                f.seek(0)
+                try:
+                    state = json.loads(f.read() or "{}")
+                except ValueError:
+                    state = {}
+                yield state
+                f.seek(0)
+                f.truncate()
+                f.write(json.dumps(state))
+                f.flush()
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(f, fcntl.LOCK_UN)
+
+    def _buckets(self, endpoint):
+        return [key for key in (GLOBAL, endpoint) if key in self.limits]
+
+    def acquire(self, endpoint=GLOBAL, max_wait=None):
+        """Take a token for ``endpoint``, sleeping until one is available.
+
+        Returns the number of seconds waited. Raises ``TimeoutError`` if the
+        wait would exceed ``max_wait`` seconds.
+        """
+        buckets = self._buckets(endpoint)
+        if not buckets:
+            return 0.0
+        waited = 0.0
+        while True:
+            with self._locked_state() as state:
+                now = time.time()
+                wait = 0.0
+                tokens = {}
+                for key in buckets:
+                    rate, burst = self.limits[key]
+                    available, updated = state.get(key, (burst, now))
+                    tokens[key] = min(burst, available + max(0.0, now - updated) * rate)
+                    if tokens[key] < 1:
+                        wait = max(wait, (1 - tokens[key]) / rate)
+                if not wait:
+                    for key in buckets:
+                        state[key] = (tokens[key] - 1, now)
+                    return waited
+            if max_wait is not None and waited + wait > max_wait:
+                raise TimeoutError(f"Rate limit for '{endpoint}' not available within {max_wait:.2f}s")
+            time.sleep(wait)
+            waited += wait
@@ -1,10 +1,17 @@
+import json
+import sys
+from typing import List, Optional
+
 from typing_extensions import Annotated
 
+import requests
 import typer
 
 from cirun import Cirun
 from cirun.client import GH_TOKEN_ENV_VAR
-from cirun.utils import OrderCommands, print_success_json, _print_error_data
+from cirun.completion import complete_org, complete_repo
+from cirun.store import RepoSort, fetch, open_store
+from cirun.utils import OrderCommands, print_success_json, _print_error, _print_error_data
 
 repo_app = typer.Typer(
     cls=OrderCommands,
@@ -17,16 +24,38 @@ repo_app = typer.Typer(
 RepoName = typer.Argument(
     default=None,
     help=f"Repository Name, for example: cirunlabs/cirun",
-    is_eager=True
+    is_eager=True,
+    autocompletion=complete_repo,
 )
 
 
 @repo_app.command("list")
-def list_():
-    """Activate cirun on given repository"""
-    cirun = Cirun()
-    response_json = cirun.get_repos(print_error=True)
-    print_success_json(response_json)
+def list_(
+        pattern: str = typer.Option(
+            None, "--filter", help="Only repositories whose full name matches this glob, e.g. 'org/data-*'"
+        ),
+        active: Optional[bool] = typer.Option(
+            None, "--active/--inactive", help="Only active or only inactive repositories"
+        ),
+        sort: RepoSort = typer.Option(RepoSort.name, "--sort", help="Sort repositories by this field"),
+        reverse: bool = typer.Option(False, "--reverse", help="Reverse the sort order"),
+        offline: bool = typer.Option(
+            False, "--offline", help="Answer from the local store, see `cirun sync`"
+        ),
+):
+    """List repositories connected to cirun"""
+    if not (pattern or active is not None or sort != RepoSort.name or reverse or offline):
+        cirun = Cirun(use_agent=True)
+        response_json = cirun.get_repos(print_error=True)
+        print_success_json(response_json)
+        return
+    store = open_store(offline)
+    if not offline:
+        payload = fetch(Cirun(use_agent=True), "repo")
+        if payload is None:
+            raise typer.Exit(code=1)
+        store.sync_repos(payload)
+    print_success_json(store.repos(pattern=pattern, active=active, sort=sort, descending=reverse))
 
 
 @repo_app.command()
@@ -39,7 +68,7 @@ def add(
         )] = None,
 ):
     """Activate cirun on given repository"""
-    cirun = Cirun()
+    cirun = Cirun(use_agent=True)
     response_json = cirun.set_repo(
         name,
         active=True,
@@ -52,6 +81,102 @@ def add(
 @repo_app.command()
 def remove(name: str = RepoName):
     """Deactivate cirun on given repository"""
-    cirun = Cirun()
+    cirun = Cirun(use_agent=True)
     response_json = cirun.set_repo(name, active=False, print_error=True)
     print_success_json(response_json)
+
+
+def _read_repo_list(path):
+    """Repository names from a JSON list (or ``{"repositories": [...]}``) or a
+    text file with one name per line, ``#`` starts a comment."""
+    with open(path, "r") as f:
+        content = f.read()
+    if content.lstrip().startswith(("[", "{")):
+        data = json.loads(content)
+        return data.get("repositories", []) if isinstance(data, dict) else data
+    lines = (line.split("#", 1)[0].strip() for line in content.splitlines())
+    return [line for line in lines if line]
+
+
+@repo_app.command("sync")
+def sync_(
+        file: str = typer.Argument(..., help="File listing the repositories that should be active"),
+        installation_id: Annotated[int, typer.Option(
+            help=f"[Optional] GitHub installation ID for the cirun application, "
+                 f"activated repositories are added to the Cirun app installation. "
+                 f"Requires {GH_TOKEN_ENV_VAR} in the environment"
+        )] = None,
+        prune: bool = typer.Option(
+            False, "--prune/--no-prune",
+            help="Also deactivate active repositories missing from the file, so exactly the listed ones are active",
+        ),
+        dry_run: bool = typer.Option(False, "--dry-run", help="Only print the plan"),
+        max_workers: int = typer.Option(8, "--max-workers", min=1, help="Number of concurrent updates"),
+):
+    """Activate the repositories listed in a file, with --prune deactivate all others"""
+    try:
+        repositories = _read_repo_list(file)
+    except (OSError, ValueError) as e:
+        _print_error_data(f"Error reading {file}: {e}")
+        raise typer.Exit(code=1)
+    invalid = [name for name in repositories if not isinstance(name, str) or name.count("/") != 1]
+    if invalid:
+        _print_error_data(f"Invalid repository names, expected 'org/repo': {invalid}")
+        raise typer.Exit(code=1)
+
+    cirun = Cirun(use_agent=True)
+    try:
+        plan = cirun.plan_repo_sync(repositories, prune=prune)
+    except requests.exceptions.HTTPError as e:
+        _print_error(e.response)
+        raise typer.Exit(code=1)
+    print_success_json({
+        "activate": plan["activate"],
+        "deactivate": plan["deactivate"],
+        "unchanged": len(plan["unchanged"]),
+    })
+    if dry_run:
+        return
+    results = cirun.apply_repo_sync(plan, installation_id=installation_id, max_workers=max_workers)
+    failed = [result for result in results if not result["ok"]]
+    if failed:
+        _print_error_data({"failed": failed})
+        raise typer.Exit(code=1)
+    print_success_json({
+        "activated": [result["repository"] for result in results if result["action"] == "activate"],
+        "deactivated": [result["repository"] for result in results if result["action"] == "deactivate"],
+    })
+
+
+@repo_app.command()
+def watch(
+        org: List[str] = typer.Option(
+            None, "--org", help="Also watch the access control of this organization, can be repeated",
+            autocompletion=complete_org,
+        ),
+        repos: bool = typer.Option(True, "--repos/--no-repos", help="Watch repository activation"),
+        min_interval: float = typer.Option(5, "--min-interval", min=0.1, help="Seconds between polls after a change"),
+        max_interval: float = typer.Option(300, "--max-interval", min=0.1, help="Longest poll interval while idle"),
+        initial: bool = typer.Option(False, "--initial", help="Emit the current state as 'add' events first"),
+):
+    """Stream repository and access control changes as NDJSON"""
+    from cirun.watch import Source, Watcher
+
+    sources = [Source.repos()] if repos else []
+    sources += [Source.access_control(org_name) for org_name in org or []]
+    if not sources:
+        _print_error_data("Nothing to watch, pass --org or drop --no-repos")
+        raise typer.Exit(code=1)
+
+    def emit(event):
+        sys.stdout.write(json.dumps(event, default=str) + "\n")
+        sys.stdout.flush()
+
+    watcher = Watcher(
+        Cirun(use_agent=True), sources, emit,
+        min_interval=min_interval, max_interval=max(min_interval, max_interval), initial=initial,
+    )
+    try:
+        watcher.run()
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,198 @@
+"""Local validation of access control and cloud connect payloads.
+
+Validators are compiled once, at import time, from small declarative schemas
+into plain closures, so checking a payload costs microseconds. They run before
+any network I/O and report every problem with the path of the offending value,
+e.g. ``'repository_resource_access[0].resources[1]' must be a non-empty string``.
+"""
+import re
+
+CLOUD_CREDENTIAL_FIELDS = {
+    "aws": ("access_key", "secret_key"),
+    "azure": ("subscription_id", "tenant_id", "client_id", "client_secret"),
+    "gcp": None,  # service account key file, see GCP_SERVICE_ACCOUNT_KEY
+    "openstack": ("username", "password", "auth_url", "project_id", "domain_id", "network"),
+    "oracle": ("config", "private_key"),
+}
+
+
+class ValidationError(ValueError):
+    def __init__(self, errors):
+        self.errors = list(errors)
+        super().__init__("; ".join(self.errors))
+
+
+def _join(path, key):
+    if isinstance(key, int):
+        return f"{path}[{key}]"
+    return f"{path}.{key}" if path else key
+
+
+def string(pattern=None, choices=None, description=None):
+    """Non-empty string, optionally matching ``pattern`` or one of ``choices``."""
+    regex = re.compile(pattern) if pattern else None
+    if choices:
+        description = description or "one of: " + ", ".join(choices)
+    description = description or "a non-empty string"
+
+    def check(value, path, errors):
+        if (
+            not isinstance(value, str) or not value
+            or (regex is not None and not regex.search(value))
+            or (choices is not None and value not in choices)
+        ):
+            errors.append(f"'{path}' must be {description}")
+    return check
+
+
+def scalar():
+    def check(value, path, errors):
+        if not isinstance(value, (str, bool, int, float)):
+            errors.append(f"'{path}' must be a string, number or boolean")
+    return check
+
+
+def optional(item):
+    """``item`` or ``None``."""
+    def check(value, path, errors):
+        if value is not None:
+            item(value, path, errors)
+    return check
+
+
+def list_of(item, non_empty=False):
+    description = "a non-empty list" if non_empty else "a list"
+
+    def check(value, path, errors):
+        if not isinstance(value, (list, tuple)) or (non_empty and not value):
+            errors.append(f"'{path}' must be {description}")
+            return
+        for index, element in enumerate(value):
+            item(element, _join(path, index), errors)
+    return check
+
+
+def mapping(item):
+    """Object with string keys and ``item`` values."""
+    def check(value, path, errors):
+        if not isinstance(value, dict):
+            errors.append(f"'{path}' must be a JSON object")
+            return
+        for key, element in value.items():
+            if not isinstance(key, str):
+                errors.append(f"'{path}' keys must be strings")
+            else:
+                item(element, _join(path, key), errors)
+    return check
+
+
+def obj(required, optional_fields=None, extra=False):
+    """Object with ``required`` and ``optional_fields`` keys, each mapped to its
+    validator. Other keys are rejected unless ``extra``."""
+    optional_fields = optional_fields or {}
+    known = set(required) | set(optional_fields)
+
+    def check(value, path, errors):
+        if not isinstance(value, dict):
+            errors.append(f"'{path}' must be a JSON object")
+            return
+        for key, item in required.items():
+            if key in value:
+                item(value[key], _join(path, key), errors)
+            else:
+                errors.append(f"'{_join(path, key)}' is required")
+        for key, item in optional_fields.items():
+            if key in value:
+                item(value[key], _join(path, key), errors)
+        if not extra:
+            unexpected = sorted(str(key) for key in value if key not in known)
+            if unexpected:
+                errors.append(f"Unexpected fields in '{path}': {', '.join(unexpected)}" if path
+                              else f"Unexpected fields: {', '.join(unexpected)}")
+    return check
+
+
+def compile_schema(check, path="", label=None):
+    """Turn a validator into ``validate(value) -> list of errors``. Paths start at
+    ``path``; with an empty one, fields of the root object are reported by name
+    and the root itself as ``label``."""
+    def validate(value):
+        errors = []
+        check(value, path, errors)
+        if label:
+            errors = [f"'{label}'{error[2:]}" if error.startswith("'' ") else error for error in errors]
+        return errors
+    return validate
+
+
+_URL = r"^https?://\S+$"
+_NAMES = optional(list_of(string()))
+
+ACCESS_CONTROL_ENTRY = obj(
+    required={
+        "repository": string(
+            pattern=r"^[A-Za-z0-9_.-]+$", description="a repository name without the organization",
+        ),
+        "resources": list_of(string(), non_empty=True),
+        "action": string(choices=("add", "remove")),
+    },
+    optional_fields={
+        "policy_args": optional(mapping(scalar())),
+        "teams": _NAMES,
+        "roles": _NAMES,
+        "users": _NAMES,
+        "users_from_json": optional(string(pattern=_URL, description="an http(s) URL")),
+    },
+)
+
+GCP_SERVICE_ACCOUNT_KEY = obj(
+    required={
+        "type": string(choices=("service_account",)),
+        "project_id": string(),
+        "private_key_id": string(),
+        "private_key": string(pattern=r"-----BEGIN [A-Z ]*PRIVATE KEY-----", description="a PEM private key"),
+        "client_email": string(pattern=r"^[^@\s]+@[^@\s]+$", description="an email address"),
+        "client_id": string(),
+        "token_uri": string(pattern=_URL, description="an http(s) URL"),
+    },
+    extra=True,
+)
+
+validate_access_control = compile_schema(
+    list_of(ACCESS_CONTROL_ENTRY, non_empty=True), path="repository_resource_access",
+)
+
+_credential_validators = {
+    name: compile_schema(
+        GCP_SERVICE_ACCOUNT_KEY if fields is None else obj({field: string() for field in fields}, extra=True),
+        label="credentials",
+    )
+    for name, fields in CLOUD_CREDENTIAL_FIELDS.items()
+}
+
+
+def register_cloud(name, credentials):
+    """Validate the credentials of cloud ``name``, e.g. one added by a provider
+    plugin, with ``credentials``: a tuple of required string fields or a
+    validator such as :func:`obj`."""
+    check = obj({field: string() for field in credentials}, extra=True) if isinstance(credentials, tuple) else credentials
+    CLOUD_CREDENTIAL_FIELDS[name] = credentials if isinstance(credentials, tuple) else None
+    _credential_validators[name] = compile_schema(check, label="credentials")
+
+
+def validate_cloud_credentials(name, credentials):
+    """Problems with ``credentials`` for cloud ``name``, empty if they are valid.
+
+    Only the required fields of known providers are checked: extra fields and
+    providers this client doesn't know about are left for the API to judge.
+    """
+    if not isinstance(name, str) or not name:
+        return ["'cloud' must be a non-empty string"]
+    validate = _credential_validators.get(name)
+    return validate(credentials) if validate is not None else []
+
+
+def raise_for_errors(errors):
+    """Raise :class:`ValidationError` if there are ``errors``."""
+    if errors:
+        raise ValidationError(errors)
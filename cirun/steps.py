@@ -0,0 +1,224 @@
+"""Run multi-step flows, such as ``cloud create``, as a graph of steps.
+
+A :class:`Flow` starts every step as soon as the steps it ``requires`` have
+succeeded, running independent steps concurrently, and records the timing of
+each one. A step's function receives the values returned by the steps run so
+far, keyed by step name. After the first failure no new step is started; the
+ones already running are waited for, then :class:`StepFailed` is raised::
+
+    flow = Flow([
+        Step("create-user", create_user),
+        Step("attach-policy", attach_policy, requires=["create-user"]),
+        Step("create-key", create_key, requires=["create-user"]),
+    ])
+    results = flow.run()
+    results["create-key"].value, results["create-key"].duration
+
+With a :class:`Journal`, every completed step and its value is checkpointed to
+a local file. Running the flow again with the same journal skips the steps
+that already succeeded, and :meth:`Flow.rollback` undoes them in reverse
+order using each step's ``undo`` function.
+"""
+import json
+import os
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from cirun import timeouts
+
+
+class Step:
+    def __init__(self, name, run, requires=(), description=None, error=None, undo=None):
+        """
+        :param name: unique name of the step in its flow
+        :param run: function called with the values of the steps run so far
+        :param requires: names of the steps that must succeed first
+        :param description: what the step does, shown when it starts
+        :param error: prefix of the message shown when it fails
+        :param undo: function called with the step's value to revert it on rollback
+        """
+        self.name = name
+        self.run = run
+        self.requires = tuple(requires)
+        self.description = description or name
+        self.error = error or f"Error in step '{name}'"
+        self.undo = undo
+
+    def __repr__(self):
+        return f"Step({self.name!r}, requires={list(self.requires)})"
+
+
+class StepResult:
+    def __init__(self, name, status, value=None, error=None, started=None, duration=None):
+        self.name = name
+        self.status = status  # "done", "resumed" (done in an earlier run) or "failed"
+        self.value = value
+        self.error = error
+        self.started = started
+        self.duration = duration
+
+    def as_dict(self):
+        return {"step": self.name, "status": self.status, "duration": self.duration}
+
+
+class StepFailed(Exception):
+    def __init__(self, step, error, results):
+        self.step = step
+        self.error = error
+        self.results = results
+        super().__init__(f"{step.error}: {error}")
+
+
+class Journal:
+    """Checkpoints of a flow in a JSON file only readable by the owner, as step
+    values may hold credentials. ``context`` holds whatever is needed to rebuild
+    the flow's steps when resuming or rolling back."""
+
+    def __init__(self, path, context=None, completed=None):
+        self.path = path
+        self.context = context or {}
+        # Step name to value, in completion order.
+        self.completed = dict(completed or {})
+        self._lock = threading.Lock()
+
+    @classmethod
+    def load(cls, path):
+        with open(path) as f:
+            data = json.load(f)
+        return cls(path, data.get("context"), data.get("completed"))
+
+    def _write(self):
+        os.makedirs(os.path.dirname(self.path), mode=0o700, exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, "w") as f:
+            json.dump({"context": self.context, "completed": self.completed}, f)
+        os.replace(tmp_path, self.path)
+
+    def record(self, name, value):
+        with self._lock:
+            self.completed[name] = value
+            self._write()
+
+    def forget(self, name):
+        with self._lock:
+            self.completed.pop(name, None)
+            self._write()
+
+    def delete(self):
+        with self._lock:
+            if os.path.exists(self.path):
+                os.remove(self.path)
+
+
+def _check_graph(steps):
+    by_name = {}
+    for step in steps:
+        if step.name in by_name:
+            raise ValueError(f"Duplicate step '{step.name}'")
+        by_name[step.name] = step
+    for step in steps:
+        for name in step.requires:
+            if name not in by_name:
+                raise ValueError(f"Step '{step.name}' requires unknown step '{name}'")
+    visiting, done = set(), set()
+
+    def visit(step, path):
+        if step.name in done:
+            return
+        if step.name in visiting:
+            raise ValueError(f"Steps form a cycle: {' -> '.join(path + [step.name])}")
+        visiting.add(step.name)
+        for name in step.requires:
+            visit(by_name[name], path + [step.name])
+        visiting.discard(step.name)
+        done.add(step.name)
+
+    for step in steps:
+        visit(step, [])
+    return by_name
+
+
+class Flow:
+    def __init__(self, steps, max_workers=4):
+        self.steps = list(steps)
+        self.max_workers = max_workers
+        self._by_name = _check_graph(self.steps)
+
+    def _ready(self, running, results):
+        return [
+            step for step in self.steps
+            if step.name not in results and step.name not in running
+            and all(name in results and results[name].status != "failed" for name in step.requires)
+        ]
+
+    def run(self, on_start=None, on_finish=None, journal=None):
+        """Run all steps, returns a :class:`StepResult` per step name.
+
+        ``on_start(step)`` and ``on_finish(step, result)`` are called from the
+        worker threads. Steps completed in ``journal`` are not run again, their
+        recorded value is used instead.
+        """
+        results = {}
+        values = {}
+        failure = None
+        if journal is not None:
+            for name, value in journal.completed.items():
+                if name in self._by_name:
+                    results[name] = StepResult(name, "resumed", value=value, duration=0.0)
+                    values[name] = value
+
+        def execute(step, inputs):
+            if on_start is not None:
+                on_start(step)
+            started = time.perf_counter()
+            try:
+                value = step.run(inputs)
+            except Exception as e:
+                result = StepResult(step.name, "failed", error=e, started=started)
+            else:
+                result = StepResult(step.name, "done", value=value, started=started)
+            result.duration = time.perf_counter() - started
+            if journal is not None and result.status == "done":
+                journal.record(step.name, result.value)
+            if on_finish is not None:
+                on_finish(step, result)
+            return result
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            running = {}
+            while True:
+                if failure is None:
+                    for step in self._ready(running, results):
+                        running[step.name] = executor.submit(timeouts.bind(execute), step, dict(values))
+                if not running:
+                    break
+                completed, _ = wait(running.values(), return_when=FIRST_COMPLETED)
+                for name, future in list(running.items()):
+                    if future in completed:
+                        del running[name]
+                        result = results[name] = future.result()
+                        if result.status == "done":
+                            values[name] = result.value
+                        elif failure is None:
+                            failure = result
+        if failure is not None:
+            raise StepFailed(self._by_name[failure.name], failure.error, results)
+        return results
+
+    def rollback(self, journal, on_start=None):
+        """Undo the steps completed in ``journal``, most recent first, and delete
+        the journal. Stops at the first failing undo, leaving the steps not yet
+        undone in the journal, and raises :class:`StepFailed`."""
+        for name, value in reversed(list(journal.completed.items())):
+            step = self._by_name.get(name)
+            if step is not None and step.undo is not None:
+                if on_start is not None:
+                    on_start(step)
+                try:
+                    step.undo(value)
+                except Exception as e:
+                    raise StepFailed(step, e, {})
+            journal.forget(name)
+        journal.delete()
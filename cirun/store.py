@@ -0,0 +1,293 @@
+"""Local SQLite mirror of repositories, cloud connections and access control.
+
+``cirun sync`` refreshes the store incrementally: only records whose content
+changed are rewritten and records that disappeared upstream are deleted. List
+and access commands answer from the store with ``--offline``; online they load
+the fresh API response into an in-memory store and run the very same queries.
+Like :meth:`cirun.Cirun.get_repo_resources`, a repository only gets the
+resources of its first policy.
+"""
+import hashlib
+import json
+import os
+import sqlite3
+import time
+from enum import Enum
+from typing import List
+
+import typer
+
+from cirun.completion import complete_org
+from cirun.utils import (
+    _print_error, _print_error_data, _record_name, _records, account_key, cirun_cache_dir, print_success_json,
+    repo_policy_ids,
+)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS repos (
+    name TEXT PRIMARY KEY,
+    org TEXT NOT NULL,
+    active INTEGER,
+    data TEXT NOT NULL,
+    hash TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS repos_org ON repos (org, active);
+CREATE TABLE IF NOT EXISTS clouds (
+    name TEXT PRIMARY KEY,
+    data TEXT NOT NULL,
+    hash TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS access_docs (
+    org TEXT PRIMARY KEY,
+    hash TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS policies (
+    org TEXT NOT NULL,
+    id TEXT NOT NULL,
+    repo TEXT,
+    PRIMARY KEY (org, id)
+);
+CREATE INDEX IF NOT EXISTS policies_repo ON policies (org, repo);
+CREATE TABLE IF NOT EXISTS grants (
+    org TEXT NOT NULL,
+    resource TEXT NOT NULL,
+    policy_id TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS grants_resource ON grants (org, resource);
+CREATE INDEX IF NOT EXISTS grants_policy ON grants (org, policy_id);
+CREATE TABLE IF NOT EXISTS sync_meta (
+    kind TEXT PRIMARY KEY,
+    synced_at REAL NOT NULL
+);
+"""
+
+
+class RepoSort(str, Enum):
+    name = "name"
+    org = "org"
+    active = "active"
+
+
+REPO_SORT_COLUMNS = {"name": "name", "org": "org, name", "active": "active DESC, name"}
+
+
+def _hash(data):
+    return hashlib.sha256(json.dumps(data, sort_keys=True).encode()).hexdigest()
+
+
+def default_store_path():
+    return os.path.join(cirun_cache_dir(), f"state-{account_key()}.db")
+
+
+class StateStore:
+    """SQLite store of cirun state. ``path=":memory:"`` gives a throwaway store."""
+
+    def __init__(self, path=None):
+        self.path = path or default_store_path()
+        self.db = sqlite3.connect(self.path)
+        self.db.executescript(SCHEMA)
+
+    def close(self):
+        self.db.close()
+
+    def _mark_synced(self, kind):
+        self.db.execute(
+            "INSERT OR REPLACE INTO sync_meta (kind, synced_at) VALUES (?, ?)", (kind, time.time())
+        )
+
+    def synced_at(self, kind):
+        row = self.db.execute("SELECT synced_at FROM sync_meta WHERE kind = ?", (kind,)).fetchone()
+        return row[0] if row else None
+
+    def _sync_table(self, table, rows):
+        """Upsert ``rows`` (dicts with a ``name`` key) whose hash changed and delete
+        rows that are gone. Returns the number of inserted/updated/deleted rows."""
+        existing = dict(self.db.execute(f"SELECT name, hash FROM {table}"))
+        changed = [row for row in rows if existing.get(row["name"]) != row["hash"]]
+        removed = set(existing) - {row["name"] for row in rows}
+        if changed:
+            columns = list(changed[0])
+            self.db.executemany(
+                f"INSERT OR REPLACE INTO {table} ({', '.join(columns)}) "
+                f"VALUES ({', '.join('?' * len(columns))})",
+                [tuple(row[column] for column in columns) for row in changed],
+            )
+        if removed:
+            self.db.executemany(f"DELETE FROM {table} WHERE name = ?", [(name,) for name in removed])
+        return {"changed": len(changed), "removed": len(removed)}
+
+    def sync_repos(self, payload):
+        rows = []
+        for record in _records(payload, "repos", "repositories", "data"):
+            name = _record_name(record, "name", "repository", "full_name")
+            if not name:
+                continue
+            active = record.get("active") if isinstance(record, dict) else None
+            rows.append({
+                "name": name,
+                "org": name.split("/")[0],
+                "active": None if active is None else int(bool(active)),
+                "data": json.dumps(record),
+                "hash": _hash(record),
+            })
+        with self.db:
+            result = self._sync_table("repos", rows)
+            self._mark_synced("repos")
+        return result
+
+    def sync_clouds(self, payload):
+        rows = []
+        for record in _records(payload, "clouds", "cloud_connections", "data"):
+            name = _record_name(record, "cloud", "name", "provider")
+            if name:
+                rows.append({"name": name, "data": json.dumps(record), "hash": _hash(record)})
+        with self.db:
+            result = self._sync_table("clouds", rows)
+            self._mark_synced("clouds")
+        return result
+
+    def sync_access_control(self, org, access_control):
+        """Mirror an org's ``get_access_control`` document. Skipped entirely when
+        the document did not change since the last sync. Only the first policy
+        of each repository is stored, see :func:`cirun.utils.repo_policy_ids`."""
+        access_yml = (access_control or {}).get("access_yml") or {}
+        digest = _hash(access_yml)
+        row = self.db.execute("SELECT hash FROM access_docs WHERE org = ?", (org,)).fetchone()
+        if row and row[0] == digest:
+            return {"changed": 0, "removed": 0}
+        with self.db:
+            self.db.execute("DELETE FROM policies WHERE org = ?", (org,))
+            self.db.execute("DELETE FROM grants WHERE org = ?", (org,))
+            self.db.executemany(
+                "INSERT OR REPLACE INTO policies (org, id, repo) VALUES (?, ?, ?)",
+                [
+                    (org, str(policy_id), repo)
+                    for repo, policy_id in repo_policy_ids(access_yml.get("policies")).items()
+                ],
+            )
+            self.db.executemany(
+                "INSERT INTO grants (org, resource, policy_id) VALUES (?, ?, ?)",
+                [
+                    (org, item["resource"], str(policy_id))
+                    for item in access_yml.get("access_control") or []
+                    for policy_id in item.get("policies") or []
+                ],
+            )
+            self.db.execute("INSERT OR REPLACE INTO access_docs (org, hash) VALUES (?, ?)", (org, digest))
+            self._mark_synced(f"access-control:{org}")
+        return {"changed": 1, "removed": 0}
+
+    def orgs(self):
+        return [row[0] for row in self.db.execute("SELECT DISTINCT org FROM repos ORDER BY org")]
+
+    def repos(self, pattern=None, active=None, sort="name", descending=False):
+        """Repository records, optionally filtered by a glob on the full name
+        and by activation state."""
+        where, params = [], []
+        if pattern:
+            where.append("name GLOB ?")
+            params.append(pattern)
+        if active is not None:
+            where.append("active = ?")
+            params.append(int(active))
+        order = REPO_SORT_COLUMNS[RepoSort(sort).value]
+        if descending:
+            order = ", ".join(
+                f"{column.split()[0]} {'ASC' if column.endswith(' DESC') else 'DESC'}"
+                for column in order.split(", ")
+            )
+        sql = "SELECT data FROM repos"
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        sql += f" ORDER BY {order}"
+        return [json.loads(row[0]) for row in self.db.execute(sql, params)]
+
+    def clouds(self, pattern=None, descending=False):
+        sql = "SELECT data FROM clouds"
+        params = []
+        if pattern:
+            sql += " WHERE name GLOB ?"
+            params.append(pattern)
+        sql += " ORDER BY name DESC" if descending else " ORDER BY name"
+        return [json.loads(row[0]) for row in self.db.execute(sql, params)]
+
+    def repo_resources(self, org, repo):
+        """Resources that ``repo`` can use in ``org``, ``None`` if the org's access
+        control was never synced."""
+        if self.synced_at(f"access-control:{org}") is None:
+            return None
+        return [row[0] for row in self.db.execute(
+            "SELECT DISTINCT g.resource FROM grants g "
+            "JOIN policies p ON p.org = g.org AND p.id = g.policy_id "
+            "WHERE p.org = ? AND p.repo = ? ORDER BY g.resource",
+            (org, repo),
+        )]
+
+    def resource_repos(self, org, resource, pattern=None):
+        """Repositories that can use ``resource`` in ``org``."""
+        if self.synced_at(f"access-control:{org}") is None:
+            return None
+        sql = (
+            "SELECT DISTINCT p.repo FROM grants g "
+            "JOIN policies p ON p.org = g.org AND p.id = g.policy_id "
+            "WHERE g.org = ? AND g.resource = ?"
+        )
+        params = [org, resource]
+        if pattern:
+            sql += " AND p.repo GLOB ?"
+            params.append(pattern)
+        return [row[0] for row in self.db.execute(sql + " ORDER BY p.repo", params)]
+
+
+def open_store(offline):
+    """The persistent store for ``--offline`` queries, exits if it was never synced."""
+    if not offline:
+        return StateStore(":memory:")
+    if not os.path.exists(default_store_path()):
+        _print_error_data("No local state found, run `cirun sync` first")
+        raise typer.Exit(code=1)
+    return StateStore()
+
+
+def fetch(cirun, path):
+    """JSON of ``GET path``, or ``None`` after printing the error on a non-2xx
+    response: an error body must never be synced, it would empty the table."""
+    response = cirun._get(path)
+    if response.status_code not in [200, 201]:
+        _print_error(response)
+        return None
+    return response.json()
+
+
+def sync(
+        org: List[str] = typer.Option(
+            None,
+            "--org",
+            help="Organization whose access control to mirror, can be repeated. "
+                 "Defaults to the organizations of all repositories.",
+            autocompletion=complete_org,
+        ),
+):
+    """Mirror repositories, clouds and access control into the local store"""
+    from cirun import Cirun
+
+    cirun = Cirun(use_agent=True)
+    store = StateStore()
+    summary = {}
+    try:
+        for kind, path, sync_table in (
+                ("repos", "repo", store.sync_repos), ("clouds", "cloud-connect", store.sync_clouds),
+        ):
+            payload = fetch(cirun, path)
+            summary[kind] = "unavailable" if payload is None else sync_table(payload)
+        for org_name in org or store.orgs():
+            access_control = cirun.get_access_control(org_name)
+            if access_control is None:
+                summary[f"access-control:{org_name}"] = "unavailable"
+                continue
+            summary[f"access-control:{org_name}"] = store.sync_access_control(org_name, access_control)
+    finally:
+        store.close()
+    print_success_json({"path": default_store_path(), "synced": summary})
+    if "unavailable" in (summary["repos"], summary["clouds"]):
+        raise typer.Exit(code=1)
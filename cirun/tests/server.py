@@ -0,0 +1,69 @@
+"""Local stand-in for the cirun API, shared by the tests and the benchmarks."""
+import contextlib
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class StandInAPI:
+    """Local stand-in for the cirun API. ``routes`` maps ``(method, path)`` to
+    ``(status_code, json_body)`` or to a callable returning it."""
+
+    def __init__(self):
+        self.routes = {}
+        self.calls = []
+        self._lock = threading.Lock()
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), self._handler_class())
+        self.server.daemon_threads = True
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}"
+
+    def count(self, method, path):
+        return sum(1 for call in self.calls if call[:2] == (method, path))
+
+    def _handler_class(self):
+        api = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            # Send headers and body in one segment, avoids delayed ACK stalls.
+            wbufsize = -1
+            disable_nagle_algorithm = True
+
+            def _handle(self):
+                length = int(self.headers.get("Content-Length") or 0)
+                body = json.loads(self.rfile.read(length)) if length else None
+                with api._lock:
+                    api.calls.append((self.command, self.path, body, dict(self.headers)))
+                route = api.routes.get((self.command, self.path), (404, {"error": "Not found"}))
+                if callable(route):
+                    route = route(body, self.headers)
+                status, data = route[:2]
+                headers = route[2] if len(route) > 2 else {}
+                content = json.dumps(data).encode() if data is not None else b""
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(content)))
+                for key, value in headers.items():
+                    self.send_header(key, value)
+                self.end_headers()
+                self.wfile.write(content)
+
+            do_GET = do_POST = do_PUT = do_DELETE = _handle
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
+
+
+@contextlib.contextmanager
+def running():
+    """Run a :class:`StandInAPI` for the duration of the block."""
+    api = StandInAPI()
+    thread = threading.Thread(target=api.server.serve_forever, args=(0.05,), daemon=True)
+    thread.start()
+    try:
+        yield api
+    finally:
+        api.server.shutdown()
+        api.server.server_close()
@@ -0,0 +1,76 @@
+import os
+import socket
+import threading
+import time
+
+import pytest
+import requests
+
+from cirun import Cirun
+from cirun.agent import Agent, AgentClient, AgentServer
+
+pytestmark = pytest.mark.skipif(not hasattr(socket, "AF_UNIX"), reason="requires Unix sockets")
+
+
+@pytest.fixture
+def agent(api_server, tmp_path, monkeypatch):
+    path = str(tmp_path / "agent.sock")
+    monkeypatch.setenv("CIRUN_AGENT_SOCKET", path)
+    server = AgentServer(path, Agent(allowed_urls=[f"{api_server.url}/"], cache_ttl=60))
+    thread = threading.Thread(target=server.serve_forever, args=(0.05,), daemon=True)
+    thread.start()
+    yield server.agent
+    server.shutdown()
+    server.server_close()
+
+
+def test_client_forwards_to_agent_and_reuses_cached_reads(api_server, agent):
+    api_server.routes[("GET", "/repo")] = (200, [{"name": "cirunlabs/cirun", "active": True}])
+    api_server.routes[("POST", "/repo")] = (200, {"active": False})
+    for _ in range(3):
+        cirun = Cirun(token="token", use_agent=True)
+        assert cirun.get_repos() == [{"name": "cirunlabs/cirun", "active": True}]
+    assert api_server.count("GET", "/repo") == 1
+    assert agent.requests == 3
+
+    cirun.set_repo("cirunlabs/cirun", active=False)
+    cirun.get_repos()
+    assert api_server.count("GET", "/repo") == 2
+
+
+def test_client_falls_back_without_agent(api_server, tmp_path, monkeypatch):
+    monkeypatch.setenv("CIRUN_AGENT_SOCKET", str(tmp_path / "missing.sock"))
+    api_server.routes[("GET", "/repo")] = (200, [])
+    cirun = Cirun(token="token", use_agent=True)
+    assert cirun.get_repos() == []
+    assert AgentClient().ping() is None
+
+
+def test_failed_write_through_agent_is_not_resent(api_server, agent):
+    def slow(body, headers):
+        time.sleep(0.5)
+        return 200, {"active": True}
+
+    api_server.routes[("POST", "/repo")] = slow
+    cirun = Cirun(token="token", use_agent=True, timeout=(1, 0.1))
+    with pytest.raises(requests.exceptions.ReadTimeout):
+        cirun._post("repo", json={"repository": "cirunlabs/cirun"})
+    assert api_server.count("POST", "/repo") == 1
+
+
+def test_agent_does_not_cache_conditional_requests(api_server, agent):
+    api_server.routes[("GET", "/repo")] = (200, [], {"ETag": '"v1"'})
+    cirun = Cirun(token="token", use_agent=True)
+    for _ in range(2):
+        cirun._get("repo", headers={"If-None-Match": '"v0"'})
+    assert api_server.count("GET", "/repo") == 2
+
+
+def test_agent_socket_is_owner_only(agent):
+    assert oct(os.stat(os.environ["CIRUN_AGENT_SOCKET"]).st_mode & 0o777) == "0o600"
+
+
+def test_request_without_read_timeout_through_agent(api_server, agent):
+    api_server.routes[("GET", "/repo")] = (200, [])
+    response = AgentClient().request("GET", f"{api_server.url}/repo", timeout=(5, None))
+    assert response.status_code == 200
@@ -0,0 +1,100 @@
+import pytest
+from typer.testing import CliRunner
+
+from cirun.batch import BatchError, parse_operation, run_batch, run_operation
+from cirun.main import app
+from cirun.transport import make_response
+
+
+class FakeClient:
+    def __init__(self):
+        self.calls = []
+
+    def set_repo(self, name, active=True, installation_id=None):
+        self.calls.append(("set_repo", name, active, installation_id))
+        return {"repository": name, "active": active}
+
+    def get_repo_resources(self, org, repo):
+        return None if org == "missing" else ["cpu-runner"]
+
+    def _get(self, path, json=None):
+        if path == "repo":
+            return make_response(200, [{"name": "cirunlabs/cirun", "active": True}])
+        return make_response(500, {"error": "down"})
+
+    @staticmethod
+    def _validate_cloud_credentials(name, credentials):
+        return [] if credentials.get("access_key") else ["'access_key' is required"]
+
+    def _post(self, path, json=None):
+        return make_response(200, {"cloud": json["cloud"]})
+
+
+def test_parse_operation_text_and_json():
+    assert parse_operation("cirun repo add org/repo --installation-id 12") == (
+        None, "repo.add", {"name": "org/repo", "installation_id": "12"}
+    )
+    assert parse_operation('{"id": "a", "op": "repo.remove", "args": {"name": "org/repo"}}') == (
+        "a", "repo.remove", {"name": "org/repo"}
+    )
+    assert parse_operation('{"op": "repo.remove", "name": "org/repo"}') == (
+        None, "repo.remove", {"name": "org/repo"}
+    )
+    with pytest.raises(BatchError):
+        parse_operation("repo frobnicate org/repo")
+
+
+@pytest.mark.parametrize("concurrency", [1, 4])
+def test_run_batch_shares_client(concurrency):
+    client = FakeClient()
+    lines = [
+        "repo add org/a --installation-id 3",
+        "repo remove org/b",
+        "repo list",
+        "cloud connect aws --access-key AK --secret-key SK",
+        "cloud connect aws --secret-key SK",
+        "repo add",
+        "access get org",
+        "repo resources org web",
+        "repo resources missing web",
+    ]
+    results = sorted(run_batch(enumerate(lines), client=client, concurrency=concurrency),
+                     key=lambda r: r["index"])
+    assert [r["ok"] for r in results] == [True, True, True, True, False, False, False, True, False]
+    assert results[6]["status_code"] == 500
+    assert results[7]["result"] == ["cpu-runner"]
+    assert results[8]["error"] == "Could not fetch access control for missing"
+    assert results[2]["result"] == [{"name": "cirunlabs/cirun", "active": True}]
+    assert sorted(client.calls) == [("set_repo", "org/a", True, 3), ("set_repo", "org/b", False, None)]
+
+
+def test_run_batch_reads_lines_as_it_goes():
+    read = []
+
+    def lines():
+        for index in range(100):
+            read.append(index)
+            yield index, "repo list"
+
+    results = run_batch(lines(), client=FakeClient(), concurrency=2)
+    assert next(results)["ok"]
+    assert len(read) <= 5
+    assert len(list(results)) == 99
+
+
+def test_run_operation_does_not_hide_type_errors():
+    class BrokenClient(FakeClient):
+        def set_repo(self, name, active=True, installation_id=None):
+            return None + 1
+
+    with pytest.raises(BatchError, match="Invalid arguments"):
+        run_operation(FakeClient(), "repo.remove", {"name": "org/repo", "force": "yes"})
+    with pytest.raises(TypeError):
+        run_operation(BrokenClient(), "repo.remove", {"name": "org/repo"})
+
+
+def test_batch_reports_unreadable_file(tmp_path, monkeypatch):
+    monkeypatch.setenv("CIRUN_API_KEY", "cirun-token-foo-bar")
+    result = CliRunner().invoke(app, ["batch", str(tmp_path / "missing.txt")])
+    assert result.exit_code == 1
+    assert "Could not read" in result.output
@@ -10,3 +10,135 @@ def test_raise_error_when_key_not_set():
 
 def test_not_raise_error_when_token_set():
     Cirun(token="cirun-token-foo-bar")
+
+
+class _FakeResponse:
+    def __init__(self, status_code, json_data):
+        self.status_code = status_code
+        self._json = json_data
+
+    def json(self):
+        return self._json
+
+
+def test_cloud_connect_many_validates_before_sending(monkeypatch, gcp_key):
+    cirun = Cirun(token="cirun-token-foo-bar")
+    sent = []
+
+    def fake_post(path, json=None, **kwargs):
+        sent.append(json["cloud"])
+        if json["credentials"].get("access_key") == "bad":
+            return _FakeResponse(400, {"error": "invalid credentials"})
+        return _FakeResponse(200, {"cloud": json["cloud"]})
+
+    monkeypatch.setattr(cirun, "_post", fake_post)
+    results = cirun.cloud_connect_many([
+        {"cloud": "aws", "credentials": {"access_key": "AK", "secret_key": "SK"}},
+        {"cloud": "aws", "credentials": {"access_key": "bad", "secret_key": "SK"}},
+        {"cloud": "azure", "credentials": {"tenant_id": "t"}},
+        {"cloud": "gcp", "credentials": gcp_key},
+        {"cloud": "gcp", "credentials": {"type": "service_account"}},
+        {"cloud": "hetzner", "credentials": {}},
+    ])
+    assert [r["ok"] for r in results] == [True, False, False, True, False, True]
+    assert results[1]["status_code"] == 400
+    assert "'subscription_id' is required" in results[2]["error"]
+    assert "'private_key' is required" in results[4]["error"]
+    assert sorted(sent) == ["aws", "aws", "gcp", "hetzner"]
+
+
+def test_repo_sync_only_applies_delta(api_server):
+    api_server.routes[("GET", "/repo")] = (200, [
+        {"name": "org/keep", "active": True},
+        {"name": "org/drop", "active": True},
+        {"name": "org/inactive", "active": False},
+    ])
+    api_server.routes[("POST", "/repo")] = lambda body, headers: (200, body)
+    cirun = Cirun(token="cirun-token-foo-bar")
+    plan = cirun.plan_repo_sync(["org/keep", "org/inactive", "org/new"], prune=True)
+    assert plan == {
+        "activate": ["org/inactive", "org/new"],
+        "deactivate": ["org/drop"],
+        "unchanged": ["org/keep"],
+    }
+    results = cirun.apply_repo_sync(plan)
+    assert all(result["ok"] for result in results)
+    posted = sorted((call[2]["repository"], call[2]["active"]) for call in api_server.calls if call[0] == "POST")
+    assert posted == [("org/drop", False), ("org/inactive", True), ("org/new", True)]
+    assert cirun.plan_repo_sync(["org/keep"])["deactivate"] == []
+
+
+def test_repo_sync_command_keeps_unlisted_repos_by_default(api_server, tmp_path, monkeypatch):
+    from typer.testing import CliRunner
+
+    from cirun.main import app
+
+    monkeypatch.setenv("CIRUN_API_KEY", "cirun-token-foo-bar")
+    api_server.routes[("GET", "/repo")] = (200, [{"name": "org/keep", "active": True}])
+    api_server.routes[("POST", "/repo")] = lambda body, headers: (200, body)
+    repos = tmp_path / "repos.txt"
+    repos.write_text("org/new\n")
+    result = CliRunner().invoke(app, ["repo", "sync", str(repos)])
+    assert result.exit_code == 0, result.output
+    posted = [(call[2]["repository"], call[2]["active"]) for call in api_server.calls if call[0] == "POST"]
+    assert posted == [("org/new", True)]
+    assert '"activated": [' in result.stdout and '"deactivated": []' in result.stdout
+
+
+def _slow_route(data, delay=0.2):
+    import time
+
+    def route(body, headers):
+        time.sleep(delay)
+        return 200, data
+    return route
+
+
+def test_concurrent_identical_reads_are_coalesced(api_server):
+    import threading
+
+    api_server.routes[("GET", "/repo")] = _slow_route([{"name": "org/repo", "active": True}])
+    cirun = Cirun(token="cirun-token-foo-bar", coalesce_reads=True)
+    barrier = threading.Barrier(10)
+    results = []
+
+    def worker():
+        barrier.wait()
+        results.append(cirun.get_repos())
+
+    threads = [threading.Thread(target=worker) for _ in range(10)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert results == [[{"name": "org/repo", "active": True}]] * 10
+    assert api_server.count("GET", "/repo") == 1
+    assert cirun.metrics["coalesced"] == 9
+    assert cirun.metrics["requests"] == 1
+
+
+def test_read_cache_is_cleared_by_writes(api_server):
+    api_server.routes[("GET", "/repo")] = (200, [])
+    api_server.routes[("POST", "/repo")] = (200, {})
+    cirun = Cirun(token="cirun-token-foo-bar", coalesce_reads=True, cache_ttl=60)
+    cirun.get_repos()
+    cirun.get_repos()
+    assert api_server.count("GET", "/repo") == 1
+    assert cirun.metrics["cache_hits"] == 1
+    cirun.set_repo("org/repo")
+    cirun.get_repos()
+    assert api_server.count("GET", "/repo") == 2
+
+
+def test_extra_headers_are_sent_with_every_method(api_server):
+    for method in ["GET", "POST", "PUT"]:
+        api_server.routes[(method, "/repo")] = (200, {})
+    cirun = Cirun(token="cirun-token-foo-bar")
+    cirun._get("repo", headers={"X-Test": "get"}, params={"page": 1})
+    cirun._post("repo", headers={"X-Test": "post"}, json={"repository": "org/web"})
+    cirun._put("repo", headers={"X-Test": "put"}, json={"repository": "org/web"})
+    assert [(call[0], call[3]["X-Test"], call[3]["Authorization"]) for call in api_server.calls] == [
+        ("GET", "get", "Bearer cirun-token-foo-bar"),
+        ("POST", "post", "Bearer cirun-token-foo-bar"),
+        ("PUT", "put", "Bearer cirun-token-foo-bar"),
+    ]
@@ -0,0 +1,109 @@
+import json
+import subprocess
+import time
+
+from typer.testing import CliRunner
+
+from cirun import cloud
+from cirun.main import app
+from cirun.providers.aws import _aws_cache_policy_doc, _normalize_policy, _sync_aws_cache_policy
+
+
+def _completed(args, returncode=0, stdout="", stderr=""):
+    return subprocess.CompletedProcess(args, returncode, stdout=stdout, stderr=stderr)
+
+
+def test_normalize_policy_ignores_ordering_and_scalar_lists():
+    doc = json.loads(_aws_cache_policy_doc("123456789012"))
+    shuffled = json.loads(_aws_cache_policy_doc("123456789012"))
+    shuffled["Statement"].reverse()
+    for statement in shuffled["Statement"]:
+        statement["Action"] = list(reversed(statement["Action"]))
+        if len(statement["Action"]) == 1:
+            statement["Action"] = statement["Action"][0]
+    assert _normalize_policy(doc) == _normalize_policy(shuffled)
+    assert _normalize_policy(doc) != _normalize_policy(_aws_cache_policy_doc("999999999999"))
+
+
+def test_sync_aws_cache_policy(monkeypatch):
+    current = {
+        "alice": json.loads(_aws_cache_policy_doc("123456789012")),
+        "bob": json.loads(_aws_cache_policy_doc("000000000000")),
+    }
+    puts = []
+
+    def fake_run(args, **kwargs):
+        user = args[args.index("--user-name") + 1]
+        if args[2] == "get-user-policy":
+            if user not in current:
+                return _completed(args, 254, stderr="An error occurred (NoSuchEntity)")
+            return _completed(args, stdout=json.dumps({"PolicyDocument": current[user]}))
+        if user == "broken":
+            raise subprocess.CalledProcessError(255, args, stderr="AccessDenied")
+        puts.append(user)
+        return _completed(args)
+
+    monkeypatch.setattr(cloud.subprocess, "run", fake_run)
+    statuses = {
+        user: _sync_aws_cache_policy(user, "123456789012")["status"]
+        for user in ["alice", "bob", "carol", "broken"]
+    }
+    assert statuses == {
+        "alice": "unchanged", "bob": "updated", "carol": "updated", "broken": "failed"
+    }
+    assert puts == ["bob", "carol"]
+
+
+def test_gcp_preflight_runs_concurrently_and_reports_every_failure(monkeypatch):
+    def fake_run(args, **kwargs):
+        time.sleep(0.3)
+        if args[1:3] == ["config", "get-value"]:
+            return _completed(args, stdout="(unset)\n")
+        return _completed(args)
+
+    monkeypatch.setattr(cloud.subprocess, "run", fake_run)
+    started = time.perf_counter()
+    result = CliRunner().invoke(app, ["cloud", "create", "gcp"])
+    assert time.perf_counter() - started < 0.8
+    assert result.exit_code == 1
+    assert "No active GCP project configured" in result.output
+    assert "Not logged in to gcloud CLI" in result.output
+
+
+def test_preflight_only_reports_missing_cli(monkeypatch):
+    def fake_run(args, **kwargs):
+        raise FileNotFoundError(args[0])
+
+    monkeypatch.setattr(cloud.subprocess, "run", fake_run)
+    result = CliRunner().invoke(app, ["cloud", "create", "azure"])
+    assert result.exit_code == 1
+    assert "Azure CLI is not installed" in result.output
+    assert "Not logged in" not in result.output
+
+
+def test_connect_bulk_reports_unreadable_key_file_per_entry(api_server, tmp_path, monkeypatch):
+    monkeypatch.setenv("CIRUN_API_KEY", "token")
+    monkeypatch.setenv("CIRUN_API_ENDPOINT", api_server.url)
+    api_server.routes[("POST", "/cloud-connect")] = lambda body, headers: (200, {"cloud": body["cloud"]})
+    manifest = tmp_path / "clouds.json"
+    manifest.write_text(json.dumps([
+        {"cloud": "gcp", "key_file": str(tmp_path / "missing.json")},
+        {"cloud": "aws", "credentials": {"access_key": "AKIA", "secret_key": "secret"}},
+    ]))
+    result = CliRunner().invoke(app, ["cloud", "connect-bulk", str(manifest)])
+    assert result.exit_code == 1
+    assert api_server.count("POST", "/cloud-connect") == 1
+    assert "Error loading credentials for gcp" in result.output
+
+
+def test_preflight_reports_timeout_rather_than_missing_cli(monkeypatch):
+    def fake_run(args, **kwargs):
+        if args[1:] == ["--version"]:
+            raise subprocess.TimeoutExpired(args, 300)
+        return _completed(args, stdout=json.dumps({"Account": "123456789012"}))
+
+    monkeypatch.setattr(cloud.subprocess, "run", fake_run)
+    result = CliRunner().invoke(app, ["cloud", "create", "aws"])
+    assert result.exit_code == 1
+    assert "'aws --version' timed out after 300s" in result.output
+    assert "not installed" not in result.output
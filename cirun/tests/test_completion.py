@@ -0,0 +1,84 @@
+import time
+
+from cirun import completion
+
+
+class FakeResponse:
+    def __init__(self, status_code, body):
+        self.status_code = status_code
+        self._body = body
+
+    def json(self):
+        return self._body
+
+
+class FakeClient:
+    def __init__(self, failing=()):
+        self.failing = failing
+
+    def _get(self, path):
+        if path in self.failing:
+            return FakeResponse(500, {"message": "Internal error"})
+        if path == "repo":
+            return FakeResponse(200, [{"name": f"org{i % 3}/repo-{i:05d}", "active": True} for i in range(5000)])
+        return FakeResponse(200, [{"cloud": "aws"}, {"cloud": "azure"}])
+
+
+def test_completion_reads_local_index(tmp_path, monkeypatch):
+    monkeypatch.setenv("CIRUN_CACHE_DIR", str(tmp_path))
+    monkeypatch.delenv("CIRUN_API_KEY", raising=False)
+    assert completion.complete_repo("org1/") == []
+
+    completion.refresh_index(client=FakeClient())
+    start = time.perf_counter()
+    candidates = completion.complete_repo("org1/repo-0001")
+    assert time.perf_counter() - start < 0.05
+    assert candidates == [f"org1/repo-{i:05d}" for i in range(10, 20) if i % 3 == 1]
+    assert completion.complete_cloud("a") == ["aws", "azure"]
+    assert completion.complete_org("") == ["org0", "org1", "org2"]
+
+
+def test_failed_refresh_keeps_index(tmp_path, monkeypatch):
+    monkeypatch.setenv("CIRUN_CACHE_DIR", str(tmp_path))
+    monkeypatch.delenv("CIRUN_API_KEY", raising=False)
+    completion.refresh_index(client=FakeClient())
+
+    for failing in ["repo", "cloud-connect"]:
+        assert completion.refresh_index(client=FakeClient(failing=[failing])) is None
+        assert completion.complete_cloud("a") == ["aws", "azure"]
+        assert len(completion.complete_repo("org1/")) == completion.MAX_CANDIDATES
+
+
+def test_stale_index_refreshes_in_background(tmp_path, monkeypatch):
+    monkeypatch.setenv("CIRUN_CACHE_DIR", str(tmp_path))
+    monkeypatch.setenv("CIRUN_API_KEY", "token")
+    spawned = []
+    monkeypatch.setattr(completion.subprocess, "Popen", lambda *a, **kw: spawned.append(a))
+    completion.complete_repo("")
+    completion.complete_repo("")
+    assert len(spawned) == 1
+
+
+def test_org_and_cloud_options_complete_from_index(tmp_path, monkeypatch):
+    import click
+    import typer
+
+    from cirun.main import app
+
+    monkeypatch.setenv("CIRUN_CACHE_DIR", str(tmp_path))
+    monkeypatch.delenv("CIRUN_API_KEY", raising=False)
+    completion.refresh_index(client=FakeClient())
+    root = typer.main.get_command(app)
+
+    def candidates(path, param_name, incomplete):
+        command, ctx = root, click.Context(root)
+        for name in path:
+            command = command.get_command(ctx, name)
+            ctx = click.Context(command, parent=ctx)
+        param = next(param for param in command.params if param.name == param_name)
+        return [item.value for item in param.shell_complete(ctx, incomplete)]
+
+    assert candidates(["access", "repos"], "org", "org") == ["org0", "org1", "org2"]
+    assert candidates(["inventory"], "org", "org2") == ["org2"]
+    assert candidates(["sync"], "org", "org1") == ["org1"]
+    assert candidates(["cloud", "list"], "pattern", "az") == ["azure"]
@@ -0,0 +1,90 @@
+import json
+import sys
+
+from typer.testing import CliRunner
+
+from cirun import doctor
+from cirun.main import app
+
+
+def _serve(api_server, monkeypatch, github_remaining="4900"):
+    monkeypatch.setattr(doctor, "GITHUB_API", api_server.url)
+    monkeypatch.setattr(doctor, "CLOUD_CLIS", {
+        "aws": [sys.executable, "-c", "print('aws-cli/2.15.0 Python/3.11')"],
+        "az": ["cirun-test-missing-az", "--version"],
+    })
+    api_server.routes[("GET", "/")] = (200, {})
+    api_server.routes[("GET", "/repo")] = lambda body, headers: (
+        (200, []) if headers["Authorization"] == "Bearer cirun-token-foo-bar" else (401, {"error": "Invalid key"})
+    )
+    api_server.routes[("GET", "/rate_limit")] = (
+        200, {}, {"X-RateLimit-Remaining": github_remaining, "X-RateLimit-Limit": "5000"},
+    )
+
+
+def test_probe_endpoint_times_each_phase(api_server):
+    api_server.routes[("GET", "/")] = (204, None)
+    report = doctor.probe_endpoint(api_server.url)
+    assert report["status"] == "ok"
+    assert report["http_status"] == 204
+    assert {"dns_ms", "connect_ms", "first_byte_ms"} <= set(report)
+    assert "tls_ms" not in report
+
+
+def test_probe_endpoint_reports_failing_phase():
+    report = doctor.probe_endpoint("https://cirun-doctor.invalid", timeout=1)
+    assert report["status"] == "error"
+    assert report["error"].startswith("dns: ")
+
+
+def test_doctor_report(api_server, monkeypatch):
+    _serve(api_server, monkeypatch)
+    monkeypatch.setenv("CIRUN_API_KEY", "cirun-token-foo-bar")
+    monkeypatch.setenv("GITHUB_TOKEN", "gh-token")
+    result = CliRunner().invoke(app, ["doctor", "--json"])
+    assert result.exit_code == 0, result.output
+    report = json.loads(result.stdout)
+    assert report["ok"] is True
+    assert report["endpoints"]["cirun"]["status"] == "ok"
+    assert report["credentials"]["cirun"]["status"] == "ok"
+    assert report["credentials"]["github"]["rate_limit"] == {"remaining": 4900, "limit": 5000}
+    assert report["clis"]["aws"]["version"] == "aws-cli/2.15.0 Python/3.11"
+    assert report["clis"]["az"] == {"status": "warning", "installed": False, "error": "cirun-test-missing-az not found in PATH"}
+
+
+def test_doctor_fails_on_rejected_key(api_server, monkeypatch):
+    _serve(api_server, monkeypatch, github_remaining="10")
+    monkeypatch.setenv("CIRUN_API_KEY", "wrong")
+    monkeypatch.delenv("GITHUB_TOKEN", raising=False)
+    result = CliRunner().invoke(app, ["doctor", "--json"])
+    assert result.exit_code == 1
+    report = json.loads(result.stdout)
+    assert report["credentials"]["cirun"]["error"] == "CIRUN_API_KEY was rejected"
+    assert report["credentials"]["github"]["status"] == "warning"
+
+
+def test_doctor_reports_unexpected_check_errors(api_server, monkeypatch):
+    _serve(api_server, monkeypatch, github_remaining="plenty")
+    monkeypatch.setenv("CIRUN_API_KEY", "cirun-token-foo-bar")
+    monkeypatch.setenv("GITHUB_TOKEN", "gh-token")
+
+    def broken_check(args):
+        raise RuntimeError("probe crashed")
+
+    closed = []
+    transport_from_env = doctor.transport_from_env
+
+    def tracked_transport():
+        transport = transport_from_env()
+        close = transport.close
+        transport.close = lambda: (closed.append(True), close())
+        return transport
+
+    monkeypatch.setattr(doctor, "check_cli", broken_check)
+    monkeypatch.setattr(doctor, "transport_from_env", tracked_transport)
+    report = doctor.run_checks()
+    assert closed == [True]
+    assert report["credentials"]["github"]["status"] == "ok"
+    assert report["credentials"]["github"]["rate_limit"] is None
+    assert report["clis"]["aws"] == {"status": "error", "error": "RuntimeError: probe crashed"}
+    assert report["ok"] is False
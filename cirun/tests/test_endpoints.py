@@ -0,0 +1,96 @@
+import socket
+import threading
+
+import pytest
+import requests
+import urllib3
+
+from cirun import Cirun
+from cirun.endpoints import EndpointPool, endpoints_from_env
+
+
+def _closed_url():
+    """URL of a local port nothing listens on."""
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return f"http://127.0.0.1:{sock.getsockname()[1]}"
+
+
+def test_endpoints_from_env(monkeypatch):
+    monkeypatch.setenv("CIRUN_API_ENDPOINT", "https://eu.example.com/api/v1, https://us.example.com/api/v1,")
+    assert endpoints_from_env() == ["https://eu.example.com/api/v1", "https://us.example.com/api/v1"]
+    monkeypatch.delenv("CIRUN_API_ENDPOINT")
+    assert endpoints_from_env() == ["https://api.cirun.io/api/v1"]
+
+
+def test_reads_go_to_fastest_and_writes_to_first_healthy():
+    pool = EndpointPool(["a", "b", "c"])
+    pool.record(pool.endpoints[0], 0.3)
+    pool.record(pool.endpoints[1], 0.1)
+    assert [endpoint.url for endpoint in pool.candidates(read=True)] == ["b", "a", "c"]
+    assert [endpoint.url for endpoint in pool.candidates(read=False)] == ["a", "b", "c"]
+    for _ in range(5):
+        pool.record(pool.endpoints[1], 0.1, ok=False)
+    assert [endpoint.url for endpoint in pool.candidates(read=True)] == ["a", "c", "b"]
+
+
+def test_write_does_not_fail_over_on_read_timeout():
+    pool = EndpointPool(["a", "b"])
+    sent = []
+
+    def send(endpoint):
+        sent.append(endpoint)
+        raise requests.exceptions.ReadTimeout()
+
+    with pytest.raises(requests.exceptions.ReadTimeout):
+        pool.request(send, read=False)
+    assert sent == ["a"]
+
+
+def test_write_does_not_fail_over_once_sent():
+    pool = EndpointPool(["a", "b", "c"])
+    sent = []
+
+    def send(endpoint):
+        sent.append(endpoint)
+        if endpoint == "a":
+            raise requests.exceptions.ConnectionError(urllib3.exceptions.NewConnectionError(None, "refused"))
+        raise requests.exceptions.ConnectionError(
+            urllib3.exceptions.ProtocolError("Connection aborted.", ConnectionResetError())
+        )
+
+    with pytest.raises(requests.exceptions.ConnectionError):
+        pool.request(send, read=False)
+    assert sent == ["a", "b"]
+
+
+def test_down_endpoint_recovers_after_probe():
+    reachable = threading.Event()
+
+    def probe(endpoint):
+        if endpoint == "a" and not reachable.is_set():
+            raise requests.exceptions.ConnectionError()
+
+    pool = EndpointPool(["a", "b"], probe=probe, probe_interval=3600)
+    pool.probe_all()
+    assert [endpoint.url for endpoint in pool.candidates(read=False)] == ["b", "a"]
+    reachable.set()
+    pool.probe_all()
+    assert [endpoint.url for endpoint in pool.candidates(read=False)] == ["a", "b"]
+    pool.close()
+
+
+def test_client_fails_over_to_next_endpoint(api_server, monkeypatch):
+    down = _closed_url()
+    monkeypatch.setenv("CIRUN_API_ENDPOINT", f"{down},{api_server.url}")
+    api_server.routes[("GET", "/repo")] = (200, [{"name": "org/repo", "active": True}])
+    api_server.routes[("POST", "/repo")] = lambda body, headers: (200, body)
+    cirun = Cirun(token="cirun-token-foo-bar")
+    cirun._endpoints.probe = None  # no background probe in this test
+
+    assert cirun.get_repos() == [{"name": "org/repo", "active": True}]
+    assert cirun.metrics["failovers"] == 1
+    cirun._post("repo", json={"repository": "repo"})
+    assert cirun.metrics["failovers"] == 1
+    assert api_server.count("GET", "/repo") == 1 and api_server.count("POST", "/repo") == 1
+    assert [endpoint["down"] for endpoint in cirun.endpoint_health] == [True, False]
@@ -0,0 +1,104 @@
+import itertools
+import threading
+import time
+
+import pytest
+
+from cirun import Cirun
+from cirun.hedging import Hedger
+from cirun.transport import InMemoryTransport
+
+
+def _slow_first(seconds):
+    """Function sleeping ``seconds`` on its first call only, returning the call number."""
+    counter = itertools.count()
+    lock = threading.Lock()
+
+    def func():
+        with lock:
+            call = next(counter)
+        if call == 0:
+            time.sleep(seconds)
+        return call
+    return func
+
+
+@pytest.fixture
+def make_hedger():
+    """Hedger factory, the hedgers' threads are stopped after the test."""
+    hedgers = []
+
+    def make(**kwargs):
+        hedgers.append(Hedger(**kwargs))
+        return hedgers[-1]
+
+    yield make
+    for hedger in hedgers:
+        hedger.close()
+
+
+def test_fast_call_is_not_hedged(make_hedger):
+    hedger = make_hedger(initial_delay=0.5)
+    assert hedger.do(lambda: "ok") == ("ok", False, False)
+
+
+def test_slow_call_is_hedged_and_hedge_wins(make_hedger):
+    hedger = make_hedger(initial_delay=0.02)
+    started = time.perf_counter()
+    assert hedger.do(_slow_first(1)) == (1, True, True)
+    assert time.perf_counter() - started < 0.5
+
+
+def test_hedges_are_capped_by_budget(make_hedger):
+    hedger = make_hedger(initial_delay=0.01, budget=0.0)
+    assert hedger.do(_slow_first(0.05))[1:] == (True, True)
+    # The initial hedge is used up and no budget is earned.
+    assert hedger.do(_slow_first(0.05)) == (0, False, False)
+
+
+def test_failed_run_waits_for_the_other(make_hedger):
+    calls = itertools.count()
+
+    def func():
+        if next(calls) == 0:
+            time.sleep(0.05)
+            raise ConnectionError("reset")
+        time.sleep(0.1)
+        return "ok"
+
+    assert make_hedger(initial_delay=0.01).do(func) == ("ok", True, True)
+
+
+def test_delay_follows_observed_latencies(make_hedger):
+    hedger = make_hedger(percentile=90, min_samples=10, initial_delay=1.0, min_delay=0.0)
+    assert hedger.delay() == 1.0
+    for _ in range(10):
+        hedger.do(lambda: time.sleep(0.01))
+    assert 0.005 < hedger.delay() < 0.5
+
+
+def test_invalid_env_spec(monkeypatch):
+    monkeypatch.setenv("CIRUN_HEDGE_READS", "fast")
+    with pytest.raises(ValueError, match="percentile"):
+        Hedger.from_env()
+    monkeypatch.setenv("CIRUN_HEDGE_READS", "99/0.1")
+    hedger = Hedger.from_env()
+    assert (hedger.percentile, hedger.budget) == (99, 0.1)
+    hedger.close()
+
+
+def test_client_hedges_reads_and_counts_them():
+    calls = itertools.count()
+
+    def repos(request):
+        if next(calls) == 0:
+            time.sleep(0.5)
+        return 200, [{"name": "org/repo", "active": True}]
+
+    transport = InMemoryTransport({("GET", "/repo"): repos, ("POST", "/repo"): (200, {})})
+    with Cirun(token="cirun-token-foo-bar", transport=transport, hedge_reads=Hedger(initial_delay=0.02)) as cirun:
+        assert cirun.get_repos() == [{"name": "org/repo", "active": True}]
+        assert cirun.metrics["hedges"] == 1
+        assert cirun.metrics["hedge_wins"] == 1
+        cirun._post("repo", json={})
+    assert [call["method"] for call in transport.calls] == ["GET", "GET", "POST"]
@@ -0,0 +1,58 @@
+import csv
+import io
+
+from typer.testing import CliRunner
+
+from cirun import Cirun
+from cirun.main import app
+
+ACCESS_CONTROL = {
+    "acme": {"access_yml": {
+        "policies": [{"id": 1, "repo": "web"}, {"id": 2, "repo": "api"}],
+        "access_control": [{"resource": "cpu", "policies": [1, 2]}, {"resource": "gpu", "policies": [2]}],
+    }},
+}
+
+
+def _serve(api_server):
+    api_server.routes[("GET", "/repo")] = (200, [
+        {"name": "acme/web", "active": True},
+        {"name": "acme/api", "active": False},
+        {"name": "other/docs", "active": True},
+    ])
+    api_server.routes[("GET", "/cloud-connect")] = (200, [{"cloud": "aws"}, {"cloud": "gcp"}])
+    api_server.routes[("GET", "/access-control")] = lambda body, headers: (
+        (200, ACCESS_CONTROL[body["org"]]) if body["org"] in ACCESS_CONTROL else (404, {"error": "Not found"})
+    )
+
+
+def test_inventory_fetches_each_org_once(api_server):
+    _serve(api_server)
+    records = list(Cirun(token="cirun-token-foo-bar").inventory(["acme", "other", "acme"]))
+    by_repo = {(record["org"], record["repository"]): record for record in records}
+    assert by_repo[("acme", "api")] == {
+        "org": "acme", "repository": "api", "active": False, "resources": ["cpu", "gpu"], "clouds": ["aws", "gcp"],
+    }
+    assert by_repo[("acme", "web")]["resources"] == ["cpu"]
+    assert by_repo[("other", "docs")]["resources"] is None
+    assert api_server.count("GET", "/repo") == 1
+    assert api_server.count("GET", "/access-control") == 2
+
+
+def test_get_repo_resources_matches_inventory(api_server):
+    _serve(api_server)
+    cirun = Cirun(token="cirun-token-foo-bar")
+    assert cirun.get_repo_resources("acme", "api") == ["cpu", "gpu"]
+    assert cirun.get_repo_resources("acme", "missing") == []
+
+
+def test_inventory_command_csv(api_server):
+    _serve(api_server)
+    result = CliRunner().invoke(
+        app, ["inventory", "--org", "acme", "--format", "csv"], env={"CIRUN_API_KEY": "cirun-token-foo-bar"}
+    )
+    assert result.exit_code == 0, result.output
+    rows = list(csv.DictReader(io.StringIO(result.output)))
+    assert [(row["repository"], row["resources"], row["clouds"]) for row in rows] == [
+        ("api", "cpu;gpu", "aws;gcp"), ("web", "cpu", "aws;gcp"),
+    ]
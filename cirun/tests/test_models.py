@@ -0,0 +1,45 @@
+import pytest
+
+from cirun import Cirun
+from cirun.models import AccessControl, Repo, repos_from
+
+ACCESS_CONTROL = {
+    "access_yml": {
+        "policies": [{"id": 1, "repo": "web", "teams": ["core"]}, {"id": 2, "repo": "api"}],
+        "access_control": [
+            {"resource": "cpu", "policies": [1, 2]},
+            {"resource": "gpu", "policies": [2]},
+        ],
+        "version": 1,
+    },
+    "sha": "abc",
+}
+
+
+def test_repo_models_are_lazy_and_round_trip():
+    records = [{"name": "org/web", "active": True, "id": 7}, {"name": "org/api", "active": False}]
+    repos = repos_from({"repos": records})
+    assert len(repos) == 2
+    assert not isinstance(repos._items[1], Repo)
+    repo = repos[0]
+    assert (repo.name, repo.active, repo.org, repo.get("id")) == ("org/web", True, "org", 7)
+    assert not hasattr(repo, "__dict__")
+    assert [r.raw for r in repos] == records
+    assert repos_from([{"name": "org/web"}])[0].raw == {"name": "org/web"}
+    with pytest.raises(TypeError):
+        hash(repo)
+
+
+def test_access_control_model():
+    access_control = AccessControl(ACCESS_CONTROL)
+    assert access_control.resources_for("api") == ["cpu", "gpu"]
+    assert access_control.policies[0].get("teams") == ["core"]
+    assert access_control.raw == ACCESS_CONTROL
+
+
+def test_typed_client_results(api_server):
+    api_server.routes[("GET", "/repo")] = (200, [{"name": "org/web", "active": True}])
+    api_server.routes[("GET", "/access-control")] = (200, ACCESS_CONTROL)
+    cirun = Cirun(token="cirun-token-foo-bar")
+    assert cirun.get_repos(typed=True)[0] == Repo(name="org/web", active=True)
+    assert cirun.get_access_control("org", typed=True).resources_for("web") == ["cpu"]
@@ -0,0 +1,34 @@
+import pstats
+import time
+
+from typer.testing import CliRunner
+
+from cirun import profiling
+from cirun.main import app
+
+
+def test_profile_splits_time_into_buckets(api_server, tmp_path):
+    api_server.routes[("GET", "/repo")] = lambda body, headers: (time.sleep(0.2), (200, [{"name": "org/web"}]))[1]
+    path = tmp_path / "repo-list.prof"
+    result = CliRunner().invoke(
+        app, ["--profile", str(path), "repo", "list"], env={"CIRUN_API_KEY": "cirun-token-foo-bar"}
+    )
+    assert result.exit_code == 0, result.output
+    assert pstats.Stats(str(path)).total_calls > 0
+    assert profiling._active is None
+    lines = {line.split()[0]: line for line in result.output.splitlines() if line.startswith("  ")}
+    assert set(lines) >= {"import", "http", "subprocess", "render", "other", "total"}
+    assert float(lines["http"].split()[1]) >= 200
+
+
+def test_sampling_profile_writes_collapsed_stacks(tmp_path):
+    path = str(tmp_path / "stacks.collapsed")
+    finish = profiling.start(path)
+    with profiling.timed("subprocess"):
+        time.sleep(0.1)
+    profile = profiling._active
+    finish()
+    assert profile.buckets["subprocess"] >= 0.1
+    with open(path) as f:
+        stack, count = f.readline().rsplit(" ", 1)
+    assert "test_sampling_profile_writes_collapsed_stacks" in stack and int(count) > 1
@@ -0,0 +1,49 @@
+import subprocess
+import sys
+from importlib.metadata import EntryPoint
+
+import typer
+from typer.testing import CliRunner
+
+from cirun import providers, schema
+from cirun.main import app
+
+
+def connect_hetzner(token: str = typer.Option(..., "--token", help="Hetzner API token")):
+    """Connect Hetzner to Cirun"""
+    errors = schema.validate_cloud_credentials("hetzner", {"token": token})
+    typer.echo(f"connected hetzner: {errors}")
+
+
+def test_provider_modules_are_imported_on_use():
+    code = (
+        "import sys\n"
+        "from cirun.main import app\n"
+        "try:\n"
+        "    app(['cloud', 'create', 'aws', '-h'])\n"
+        "except SystemExit:\n"
+        "    pass\n"
+        "print(sorted(m for m in sys.modules if m.startswith('cirun.providers')))\n"
+    )
+    result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+    assert result.stdout.splitlines()[-1] == "['cirun.providers', 'cirun.providers.aws']"
+
+
+def test_entry_point_adds_provider(monkeypatch):
+    entry_point = EntryPoint("hetzner", f"{__name__}:connect_hetzner", providers.CONNECT_GROUP)
+    monkeypatch.setattr(
+        providers, "_entry_points", lambda group: [entry_point] if group == providers.CONNECT_GROUP else [],
+    )
+    monkeypatch.setitem(schema.CLOUD_CREDENTIAL_FIELDS, "hetzner", None)
+    monkeypatch.setitem(schema._credential_validators, "hetzner", None)
+    schema.register_cloud("hetzner", ("token",))
+
+    result = CliRunner().invoke(app, ["cloud", "connect", "-h"])
+    assert "hetzner" in result.output and "Connect Hetzner to Cirun" in result.output
+    result = CliRunner().invoke(app, ["cloud", "connect", "hetzner", "--token", "secret"])
+    assert result.exit_code == 0, result.output
+    assert result.output.strip() == "connected hetzner: []"
+    assert schema.validate_cloud_credentials("hetzner", {}) == ["'token' is required"]
+    assert list(providers.provider_commands(providers.CREATE_GROUP)) == [
+        "azure", "aws", "aws-cache-permissions", "gcp",
+    ]
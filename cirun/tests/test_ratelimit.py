@@ -0,0 +1,41 @@
+import time
+
+import pytest
+
+from cirun import Cirun
+from cirun.ratelimit import RateLimiter, parse_rate_limits
+
+
+def test_parse_rate_limits():
+    assert parse_rate_limits("20/40, repo=5/10,access-control=2") == {
+        "*": (20.0, 40.0), "repo": (5.0, 10.0), "access-control": (2.0, 2.0)
+    }
+    with pytest.raises(ValueError):
+        parse_rate_limits("repo=fast")
+
+
+def test_limiters_sharing_a_file_share_the_budget(tmp_path):
+    path = str(tmp_path / "ratelimit.json")
+    # Two limiters on the same file behave like two processes on one host.
+    first, second = RateLimiter("20/2", path=path), RateLimiter("20/2", path=path)
+    assert first.acquire() == 0
+    assert second.acquire() == 0
+    start = time.monotonic()
+    waited = first.acquire()
+    assert waited > 0
+    assert time.monotonic() - start >= waited
+    with pytest.raises(TimeoutError):
+        second.acquire(max_wait=0.001)
+
+
+def test_per_endpoint_limits(tmp_path, api_server):
+    api_server.routes[("GET", "/repo")] = (200, [])
+    api_server.routes[("GET", "/cloud-connect")] = (200, [])
+    limiter = RateLimiter({"repo": (1, 1)}, path=str(tmp_path / "ratelimit.json"))
+    cirun = Cirun(token="cirun-token-foo-bar", rate_limiter=limiter)
+    cirun.get_repos()
+    cirun.clouds()
+    cirun.clouds()
+    assert cirun.metrics["rate_limited"] == 0
+    with pytest.raises(TimeoutError):
+        limiter.acquire("repo", max_wait=0.1)
@@ -0,0 +1,39 @@
+import pytest
+
+from cirun import Cirun, schema
+
+
+def test_access_control_errors_have_paths():
+    cirun = Cirun(token="cirun-token-foo-bar")
+    entry = cirun._create_access_control_repo_resource_data(
+        "web", ["cpu"], teams=["core"], policy_args={"pull_request": True},
+    )
+    assert schema.validate_access_control([entry]) == []
+    bad = {**entry, "repository": "org/web", "resources": ["cpu", ""], "policy_args": "pull_request"}
+    assert schema.validate_access_control([entry, bad]) == [
+        "'repository_resource_access[1].repository' must be a repository name without the organization",
+        "'repository_resource_access[1].resources[1]' must be a non-empty string",
+        "'repository_resource_access[1].policy_args' must be a JSON object",
+    ]
+
+
+def test_cloud_credentials(gcp_key):
+    assert schema.validate_cloud_credentials("gcp", gcp_key) == []
+    assert schema.validate_cloud_credentials("gcp", {**gcp_key, "client_email": "nope"}) == [
+        "'client_email' must be an email address",
+    ]
+    assert schema.validate_cloud_credentials("aws", {"access_key": "AK", "region": "x"}) == [
+        "'secret_key' is required",
+    ]
+    assert schema.validate_cloud_credentials("aws", {"access_key": "AK", "secret_key": "SK", "region": "x"}) == []
+    assert schema.validate_cloud_credentials("hetzner", {"token": "x"}) == []
+    assert schema.validate_cloud_credentials("oracle", []) == ["'credentials' must be a JSON object"]
+
+
+def test_invalid_payloads_are_not_sent(api_server, gcp_key):
+    cirun = Cirun(token="cirun-token-foo-bar")
+    with pytest.raises(schema.ValidationError, match="resources"):
+        cirun.add_repo_to_resources("org", "web", [])
+    with pytest.raises(schema.ValidationError, match="token_uri"):
+        cirun.cloud_connect("gcp", {key: value for key, value in gcp_key.items() if key != "token_uri"})
+    assert api_server.calls == []
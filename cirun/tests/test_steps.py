@@ -0,0 +1,150 @@
+import json
+import os
+import subprocess
+import threading
+import time
+
+import pytest
+from typer.testing import CliRunner
+
+from cirun import cloud
+from cirun.main import app
+from cirun.steps import Flow, Journal, Step, StepFailed
+
+
+def test_independent_steps_overlap():
+    barrier = threading.Barrier(2, timeout=2)
+    flow = Flow([
+        Step("user", lambda values: "alice"),
+        Step("policy", lambda values: (barrier.wait(), values["user"])[1], requires=["user"]),
+        Step("key", lambda values: (barrier.wait(), values["user"] + "-key")[1], requires=["user"]),
+    ])
+    results = flow.run()
+    assert results["key"].value == "alice-key"
+    assert all(result.status == "done" and result.duration >= 0 for result in results.values())
+
+
+def test_failure_skips_dependents():
+    started = []
+
+    def fail(values):
+        time.sleep(0.05)
+        raise RuntimeError("boom")
+
+    flow = Flow([
+        Step("a", fail, error="Error in a"),
+        Step("b", lambda values: started.append("b"), requires=["a"]),
+        Step("c", lambda values: started.append("c")),
+    ])
+    with pytest.raises(StepFailed) as exc:
+        flow.run()
+    assert str(exc.value) == "Error in a: boom"
+    assert started == ["c"] and set(exc.value.results) == {"a", "c"}
+
+
+def test_invalid_graphs():
+    with pytest.raises(ValueError, match="cycle"):
+        Flow([Step("a", None, requires=["b"]), Step("b", None, requires=["a"])])
+    with pytest.raises(ValueError, match="unknown step"):
+        Flow([Step("a", None, requires=["z"])])
+
+
+def test_journal_resumes_completed_steps(tmp_path):
+    journal = Journal(str(tmp_path / "journal" / "flow.json"), context={"name": "alice"})
+    runs = []
+
+    def step(name, fail=False):
+        def run(values):
+            runs.append(name)
+            if fail:
+                raise RuntimeError(name)
+            return f"{name}-value"
+        return Step(name, run, requires=["a"] if name != "a" else ())
+
+    with pytest.raises(StepFailed):
+        Flow([step("a"), step("b", fail=True)]).run(journal=journal)
+    assert oct(os.stat(journal.path).st_mode & 0o777) == "0o600"
+    journal = Journal.load(journal.path)
+    assert journal.context == {"name": "alice"} and journal.completed == {"a": "a-value"}
+    results = Flow([step("a"), step("b")]).run(journal=journal)
+    assert runs == ["a", "b", "b"]
+    assert results["a"].status == "resumed" and results["b"].value == "b-value"
+
+
+class _Calls(list):
+    failing = None
+    account = "123456789012"
+
+
+@pytest.fixture
+def fake_aws(monkeypatch, tmp_path):
+    """Fake aws CLI, ``fake_aws.failing`` holds the subcommands that fail."""
+    monkeypatch.setenv("CIRUN_CACHE_DIR", str(tmp_path))
+    calls = _Calls()
+    calls.failing = set()
+
+    def fake_run(args, **kwargs):
+        calls.append(args[:3])
+        if args[2:3] and args[2] in calls.failing:
+            raise subprocess.CalledProcessError(254, args, output="", stderr=f"{args[2]} failed")
+        stdout = ""
+        if args[1:3] == ["sts", "get-caller-identity"]:
+            stdout = json.dumps({"Account": calls.account, "Arn": "arn", "UserId": "id"})
+        elif args[1:3] == ["iam", "create-access-key"]:
+            stdout = json.dumps({"AccessKey": {"AccessKeyId": "AKIA", "SecretAccessKey": "secret"}})
+        return subprocess.CompletedProcess(args, 0, stdout=stdout, stderr="")
+
+    monkeypatch.setattr(cloud.subprocess, "run", fake_run)
+    return calls
+
+
+def test_create_aws_runs_steps_after_user_creation(fake_aws):
+    result = CliRunner().invoke(app, ["cloud", "create", "aws", "--name", "cirun-test"], input="y\n")
+    assert result.exit_code == 0, result.output
+    assert "AKIA" in result.output
+    create_user = fake_aws.index(["aws", "iam", "create-user"])
+    assert sorted(call[2] for call in fake_aws[create_user + 1:]) == [
+        "attach-user-policy", "create-access-key", "put-user-policy",
+    ]
+    assert fake_aws[-1] == ["aws", "iam", "create-access-key"]
+    assert not os.path.exists(cloud._journal_path("aws", "cirun-test"))
+
+
+def test_create_aws_resume_and_rollback(fake_aws):
+    runner = CliRunner()
+    fake_aws.failing.add("put-user-policy")
+    result = runner.invoke(app, ["cloud", "create", "aws", "--name", "cirun-test"], input="y\n")
+    assert result.exit_code == 1 and "--rollback" in result.output
+    assert ["aws", "iam", "create-access-key"] not in fake_aws
+
+    # Without --name the latest unfinished run is resumed, only the failed step runs again.
+    fake_aws.clear()
+    fake_aws.failing.clear()
+    fake_aws.failing.add("put-user-policy")
+    result = runner.invoke(app, ["cloud", "create", "aws"], input="y\n")
+    assert result.exit_code == 1 and "Resuming unfinished run for 'cirun-test'" in result.output
+    assert [call[2] for call in fake_aws if call[1] == "iam"] == ["put-user-policy"]
+
+    # A run started in another account is not resumed.
+    fake_aws.clear()
+    fake_aws.account = "999999999999"
+    result = runner.invoke(app, ["cloud", "create", "aws"], input="y\n")
+    assert result.exit_code == 1 and "account_id: 123456789012 (now 999999999999)" in result.output
+    assert not [call for call in fake_aws if call[1] == "iam"]
+    fake_aws.account = _Calls.account
+
+    fake_aws.clear()
+    result = runner.invoke(app, ["cloud", "create", "aws", "--rollback"], input="y\n")
+    assert result.exit_code == 0, result.output
+    assert [call[2] for call in fake_aws if call[1] == "iam"][-1] == "delete-user"
+    assert sorted(call[2] for call in fake_aws if call[1] == "iam") == [
+        "delete-user", "detach-user-policy",
+    ]
+    assert not os.path.exists(cloud._journal_path("aws", "cirun-test"))
+
+
+def test_gcp_key_is_created_after_the_role_is_granted():
+    from cirun.providers.gcp import _gcp_steps
+
+    steps = {step.name: step for step in _gcp_steps("cirun-test", "project", "roles/compute.admin")}
+    assert "grant-role" in steps["create-key"].requires
@@ -0,0 +1,110 @@
+from cirun.store import StateStore
+
+ACCESS_CONTROL = {
+    "access_yml": {
+        "policies": [{"id": 1, "repo": "data-pipeline"}, {"id": 2, "repo": "web"}],
+        "access_control": [
+            {"resource": "gpu-runner", "policies": [1]},
+            {"resource": "cpu-runner", "policies": [1, 2]},
+        ],
+    }
+}
+
+
+def test_sync_repos_is_incremental():
+    store = StateStore(":memory:")
+    repos = [
+        {"name": "org/data-a", "active": True},
+        {"name": "org/data-b", "active": False},
+        {"name": "org/web", "active": True},
+    ]
+    assert store.sync_repos(repos) == {"changed": 3, "removed": 0}
+    assert store.sync_repos(repos) == {"changed": 0, "removed": 0}
+    repos = [{"name": "org/data-a", "active": False}, {"name": "org/web", "active": True}]
+    assert store.sync_repos({"repos": repos}) == {"changed": 1, "removed": 1}
+
+
+def test_repo_queries():
+    store = StateStore(":memory:")
+    store.sync_repos([
+        {"name": "org/data-a", "active": True},
+        {"name": "org/data-b", "active": False},
+        {"name": "other/data-c", "active": True},
+    ])
+    names = lambda records: [record["name"] for record in records]  # noqa: E731
+    assert names(store.repos(pattern="*/data-*", active=True)) == ["org/data-a", "other/data-c"]
+    assert names(store.repos(sort="org", descending=True)) == ["other/data-c", "org/data-b", "org/data-a"]
+    assert names(store.repos(sort="active")) == ["org/data-a", "other/data-c", "org/data-b"]
+    assert names(store.repos(sort="active", descending=True)) == ["org/data-b", "other/data-c", "org/data-a"]
+    assert store.orgs() == ["org", "other"]
+
+
+def test_access_queries():
+    store = StateStore(":memory:")
+    assert store.repo_resources("org", "web") is None
+    assert store.sync_access_control("org", ACCESS_CONTROL) == {"changed": 1, "removed": 0}
+    assert store.sync_access_control("org", ACCESS_CONTROL) == {"changed": 0, "removed": 0}
+    assert store.repo_resources("org", "data-pipeline") == ["cpu-runner", "gpu-runner"]
+    assert store.resource_repos("org", "cpu-runner") == ["data-pipeline", "web"]
+    assert store.resource_repos("org", "cpu-runner", pattern="data-*") == ["data-pipeline"]
+
+
+def test_sync_then_offline_queries(api_server, tmp_path, monkeypatch):
+    import json
+
+    from typer.testing import CliRunner
+
+    from cirun.main import app
+
+    monkeypatch.setenv("CIRUN_CACHE_DIR", str(tmp_path))
+    monkeypatch.setenv("CIRUN_API_KEY", "token")
+    api_server.routes[("GET", "/repo")] = (200, [{"name": "org/web", "active": True}])
+    api_server.routes[("GET", "/cloud-connect")] = (200, [{"cloud": "aws"}])
+    api_server.routes[("GET", "/access-control")] = (200, ACCESS_CONTROL)
+    runner = CliRunner()
+    assert runner.invoke(app, ["sync"]).exit_code == 0
+
+    api_server.server.shutdown()
+    result = runner.invoke(app, ["access", "repos", "org", "gpu-runner", "--offline"])
+    assert result.exit_code == 0
+    assert json.loads("".join(result.stdout.splitlines()[1:-1])) == ["data-pipeline"]
+
+
+def test_failed_sync_keeps_the_store(api_server, tmp_path, monkeypatch):
+    from typer.testing import CliRunner
+
+    from cirun.main import app
+
+    monkeypatch.setenv("CIRUN_CACHE_DIR", str(tmp_path))
+    monkeypatch.setenv("CIRUN_API_KEY", "token")
+    api_server.routes[("GET", "/repo")] = (200, [{"name": "org/web", "active": True}])
+    api_server.routes[("GET", "/cloud-connect")] = (200, [{"cloud": "aws"}])
+    api_server.routes[("GET", "/access-control")] = (200, ACCESS_CONTROL)
+    runner = CliRunner()
+    assert runner.invoke(app, ["sync"]).exit_code == 0
+
+    api_server.routes[("GET", "/repo")] = (500, {"message": "Internal Server Error"})
+    assert runner.invoke(app, ["sync"]).exit_code == 1
+    assert runner.invoke(app, ["repo", "list", "--active"]).exit_code == 1
+    store = StateStore()
+    assert [repo["name"] for repo in store.repos()] == ["org/web"]
+    assert store.clouds() == [{"cloud": "aws"}]
+
+
+def test_repo_with_several_policies_matches_client():
+    from cirun import Cirun
+
+    access_control = {
+        "access_yml": {
+            "policies": [{"id": 1, "repo": "web"}, {"id": 2, "repo": "web"}],
+            "access_control": [
+                {"resource": "cpu-runner", "policies": [1]},
+                {"resource": "gpu-runner", "policies": [2]},
+            ],
+        }
+    }
+    store = StateStore(":memory:")
+    store.sync_access_control("org", access_control)
+    expected = Cirun._resources_by_repo(access_control["access_yml"])["web"]
+    assert store.repo_resources("org", "web") == expected == ["cpu-runner"]
+    assert store.resource_repos("org", "gpu-runner") == []
@@ -0,0 +1,38 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from cirun import Cirun
+
+
+@pytest.mark.parametrize("options", [{}, {"coalesce_reads": True, "cache_ttl": 0.01}])
+def test_shared_client_under_thread_pool(api_server, options):
+    api_server.routes[("GET", "/repo")] = (200, [{"name": "org/repo", "active": True}])
+    api_server.routes[("POST", "/repo")] = lambda body, headers: (200, body)
+    api_server.routes[("GET", "/access-control")] = lambda body, headers: (200, {"org": body["org"]})
+    cirun = Cirun(token="cirun-token-foo-bar", pool_maxsize=16, **options)
+
+    def work(i):
+        if i % 3 == 0:
+            return cirun.set_repo(f"org/repo-{i}", active=bool(i % 2)) == {
+                "repository": f"org/repo-{i}", "active": bool(i % 2)
+            }
+        if i % 3 == 1:
+            return cirun.get_access_control(f"org-{i % 7}") == {"org": f"org-{i % 7}"}
+        return cirun.get_repos() == [{"name": "org/repo", "active": True}]
+
+    with ThreadPoolExecutor(max_workers=16) as executor:
+        assert all(executor.map(work, range(300)))
+
+    assert api_server.count("POST", "/repo") == 100
+    assert cirun.metrics["requests"] == len(api_server.calls)
+    # Every thread reused the pooled, authenticated session.
+    assert {call[3]["Authorization"] for call in api_server.calls} == {"Bearer cirun-token-foo-bar"}
+
+
+def test_client_config_is_read_only():
+    cirun = Cirun(token="cirun-token-foo-bar")
+    with pytest.raises(AttributeError):
+        cirun.token = "other"
+    with pytest.raises(AttributeError):
+        cirun.api_endpoint = "http://example.com"
@@ -0,0 +1,64 @@
+import subprocess
+import sys
+import time
+
+import pytest
+import requests
+from typer.testing import CliRunner
+
+from cirun import Cirun, cloud, timeouts
+from cirun.main import app
+
+
+def test_nested_deadlines_only_shorten():
+    assert timeouts.remaining() is None
+    with timeouts.deadline(10):
+        with timeouts.deadline(60):
+            assert timeouts.remaining() <= 10
+        with timeouts.deadline(1):
+            assert timeouts.request_timeout((10, 60))[1] <= 1
+            assert all(0 < value <= 1 for value in timeouts.request_timeout(None))
+            assert timeouts.request_timeout((0.5, None))[0] == 0.5
+    assert timeouts.current_deadline() is None
+
+
+def test_deadline_spans_requests(api_server):
+    api_server.routes[("GET", "/repo")] = lambda body, headers: (time.sleep(0.3), (200, []))[1]
+    cirun = Cirun(token="cirun-token-foo-bar")
+    with timeouts.deadline(0.5):
+        cirun.get_repos()
+        with pytest.raises(requests.exceptions.Timeout):
+            cirun.get_repos()
+        time.sleep(0.2)
+        with pytest.raises(timeouts.DeadlineExceeded):
+            cirun.get_repos()
+
+
+def test_subprocess_timeout_is_reported_as_failed_command(monkeypatch):
+    monkeypatch.setenv(timeouts.SUBPROCESS_TIMEOUT_ENV_VAR, "0.2")
+    with pytest.raises(subprocess.CalledProcessError) as exc:
+        cloud._run([sys.executable, "-c", "import time; time.sleep(5)"], check=True)
+    assert "timed out" in exc.value.stderr
+
+
+
+def test_cache_permissions_reports_timeouts(monkeypatch):
+    def timing_out(args, timeout=None, **kwargs):
+        raise subprocess.TimeoutExpired(args, timeout)
+
+    monkeypatch.setattr(cloud.subprocess, "run", timing_out)
+    result = CliRunner().invoke(
+        app, ["cloud", "create", "aws-cache-permissions", "--iam-user-name", "cirun", "--yes"],
+    )
+    assert result.exit_code == 1
+    assert "'aws --version' timed out" in result.output
+    assert "not installed" not in result.output
+
+
+def test_bind_carries_deadline_into_threads():
+    from concurrent.futures import ThreadPoolExecutor
+
+    with timeouts.deadline(5):
+        with ThreadPoolExecutor(1) as executor:
+            assert executor.submit(timeouts.bind(timeouts.remaining)).result() <= 5
+            assert executor.submit(timeouts.remaining).result() is None
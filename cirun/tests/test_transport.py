@@ -0,0 +1,67 @@
+import json
+import os
+
+import pytest
+from typer.testing import CliRunner
+
+from cirun import Cirun
+from cirun.client import GITHUB_API
+from cirun.main import app
+from cirun.transport import InMemoryTransport, RecordingTransport, ReplayTransport
+
+TOKEN = "cirun-token-foo-bar"
+
+
+def test_in_memory_transport_serves_api_and_github_calls(monkeypatch):
+    monkeypatch.setenv("GITHUB_TOKEN", "gh-token")
+    transport = InMemoryTransport({
+        ("GET", "/repo"): (200, [{"name": "org/web", "active": True}]),
+        ("POST", "/repo"): lambda request: (200, request["json"]),
+        ("GET", f"{GITHUB_API}/repos/org/web"): (200, {"id": 42}),
+        ("PUT", f"{GITHUB_API}/user/installations/7/repositories/42"): (204, ""),
+    })
+    cirun = Cirun(token=TOKEN, transport=transport)
+    assert cirun.get_repos() == [{"name": "org/web", "active": True}]
+    cirun.set_repo("org/web", installation_id=7)
+    assert [(call["method"], call["url"].rsplit("/", 1)[-1]) for call in transport.calls] == [
+        ("GET", "repo"), ("GET", "web"), ("PUT", "42"), ("POST", "repo"),
+    ]
+    assert cirun.get_access_control("org") is None
+
+
+def test_record_then_replay_offline(api_server, tmp_path):
+    cassette = str(tmp_path / "cassette.ndjson")
+    api_server.routes[("GET", "/repo")] = (200, [{"name": "org/web", "active": True}])
+    api_server.routes[("GET", "/cloud-connect")] = (500, {"error": "down"})
+    recording = Cirun(token=TOKEN, transport=RecordingTransport(cassette))
+    repos = recording.get_repos()
+    recording.clouds()
+    api_server.routes[("POST", "/cloud-connect")] = (200, {"cloud": "aws"})
+    credentials = {"access_key": "AKIA", "secret_key": "aws-secret-key"}
+    recording.cloud_connect("aws", credentials)
+    assert os.stat(cassette).st_mode & 0o777 == 0o600
+    with open(cassette) as f:
+        content = f.read()
+    assert TOKEN not in content and "aws-secret-key" not in content
+
+    replay = Cirun(token=TOKEN, transport=ReplayTransport(cassette))
+    api_server.server.shutdown()
+    assert replay.get_repos() == repos
+    assert replay._get("cloud-connect").status_code == 500
+    assert replay.cloud_connect("aws", credentials) == {"cloud": "aws"}
+    with pytest.raises(LookupError):
+        replay.get_access_control("org")
+
+
+def test_cli_replay(tmp_path, monkeypatch):
+    cassette = tmp_path / "cassette.ndjson"
+    monkeypatch.setenv("CIRUN_API_ENDPOINT", "https://api.example.test/api/v1")
+    cassette.write_text(json.dumps({
+        "method": "GET", "url": "https://api.example.test/api/v1/repo", "json": None, "params": None,
+        "status_code": 200, "headers": {}, "content": json.dumps([{"name": "org/replayed"}]),
+    }) + "\n")
+    result = CliRunner().invoke(
+        app, ["repo", "list"], env={"CIRUN_API_KEY": TOKEN, "CIRUN_REPLAY": str(cassette)}
+    )
+    assert result.exit_code == 0, result.output
+    assert "org/replayed" in result.output
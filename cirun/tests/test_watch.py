@@ -0,0 +1,56 @@
+from cirun import Cirun
+from cirun.watch import Source, Watcher
+
+
+def test_watch_emits_diffs_and_backs_off(api_server):
+    state = {"etag": '"v1"', "repos": [{"name": "org/a", "active": True}, {"name": "org/b", "active": True}]}
+
+    def repos_route(body, headers):
+        if headers.get("If-None-Match") == state["etag"]:
+            return 304, None, {"ETag": state["etag"]}
+        return 200, state["repos"], {"ETag": state["etag"]}
+
+    api_server.routes[("GET", "/repo")] = repos_route
+    events = []
+    watcher = Watcher(Cirun(token="cirun-token-foo-bar"), [Source.repos()], events.append,
+                      min_interval=1, max_interval=4)
+    assert watcher.poll() == 0
+    assert watcher.poll() == 0
+    assert watcher.poll() == 0
+    assert watcher.interval == 4
+    assert api_server.calls[-1][3]["If-None-Match"] == '"v1"'
+
+    state["etag"] = '"v2"'
+    state["repos"] = [{"name": "org/a", "active": False}, {"name": "org/c", "active": True}]
+    assert watcher.poll() == 3
+    assert watcher.interval == 1
+    assert [(e["type"], e["key"]) for e in events] == [
+        ("update", "org/a"), ("remove", "org/b"), ("add", "org/c")
+    ]
+
+
+def test_watch_access_control(api_server):
+    access = {"access_yml": {"policies": [{"id": 1, "repo": "web"}],
+                             "access_control": [{"resource": "cpu", "policies": [1]}]}}
+    api_server.routes[("GET", "/access-control")] = lambda body, headers: (200, access)
+    events = []
+    watcher = Watcher(Cirun(token="cirun-token-foo-bar"), [Source.access_control("org")],
+                      events.append, initial=True)
+    watcher.poll()
+    access["access_yml"]["access_control"].append({"resource": "gpu", "policies": [1]})
+    watcher.poll()
+    assert [(e["type"], e["key"], e["value"]) for e in events] == [
+        ("add", "web", ["cpu"]), ("update", "web", ["cpu", "gpu"])
+    ]
+
+
+def test_watch_reports_connection_errors_and_keeps_going(api_server):
+    api_server.routes[("GET", "/repo")] = (200, [{"name": "org/a", "active": True}])
+    events = []
+    cirun = Cirun(token="cirun-token-foo-bar")
+    watcher = Watcher(cirun, [Source.repos()], events.append, min_interval=1, max_interval=4)
+    api_server.server.shutdown()
+    api_server.server.server_close()
+    assert watcher.poll() == 0
+    assert watcher.interval == 2
+    assert [(e["type"], e["kind"]) for e in events] == [("error", "repo")]
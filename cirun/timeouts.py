@@ -0,0 +1,112 @@
+"""Timeouts for outbound calls and end-to-end deadlines for operations.
+
+Every HTTP request made by :class:`cirun.Cirun` has a connect/read timeout and
+every cloud CLI subprocess a timeout. On top of that, a :func:`deadline` bounds
+a whole operation: all requests, subprocesses and waits made inside it, across
+multi-step flows, get at most the time remaining::
+
+    with deadline(30):
+        cirun.set_repo("org/repo", installation_id=123)
+
+Deadlines are per thread. Use :func:`bind` to carry the current one into
+worker threads.
+"""
+import contextlib
+import functools
+import os
+import threading
+import time
+
+# (connect, read) timeout in seconds for HTTP requests.
+DEFAULT_TIMEOUT = (10, 60)
+SUBPROCESS_TIMEOUT_ENV_VAR = "CIRUN_SUBPROCESS_TIMEOUT"
+DEFAULT_SUBPROCESS_TIMEOUT = 300
+
+_local = threading.local()
+
+
+class DeadlineExceeded(TimeoutError):
+    pass
+
+
+class Deadline:
+    def __init__(self, seconds):
+        self.seconds = seconds
+        self.expires = time.monotonic() + seconds
+
+    def remaining(self):
+        return max(0.0, self.expires - time.monotonic())
+
+
+def current_deadline():
+    return getattr(_local, "deadline", None)
+
+
+@contextlib.contextmanager
+def deadline(seconds):
+    """Bound everything in the block to ``seconds``. Nested deadlines can only
+    shorten the enclosing one. ``None`` leaves the current deadline as is."""
+    outer = current_deadline()
+    inner = Deadline(seconds) if seconds is not None else outer
+    if outer is not None and inner is not None and outer.expires < inner.expires:
+        inner = outer
+    _local.deadline = inner
+    try:
+        yield inner
+    finally:
+        _local.deadline = outer
+
+
+def remaining():
+    """Seconds left in the current deadline, ``None`` without a deadline."""
+    current = current_deadline()
+    return None if current is None else current.remaining()
+
+
+def check(what="operation"):
+    """Raise :class:`DeadlineExceeded` if the current deadline has passed."""
+    current = current_deadline()
+    if current is not None and current.remaining() <= 0:
+        raise DeadlineExceeded(f"Deadline of {current.seconds}s exceeded before {what}")
+
+
+def request_timeout(timeout=DEFAULT_TIMEOUT):
+    """``(connect, read)`` timeout for a request, clipped to the current deadline.
+    A ``None`` timeout, i.e. waiting forever, becomes the time left."""
+    check("request")
+    left = remaining()
+    connect, read = timeout if isinstance(timeout, tuple) else (timeout, timeout)
+    if left is None:
+        return connect, read
+    return tuple(left if value is None else min(value, left) for value in (connect, read))
+
+
+def subprocess_timeout():
+    """Timeout for a subprocess, ``$CIRUN_SUBPROCESS_TIMEOUT`` clipped to the
+    current deadline."""
+    check("subprocess")
+    timeout = float(os.environ.get(SUBPROCESS_TIMEOUT_ENV_VAR, DEFAULT_SUBPROCESS_TIMEOUT))
+    left = remaining()
+    return timeout if left is None else min(timeout, left)
+
+
+def sleep(seconds):
+    """``time.sleep`` that wakes up early when the current deadline expires."""
+    left = remaining()
+    time.sleep(seconds if left is None else min(seconds, left))
+
+
+def bind(func):
+    """Wrap ``func`` to run under the caller's current deadline, e.g. when
+    submitting it to a thread pool."""
+    captured = current_deadline()
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        outer = current_deadline()
+        _local.deadline = captured
+        try:
+            return func(*args, **kwargs)
+        finally:
+            _local.deadline = outer
+    return wrapper
@@ -0,0 +1,205 @@
+"""Transports carry the HTTP requests of :class:`cirun.Cirun`, to the cirun API
+and to GitHub, and return ``requests.Response`` objects.
+
+* :class:`RequestsTransport` is the default: a pooled ``requests`` session,
+  optionally forwarding through the local agent.
+* :class:`InMemoryTransport` answers from a table of routes, without network,
+  for tests and benchmarks of the real client code.
+* :class:`RecordingTransport` passes requests to another transport and appends
+  every exchange to a cassette file, one JSON object per line.
+* :class:`ReplayTransport` answers from a cassette, so recorded traffic can be
+  replayed deterministically and offline.
+
+The CLI records with ``CIRUN_RECORD=cassette.ndjson`` and replays with
+``CIRUN_REPLAY=cassette.ndjson``. Cassettes never contain request headers, so
+no API key or GitHub token is written to them, and the request body fields in
+``REDACTED_FIELDS``, such as the cloud credentials sent by ``cloud connect``,
+are replaced by ``"[REDACTED]"``. Response bodies are kept as they are, so
+cassettes are created readable by their owner only and should still be reviewed
+before they are shared.
+"""
+import abc
+import collections
+import json
+import os
+import threading
+from urllib.parse import urlsplit
+
+import requests
+import requests.adapters
+from requests.structures import CaseInsensitiveDict
+
+RECORD_ENV_VAR = "CIRUN_RECORD"
+REPLAY_ENV_VAR = "CIRUN_REPLAY"
+REDACTED_FIELDS = ("credentials",)
+REDACTED = "[REDACTED]"
+
+
+def make_response(status_code, content=b"", headers=None, url=None, reason=None):
+    """Build a ``requests.Response`` from its parts. ``content`` may be bytes,
+    text, or any other JSON-serializable value."""
+    if not isinstance(content, (bytes, str)):
+        content = json.dumps(content)
+        headers = {"Content-Type": "application/json", **(headers or {})}
+    response = requests.Response()
+    response.status_code = status_code
+    response.reason = reason
+    response.headers = CaseInsensitiveDict(headers or {})
+    response._content = content.encode() if isinstance(content, str) else content
+    response.encoding = "utf-8"
+    response.url = url
+    return response
+
+
+class Transport(abc.ABC):
+    @abc.abstractmethod
+    def request(self, method, url, headers=None, json=None, params=None, timeout=None):
+        """Send a request, returns a ``requests.Response``."""
+
+    def close(self):
+        pass
+
+
+class RequestsTransport(Transport):
+    def __init__(self, pool_maxsize=32, use_agent=False):
+        """
+        :param pool_maxsize: maximum number of pooled connections per host
+        :param use_agent: forward requests to the local cirun agent when it is running
+        """
+        self.session = requests.Session()
+        adapter = requests.adapters.HTTPAdapter(pool_connections=4, pool_maxsize=pool_maxsize)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.agent = None
+        if use_agent:
+            from cirun.agent import AgentClient
+            self.agent = AgentClient()
+
+    def request(self, method, url, headers=None, json=None, params=None, timeout=None):
+        if self.agent is not None:
+            response = self.agent.request(method, url, headers=headers, json=json, params=params, timeout=timeout)
+            if response is not None:
+                return response
+        return self.session.request(method, url, headers=headers, json=json, params=params, timeout=timeout)
+
+    def close(self):
+        self.session.close()
+
+
+class InMemoryTransport(Transport):
+    """Answers from ``routes``, mapping ``(method, url)`` to ``(status_code, body)``,
+    ``(status_code, body, headers)`` or a function of the request returning one.
+    ``url`` is either a full URL or a path matched against the end of the
+    request URL's path, e.g. ``("GET", "/repo")``. Requests are kept in ``calls``."""
+
+    def __init__(self, routes=None):
+        self.routes = dict(routes or {})
+        self.calls = []
+        self._lock = threading.Lock()
+
+    def _route(self, method, url):
+        route = self.routes.get((method, url))
+        if route is None:
+            path = urlsplit(url).path
+            for (route_method, route_url), candidate in self.routes.items():
+                if route_method == method and route_url.startswith("/") and path.endswith(route_url):
+                    return candidate
+        return route
+
+    def request(self, method, url, headers=None, json=None, params=None, timeout=None):
+        request = {"method": method, "url": url, "headers": headers, "json": json, "params": params}
+        with self._lock:
+            self.calls.append(request)
+        route = self._route(method, url)
+        if route is None:
+            return make_response(404, {"error": f"No route for {method} {url}"}, url=url)
+        if callable(route):
+            route = route(request)
+        return make_response(route[0], route[1], headers=route[2] if len(route) > 2 else None, url=url)
+
+
+def _redact(body, fields):
+    if not isinstance(body, dict):
+        return body
+    return {key: REDACTED if key in fields else value for key, value in body.items()}
+
+
+def _exchange_key(method, url, body, params):
+    return method, url, json.dumps(body, sort_keys=True), json.dumps(params, sort_keys=True)
+
+
+def _cassette_line(exchange):
+    return json.dumps(exchange, separators=(",", ":")) + "\n"
+
+
+class RecordingTransport(Transport):
+    """Sends requests through ``transport`` and appends each exchange to ``path``,
+    with the request body fields in ``redact`` replaced. A new cassette is only
+    readable by its owner."""
+
+    def __init__(self, path, transport=None, redact=REDACTED_FIELDS):
+        self.path = path
+        self.transport = transport or RequestsTransport()
+        self.redact = tuple(redact)
+        self._lock = threading.Lock()
+
+    def request(self, method, url, headers=None, json=None, params=None, timeout=None):
+        response = self.transport.request(method, url, headers=headers, json=json, params=params, timeout=timeout)
+        exchange = {
+            "method": method,
+            "url": url,
+            "json": _redact(json, self.redact),
+            "params": params,
+            "status_code": response.status_code,
+            "headers": dict(response.headers),
+            "content": response.content.decode("utf-8", errors="replace"),
+        }
+        line = _cassette_line(exchange)
+        with self._lock, open(os.open(self.path, os.O_WRONLY | os.O_CREAT | os.O_APPEND, 0o600), "a") as f:
+            f.write(line)
+        return response
+
+    def close(self):
+        self.transport.close()
+
+
+class ReplayTransport(Transport):
+    """Answers from a cassette written by :class:`RecordingTransport`. Identical
+    requests get the recorded responses in order, the last one is repeated once
+    they are used up. A request that was never recorded raises ``LookupError``.
+    Request bodies are matched with the fields in ``redact`` replaced, as they
+    were recorded."""
+
+    def __init__(self, path, redact=REDACTED_FIELDS):
+        self.path = path
+        self.redact = tuple(redact)
+        self._responses = collections.defaultdict(list)
+        self._served = collections.Counter()
+        self._lock = threading.Lock()
+        with open(path) as f:
+            for line in f:
+                if line.strip():
+                    exchange = json.loads(line)
+                    key = _exchange_key(exchange["method"], exchange["url"], exchange["json"], exchange["params"])
+                    self._responses[key].append(exchange)
+
+    def request(self, method, url, headers=None, json=None, params=None, timeout=None):
+        key = _exchange_key(method, url, _redact(json, self.redact), params)
+        with self._lock:
+            exchanges = self._responses.get(key)
+            if not exchanges:
+                raise LookupError(f"No recorded response for {method} {url} in {self.path}")
+            exchange = exchanges[min(self._served[key], len(exchanges) - 1)]
+            self._served[key] += 1
+        return make_response(exchange["status_code"], exchange["content"], headers=exchange["headers"], url=url)
+
+
+def transport_from_env(pool_maxsize=32, use_agent=False):
+    """The transport selected by ``$CIRUN_REPLAY`` or ``$CIRUN_RECORD``, the default
+    :class:`RequestsTransport` otherwise."""
+    if os.environ.get(REPLAY_ENV_VAR):
+        return ReplayTransport(os.environ[REPLAY_ENV_VAR])
+    transport = RequestsTransport(pool_maxsize=pool_maxsize, use_agent=use_agent)
+    if os.environ.get(RECORD_ENV_VAR):
+        return RecordingTransport(os.environ[RECORD_ENV_VAR], transport)
+    return transport
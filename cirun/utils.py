@@ -1,3 +1,6 @@
+import hashlib
+import os
+
 import requests
 import typer
 from rich.console import Console
@@ -5,6 +8,8 @@ from typer.core import TyperGroup
 
 from click import Context
 
+from cirun import profiling
+
 
 class OrderCommands(TyperGroup):
     def list_commands(self, ctx: Context):
@@ -23,11 +28,87 @@ def option(name, help, *args, **kwargs):
     )
 
 
+def cirun_cache_dir():
+    """Directory for cirun's local state, ``$CIRUN_CACHE_DIR`` or
+    ``$XDG_CACHE_HOME/cirun`` (``~/.cache/cirun``). Created if missing."""
+    path = os.environ.get("CIRUN_CACHE_DIR") or os.path.join(
+        os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache"),
+        "cirun",
+    )
+    os.makedirs(path, mode=0o700, exist_ok=True)
+    return path
+
+
+def account_key():
+    """Short digest identifying the API endpoint and key in use, local state is
+    kept per account since different keys see different repositories."""
+    key = f"{os.environ.get('CIRUN_API_ENDPOINT', '')}|{os.environ.get('CIRUN_API_KEY', '')}"
+    return hashlib.sha256(key.encode()).hexdigest()[:16]
+
+
+def _records(payload, *keys):
+    """Return the records of an API list response, which is either a JSON list
+    or an object holding the list under one of ``keys``."""
+    if isinstance(payload, list):
+        return payload
+    if isinstance(payload, dict):
+        for key in keys:
+            if isinstance(payload.get(key), list):
+                return payload[key]
+    return []
+
+
+def _record_name(record, *keys):
+    if isinstance(record, str):
+        return record
+    if isinstance(record, dict):
+        for key in keys:
+            if isinstance(record.get(key), str):
+                return record[key]
+    return None
+
+
+def repo_names(payload):
+    """Repository full names (``org/repo``) in a ``get_repos`` response."""
+    records = _records(payload, "repos", "repositories", "data")
+    names = (_record_name(record, "name", "repository", "full_name") for record in records)
+    return [name for name in names if name]
+
+
+def repo_states(payload):
+    """Mapping of repository full name to its ``active`` flag in a ``get_repos`` response."""
+    records = _records(payload, "repos", "repositories", "data")
+    states = {}
+    for record in records:
+        name = _record_name(record, "name", "repository", "full_name")
+        if name:
+            states[name] = bool(record.get("active", True)) if isinstance(record, dict) else True
+    return states
+
+
+def cloud_names(payload):
+    """Cloud provider names in a ``clouds`` response."""
+    records = _records(payload, "clouds", "cloud_connections", "data")
+    names = (_record_name(record, "cloud", "name", "provider") for record in records)
+    return [name for name in names if name]
+
+
+def repo_policy_ids(policies):
+    """Policy ID of each repository in the ``policies`` of an access control
+    document. A repository gets its first policy, as the cirun API applies it."""
+    policy_ids = {}
+    for policy in policies or []:
+        if policy.get("repo") is not None:
+            policy_ids.setdefault(policy["repo"], policy["id"])
+    return policy_ids
+
+
 def print_success_json(rjson):
-    console = Console(style="bold green")
-    console.rule("[bold green]")
-    console.print_json(data=rjson)
-    console.rule("[bold green]")
+    with profiling.timed("render"):
+        console = Console(style="bold green")
+        console.rule("[bold green]")
+        console.print_json(data=rjson)
+        console.rule("[bold green]")
 
 
 def _print_error(response):
@@ -0,0 +1,155 @@
+"""Change stream of repository and access control state.
+
+A :class:`Watcher` polls its sources with conditional requests (``ETag`` /
+``Last-Modified``), so unchanged data costs a ``304`` instead of a full
+download. Bodies whose hash did not change are not decoded or diffed, and
+changed ones are diffed against the previous snapshot to emit only ``add``,
+``remove`` and ``update`` events. The poll interval grows while nothing changes
+and snaps back to the minimum on the first change. A failed request is
+reported as an ``error`` event and backed off from like a poll without changes.
+"""
+import hashlib
+import time
+
+import requests
+
+from cirun import timeouts
+from cirun.utils import _record_name, _records, repo_policy_ids
+
+
+def _repo_snapshot(payload):
+    snapshot = {}
+    for record in _records(payload, "repos", "repositories", "data"):
+        name = _record_name(record, "name", "repository", "full_name")
+        if name:
+            snapshot[name] = record
+    return snapshot
+
+
+def _access_snapshot(payload):
+    """Resources each repository can use, keyed by repository name."""
+    access_yml = (payload or {}).get("access_yml") or {}
+    repos_by_policy = {policy_id: repo for repo, policy_id in repo_policy_ids(access_yml.get("policies")).items()}
+    snapshot = {}
+    for item in access_yml.get("access_control") or []:
+        for policy_id in item.get("policies") or []:
+            repo = repos_by_policy.get(policy_id)
+            if repo is not None:
+                snapshot.setdefault(repo, set()).add(item["resource"])
+    return {repo: sorted(resources) for repo, resources in snapshot.items()}
+
+
+class Source:
+    """A polled API resource: ``path`` and request arguments, plus a function
+    turning the response into a ``{key: value}`` snapshot."""
+
+    def __init__(self, kind, path, snapshot, **request_kwargs):
+        self.kind = kind
+        self.path = path
+        self.snapshot = snapshot
+        self.request_kwargs = request_kwargs
+        self.validators = {}
+        self.digest = None
+        self.state = None
+
+    @classmethod
+    def repos(cls):
+        return cls("repo", "repo", _repo_snapshot)
+
+    @classmethod
+    def access_control(cls, org):
+        return cls(f"access:{org}", "access-control", _access_snapshot, json={"org": org})
+
+
+def diff(kind, previous, current):
+    """Events turning snapshot ``previous`` into ``current``."""
+    events = []
+    for key in current.keys() - previous.keys():
+        events.append({"type": "add", "kind": kind, "key": key, "value": current[key]})
+    for key in previous.keys() - current.keys():
+        events.append({"type": "remove", "kind": kind, "key": key, "previous": previous[key]})
+    for key in current.keys() & previous.keys():
+        if current[key] != previous[key]:
+            events.append({
+                "type": "update", "kind": kind, "key": key,
+                "value": current[key], "previous": previous[key],
+            })
+    return sorted(events, key=lambda event: (event["key"], event["type"]))
+
+
+class Watcher:
+    def __init__(
+            self,
+            client,
+            sources,
+            on_event,
+            min_interval=5.0,
+            max_interval=300.0,
+            backoff=2.0,
+            initial=False,
+    ):
+        """
+        :param client: :class:`cirun.Cirun` client
+        :param sources: list of :class:`Source` to poll
+        :param on_event: callback receiving each event dict
+        :param min_interval: seconds between polls after a change
+        :param max_interval: upper bound for the poll interval while nothing changes
+        :param backoff: factor the interval grows by after a poll without changes
+        :param initial: emit ``add`` events for the state found by the first poll
+        """
+        self.client = client
+        self.sources = sources
+        self.on_event = on_event
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.backoff = backoff
+        self.initial = initial
+        self.interval = min_interval
+
+    def _poll_source(self, source):
+        """Poll one source and return its events."""
+        try:
+            response = self.client._get(source.path, headers=source.validators, **source.request_kwargs)
+        except (requests.exceptions.RequestException, timeouts.DeadlineExceeded) as e:
+            return [{"type": "error", "kind": source.kind, "error": str(e)}]
+        if response.status_code == 304:
+            return []
+        if response.status_code != 200:
+            return [{"type": "error", "kind": source.kind, "status_code": response.status_code}]
+        source.validators = {
+            header: response.headers[name]
+            for name, header in (("ETag", "If-None-Match"), ("Last-Modified", "If-Modified-Since"))
+            if name in response.headers
+        }
+        digest = hashlib.sha256(response.content).hexdigest()
+        if digest == source.digest:
+            return []
+        source.digest = digest
+        current = source.snapshot(response.json())
+        previous, source.state = source.state, current
+        if previous is None and not self.initial:
+            return []
+        return diff(source.kind, previous or {}, current)
+
+    def poll(self):
+        """Poll all sources once, emit their events and adapt the interval.
+        Returns the number of change events."""
+        changes = 0
+        for source in self.sources:
+            for event in self._poll_source(source):
+                changes += event["type"] != "error"
+                self.on_event(event)
+        if changes:
+            self.interval = self.min_interval
+        else:
+            self.interval = min(self.max_interval, self.interval * self.backoff)
+        return changes
+
+    def run(self, iterations=None):
+        """Poll until interrupted, or ``iterations`` times."""
+        count = 0
+        while iterations is None or count < iterations:
+            if count:
+                time.sleep(self.interval)
+            self.poll()
+            count += 1